@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the parsers' keyword checks against pdf_keywords.py
+
+Times each classification the parsers run (page gate, table rows, header
+cells, day title, text exercise lines, precise's row filter and sets/reps
+pattern) in its previous form, an any() over the keyword list or an inline
+re.search, and through the compiled matchers of pdf_keywords.py. Inputs
+are the page texts and tables of a synthetic program (see synthetic_pdf.py).
+Both forms are first checked for identical answers on those inputs and on
+random strings made of keyword fragments.
+
+Usage: python benchmarks/bench_keywords.py [--days N] [--number N] [--fuzz N] [--output results.json]
+"""
+import sys
+import os
+import re
+import json
+import random
+import timeit
+import argparse
+import tempfile
+from typing import Any, Callable, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+import pdfplumber  # noqa: E402
+from synthetic_pdf import build_pdf  # noqa: E402
+import pdf_keywords as kw  # noqa: E402
+from pdf_keywords import COLUMN_EXERCISE, COLUMN_WEEK  # noqa: E402
+from precise_pdf_parser import NOT_AN_EXERCISE  # noqa: E402
+from optimized_pdf_parser import EXERCISE_LINE  # noqa: E402
+
+# The checks as the parsers wrote them before pdf_keywords.py
+
+def old_page_gate(text: str) -> bool:
+    text = text.lower()
+    return bool(text) and any(keyword in text for keyword in [
+        'esercizio', 'exercise', 'allenamento', 'workout', 'training',
+        'serie', 'set', 'sets', 'ripetizioni', 'rep', 'reps',
+        'settimana', 'week', 'sett', 'giorno', 'day'
+    ])
+
+
+def old_table_rows(table: List[List]) -> Tuple[bool, int]:
+    table_text = ' '.join([' '.join([str(cell) for cell in row if cell]) for row in table[:3]]).lower()
+    is_workout = any(indicator in table_text for indicator in [
+        'esercizio', 'exercise', 'serie', 'set', 'ripetizioni', 'rep',
+        'squat', 'panca', 'bench', 'press', 'curl', 'row', 'pull',
+        'deadlift', 'stacco', 'kg', 'peso', 'weight'
+    ])
+    header_row_idx = 0
+    for i in range(min(3, len(table))):
+        row_text = ' '.join([str(cell) for cell in table[i] if cell]).lower()
+        if any(keyword in row_text for keyword in ['esercizio', 'exercise', 'serie', 'set']):
+            header_row_idx = i
+            break
+    return is_workout, header_row_idx
+
+
+def old_header_cells(headers: List[str]) -> Tuple[int, List[int]]:
+    exercise_col = -1
+    for i, header in enumerate(headers):
+        if any(keyword in header for keyword in ['esercizio', 'exercise', 'nome', 'name']):
+            exercise_col = i
+            break
+    week_cols = []
+    for i, header in enumerate(headers):
+        header_clean = header.strip().lower()
+        if (re.search(r'sett|week|\d+|peso|weight|kg|w\d|settimana', header_clean) and
+                len(header_clean) > 0 and header_clean not in ['esercizio', 'exercise', 'nome', 'name']):
+            week_cols.append(i)
+    return exercise_col, week_cols
+
+
+def old_title(text: str) -> Any:
+    for line in text.split('\n')[:10]:
+        line = line.strip()
+        if any(keyword in line.lower() for keyword in ['giorno', 'day', 'allenamento', 'workout']):
+            return line
+    return None
+
+
+def old_exercise_lines(text: str) -> List[bool]:
+    return [any(keyword in line.lower() for keyword in ['squat', 'panca', 'stacco', 'press', 'curl', 'row'])
+            for line in text.split('\n')]
+
+
+def old_precise_row(name: str, cells: List[str]) -> Tuple[bool, List[bool]]:
+    skip = any(keyword in name.lower() for keyword in ['esercizio', 'giorno', 'sett'])
+    pattern = r'(\d+\s*x\s*\d+|\d+["\']|\d+\s*iso|\d+\s*sec|\d+\s*totali)'
+    return skip, [bool(re.search(pattern, cell, re.IGNORECASE)) for cell in cells]
+
+# The same checks through pdf_keywords.py
+
+def new_page_gate(text: str) -> bool:
+    text = text.lower()
+    return bool(text) and kw.WORKOUT_TEXT.contains(text)
+
+
+def new_table_rows(table: List[List]) -> Tuple[bool, int]:
+    return kw.scan_table_head(table)
+
+
+def new_header_cells(headers: List[str]) -> Tuple[int, List[int]]:
+    exercise_col = -1
+    week_cols = []
+    for i, header in enumerate(headers):
+        labels = kw.HEADER_CELLS.classify(header)
+        if exercise_col < 0 and COLUMN_EXERCISE in labels:
+            exercise_col = i
+        if COLUMN_WEEK in labels or kw.WEEK_NUMBER_PATTERN.search(header):
+            week_cols.append(i)
+    return exercise_col, week_cols
+
+
+def new_title(text: str) -> Any:
+    return kw.find_title(text)
+
+
+def new_exercise_lines(text: str) -> List[bool]:
+    return [EXERCISE_LINE.contains(line.lower()) for line in text.split('\n')]
+
+
+def new_precise_row(name: str, cells: List[str]) -> Tuple[bool, List[bool]]:
+    skip = NOT_AN_EXERCISE.contains(name.lower())
+    return skip, [bool(kw.SETS_REPS_PATTERN.search(cell)) for cell in cells]
+
+
+CHECKS: Dict[str, Tuple[Callable, Callable, str]] = {
+    "page_gate": (old_page_gate, new_page_gate, "texts"),
+    "table_rows": (old_table_rows, new_table_rows, "tables"),
+    "header_cells": (old_header_cells, new_header_cells, "headers"),
+    "title": (old_title, new_title, "texts"),
+    "exercise_lines": (old_exercise_lines, new_exercise_lines, "texts"),
+    "precise_row": (old_precise_row, new_precise_row, "rows"),
+}
+
+
+def load_inputs(days: int) -> Dict[str, List[Any]]:
+    pdf_bytes, _ = build_pdf(days, rows=12, noise=max(1, days // 5), seed=11)
+    inputs: Dict[str, List[Any]] = {"texts": [], "tables": [], "headers": [], "rows": []}
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+        f.write(pdf_bytes)
+        f.flush()
+        with pdfplumber.open(f.name) as pdf:
+            for page in pdf.pages:
+                inputs["texts"].append(page.extract_text() or "")
+                for table in page.extract_tables():
+                    if len(table) < 2:
+                        continue
+                    inputs["tables"].append(table)
+                    for row in table:
+                        cells = [str(cell).strip() if cell else "" for cell in row]
+                        inputs["headers"].append([cell.lower() for cell in cells])
+                        if cells:
+                            inputs["rows"].append((cells[0], cells[1:]))
+    return inputs
+
+
+def fuzz_inputs(count: int, seed: int = 5) -> Dict[str, List[Any]]:
+    """Random strings glued from keyword fragments, digits and noise, to hit overlaps"""
+    rng = random.Random(seed)
+    pieces = [w for words in (kw.WORKOUT_KEYWORDS, kw.TABLE_INDICATORS, kw.EXERCISE_COLUMN_KEYWORDS,
+                              kw.WEEK_COLUMN_KEYWORDS, kw.TITLE_KEYWORDS) for w in words]
+    pieces += ['Sett. 1', '4 x 8', '30"', '20 iso', 'nan', 'None', 'x', ' ', '\n', 'w2', 'repress', 'settimana']
+
+    def fragment() -> str:
+        piece = rng.choice(pieces)
+        cut = rng.randint(0, len(piece))
+        return piece[:cut] if rng.random() < 0.3 else piece
+
+    def string() -> str:
+        return "".join(fragment() for _ in range(rng.randint(0, 6)))
+
+    return {
+        "texts": [string() for _ in range(count)],
+        "tables": [[[string() for _ in range(rng.randint(1, 4))] for _ in range(rng.randint(2, 4))]
+                   for _ in range(count)],
+        "headers": [[string().lower() for _ in range(rng.randint(1, 6))] for _ in range(count)],
+        "rows": [(string(), [string() for _ in range(3)]) for _ in range(count)],
+    }
+
+
+def _call(fn: Callable, item: Any) -> Any:
+    return fn(*item) if isinstance(item, tuple) else fn(item)
+
+
+def check_equivalence(inputs: Dict[str, List[Any]]) -> Dict[str, int]:
+    mismatches = {}
+    for name, (old, new, kind) in CHECKS.items():
+        mismatches[name] = sum(_call(old, item) != _call(new, item) for item in inputs[kind])
+    return mismatches
+
+
+def run(days: int, number: int, fuzz: int) -> Dict[str, Any]:
+    inputs = load_inputs(days)
+    report: Dict[str, Any] = {
+        "days": days,
+        "inputs": {kind: len(items) for kind, items in inputs.items()},
+        "mismatches": check_equivalence(inputs),
+        "fuzz_mismatches": check_equivalence(fuzz_inputs(fuzz)),
+        "checks": {},
+    }
+    for name, (old, new, kind) in CHECKS.items():
+        items = inputs[kind]
+        timings = {}
+        for label, fn in (("old", old), ("new", new)):
+            best = min(timeit.repeat(lambda: [_call(fn, item) for item in items], number=number, repeat=5))
+            timings[f"{label}_us_per_call"] = round(best / number / len(items) * 1e6, 3)
+        timings["speedup"] = round(timings["old_us_per_call"] / timings["new_us_per_call"], 2)
+        report["checks"][name] = timings
+    return report
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['days']} days; inputs: {report['inputs']}")
+    print(f"{'check':15} {'old us':>8} {'new us':>8} {'speedup':>8}  mismatches (corpus / fuzz)")
+    for name, r in report["checks"].items():
+        print(f"{name:15} {r['old_us_per_call']:8.2f} {r['new_us_per_call']:8.2f} {r['speedup']:7.2f}x  "
+              f"{report['mismatches'][name]} / {report['fuzz_mismatches'][name]}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Keyword checks: any() loops against pdf_keywords")
+    arg_parser.add_argument("--days", type=int, default=20)
+    arg_parser.add_argument("--number", type=int, default=50, help="Passes over the inputs per timing")
+    arg_parser.add_argument("--fuzz", type=int, default=5000, help="Random inputs per check for the equivalence test")
+    arg_parser.add_argument("--output", help="Write results as JSON to this file")
+    args = arg_parser.parse_args()
+
+    report = run(args.days, args.number, args.fuzz)
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the PDF parsers against page count
+
+Generates image-heavy synthetic programs (see synthetic_pdf.py; every day page
+embeds its own photo) of increasing length and parses each one in a fresh
+interpreter, once in the default mode and once with PDF_PARSER_LOW_MEMORY=1.
+Reports the parse's peak RSS over the interpreter's RSS after imports, the
+latency and whether both modes found the same days. With --max-rss-mb the
+low-memory run also gets that ceiling, to show where parsing stops.
+
+Usage: python benchmarks/bench_memory.py [--pages 10,30,60,120] [--photo-size PX]
+                                         [--parsers precise,optimized] [--max-rss-mb N]
+                                         [--output results.json]
+"""
+import sys
+import os
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+from typing import Dict, Any, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_pdf import build_pdf  # noqa: E402
+
+PARSERS = {
+    "precise": ("precise_pdf_parser", "PrecisePDFParser"),
+    "optimized": ("optimized_pdf_parser", "OptimizedPDFParser"),
+    "enhanced": ("enhanced_pdf_parser", "EnhancedPDFParser"),
+}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss carries over the parent's peak from before the fork; the
+    # high-water mark of this process's own address space does not
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(parser_name: str, pdf_path: str) -> Dict[str, Any]:
+    """Runs inside the child interpreter: one parse, measured from after the imports"""
+    sys.path.insert(0, REPO_ROOT)
+    module_name, class_name = PARSERS[parser_name]
+    module = __import__(module_name)
+    # One process: the pool's workers would not show in this process's RSS
+    parser = getattr(module, class_name)(**({"workers": 1} if parser_name == "precise" else {}))
+
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    result = parser.parse_pdf(pdf_path)
+    return {
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "success": result.get("success", False),
+        "days": [p["pageNumber"] for p in result.get("pages", [])],
+        "memory_limited": result.get("memory_limited"),
+    }
+
+
+def _spawn_child(parser_name: str, pdf_path: str, low_memory: bool, max_rss_mb: float) -> Dict[str, Any]:
+    env = dict(os.environ, PDF_CACHE_DISABLED="1")
+    env.pop("PDF_PARSER_LOW_MEMORY", None)
+    env.pop("PDF_PARSER_MAX_RSS_MB", None)
+    if low_memory:
+        env["PDF_PARSER_LOW_MEMORY"] = "1"
+        if max_rss_mb:
+            env["PDF_PARSER_MAX_RSS_MB"] = str(max_rss_mb)
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", parser_name, pdf_path],
+        cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(parser_names: List[str], page_counts: List[int], photo_size: int,
+        max_rss_mb: float, corpus_dir: str) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "photo_size": photo_size,
+            "max_rss_mb": max_rss_mb,
+        },
+        "results": [],
+    }
+
+    for days in page_counts:
+        pdf_bytes, expected = build_pdf(days, rows=10, noise=0, seed=days, photo_size=photo_size)
+        pdf_path = os.path.join(corpus_dir, f"photos_{days}.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+
+        for parser_name in parser_names:
+            default = _spawn_child(parser_name, pdf_path, False, max_rss_mb)
+            low = _spawn_child(parser_name, pdf_path, True, max_rss_mb)
+            results["results"].append({
+                "parser": parser_name,
+                "page_count": expected["page_count"],
+                "file_mb": round(len(pdf_bytes) / (1024 * 1024), 1),
+                "default": default,
+                "low_memory": low,
+                "same_days": default["days"] == low["days"],
+            })
+    return results
+
+
+def _print_report(results: Dict[str, Any]) -> None:
+    print(f"{'parser':10} {'pages':>5} {'file MB':>7}  {'default MB':>10} {'ms':>8}  "
+          f"{'low-mem MB':>10} {'ms':>8}  {'same days':>9}")
+    for r in results["results"]:
+        default, low = r["default"], r["low_memory"]
+        stopped = ""
+        if low["memory_limited"]:
+            stopped = f"  stopped after page {low['memory_limited']['stopped_after_page']}"
+        print(f"{r['parser']:10} {r['page_count']:5d} {r['file_mb']:7.1f}  "
+              f"{default['peak_rss_mb'] - default['baseline_rss_mb']:10.1f} {default['ms']:8.1f}  "
+              f"{low['peak_rss_mb'] - low['baseline_rss_mb']:10.1f} {low['ms']:8.1f}  "
+              f"{'yes' if r['same_days'] else 'no':>9}{stopped}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        print(json.dumps(run_child(sys.argv[2], sys.argv[3])))
+        sys.exit(0)
+
+    arg_parser = argparse.ArgumentParser(description="Peak parser memory against page count")
+    arg_parser.add_argument("--pages", default="10,30,60,120", help="Day pages per document")
+    arg_parser.add_argument("--photo-size", type=int, default=384, help="Side of each page's photo in pixels")
+    arg_parser.add_argument("--parsers", default="precise,optimized")
+    arg_parser.add_argument("--max-rss-mb", type=float, default=0, help="RSS ceiling for the low-memory runs")
+    arg_parser.add_argument("--corpus-dir", help="Keep the generated PDFs in this directory")
+    arg_parser.add_argument("--output", help="Write results as JSON to this file")
+    args = arg_parser.parse_args()
+
+    parser_names = [name.strip() for name in args.parsers.split(",") if name.strip()]
+    unknown = [name for name in parser_names if name not in PARSERS]
+    if unknown:
+        print(f"Unknown parser(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    page_counts = [int(n) for n in args.pages.split(",")]
+
+    if args.corpus_dir:
+        os.makedirs(args.corpus_dir, exist_ok=True)
+        results = run(parser_names, page_counts, args.photo_size, args.max_rss_mb, args.corpus_dir)
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            results = run(parser_names, page_counts, args.photo_size, args.max_rss_mb, corpus_dir)
+
+    _print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Throughput / latency / memory benchmark for the three PDF parser classes
+
+Generates a synthetic corpus (see synthetic_pdf.py), runs every parser on
+every document in a fresh interpreter, and reports pages/sec, p50/p95
+latency and peak RSS per document, plus an output-equivalence check against
+the exercises written into the corpus.
+
+Usage: python benchmarks/bench_parsers.py [--repeats N] [--parsers precise,optimized]
+                                          [--output results.json] [--baseline previous.json]
+"""
+import sys
+import os
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+from typing import Dict, Any, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_pdf import build_pdf  # noqa: E402
+
+PARSERS = {
+    "precise": ("precise_pdf_parser", "PrecisePDFParser"),
+    "optimized": ("optimized_pdf_parser", "OptimizedPDFParser"),
+    "enhanced": ("enhanced_pdf_parser", "EnhancedPDFParser"),
+}
+
+CORPUS = [
+    {"name": "small", "days": 3, "rows": 6, "noise": 1, "seed": 1},
+    {"name": "medium", "days": 10, "rows": 10, "noise": 3, "seed": 2},
+    {"name": "large", "days": 30, "rows": 12, "noise": 6, "seed": 3},
+]
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_child(parser_name: str, pdf_path: str, repeats: int) -> Dict[str, Any]:
+    """Runs inside the child interpreter: parse the document repeats times"""
+    sys.path.insert(0, REPO_ROOT)
+    module_name, class_name = PARSERS[parser_name]
+    module = __import__(module_name)
+    parser = getattr(module, class_name)()
+
+    latencies = []
+    result: Dict[str, Any] = {}
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = parser.parse_pdf(pdf_path)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "latencies_ms": latencies,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "success": result.get("success", False),
+        "pages": [
+            {"pageNumber": p["pageNumber"], "names": [e["name"] for e in p["exercises"]]}
+            for p in result.get("pages", [])
+        ],
+    }
+
+
+def _spawn_child(parser_name: str, pdf_path: str, repeats: int) -> Dict[str, Any]:
+    env = dict(os.environ, PDF_CACHE_DISABLED="1")
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", parser_name, pdf_path, str(repeats)],
+        cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _check_equivalence(pages: List[Dict[str, Any]], expected: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare the (page, exercise names) a parser found with what the corpus contains"""
+    want = {d["pageNumber"]: [row[0] for row in d["rows"]] for d in expected["days"]}
+    got = {p["pageNumber"]: p["names"] for p in pages}
+    matching = sum(1 for page_num, names in want.items() if got.get(page_num) == names)
+    return {
+        "days_expected": len(want),
+        "days_found": len(got),
+        "days_matching": matching,
+        "extra_pages": sorted(set(got) - set(want)),
+        "equivalent": matching == len(want) and set(got) == set(want),
+    }
+
+
+def run(parser_names: List[str], repeats: int, corpus_dir: str) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeats": repeats,
+        },
+        "corpus": [],
+        "results": [],
+    }
+
+    for doc in CORPUS:
+        pdf_bytes, expected = build_pdf(doc["days"], doc["rows"], doc["noise"], doc["seed"])
+        pdf_path = os.path.join(corpus_dir, f"{doc['name']}.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        results["corpus"].append(dict(doc, page_count=expected["page_count"], bytes=len(pdf_bytes)))
+
+        for parser_name in parser_names:
+            child = _spawn_child(parser_name, pdf_path, repeats)
+            p50 = _percentile(child["latencies_ms"], 50)
+            results["results"].append({
+                "parser": parser_name,
+                "document": doc["name"],
+                "page_count": expected["page_count"],
+                "p50_ms": round(p50, 2),
+                "p95_ms": round(_percentile(child["latencies_ms"], 95), 2),
+                "pages_per_sec": round(expected["page_count"] / (p50 / 1000), 2) if p50 else None,
+                "peak_rss_mb": child["peak_rss_mb"],
+                "success": child["success"],
+                "equivalence": _check_equivalence(child["pages"], expected),
+            })
+
+    return results
+
+
+def _print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    previous = {}
+    if baseline:
+        previous = {(r["parser"], r["document"]): r for r in baseline.get("results", [])}
+
+    print(f"{'parser':10} {'document':8} {'pages':>5} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'pages/s':>8} {'RSS MB':>7} {'equiv':>6}  {'vs baseline':>11}")
+    for r in results["results"]:
+        delta = ""
+        before = previous.get((r["parser"], r["document"]))
+        if before and before.get("p50_ms"):
+            delta = f"{(r['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100:+.1f}%"
+        eq = r["equivalence"]
+        print(f"{r['parser']:10} {r['document']:8} {r['page_count']:5d} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} "
+              f"{r['pages_per_sec'] or 0:8.1f} {r['peak_rss_mb']:7.1f} "
+              f"{eq['days_matching']:>2}/{eq['days_expected']:<3}  {delta:>11}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        print(json.dumps(run_child(sys.argv[2], sys.argv[3], int(sys.argv[4]))))
+        sys.exit(0)
+
+    arg_parser = argparse.ArgumentParser(description="Benchmark the PDF parsers on a synthetic corpus")
+    arg_parser.add_argument("--repeats", type=int, default=5)
+    arg_parser.add_argument("--parsers", default=",".join(PARSERS))
+    arg_parser.add_argument("--corpus-dir", help="Keep the generated PDFs in this directory")
+    arg_parser.add_argument("--output", help="Write results as JSON to this file")
+    arg_parser.add_argument("--baseline", help="Previous results JSON to compare p50 latency against")
+    args = arg_parser.parse_args()
+
+    parser_names = [name.strip() for name in args.parsers.split(",") if name.strip()]
+    unknown = [name for name in parser_names if name not in PARSERS]
+    if unknown:
+        print(f"Unknown parser(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.corpus_dir:
+        os.makedirs(args.corpus_dir, exist_ok=True)
+        results = run(parser_names, args.repeats, args.corpus_dir)
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            results = run(parser_names, args.repeats, corpus_dir)
+
+    _print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Size and speed of the parse-result encodings
+
+Parses a large synthetic program once (see synthetic_pdf.py) and compares
+the encodings of pdf_result_model.py against the old indented CLI output:
+encoded size plus Python serialize and parse time (best of N runs). Rows
+results are decoded back into PDFPage dicts, as server/pdf-parser-pool.ts
+does, and checked against the original pages.
+
+Usage: python benchmarks/bench_serialize.py [--days N] [--rows N] [--repeats N] [--output results.json]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("PDF_CACHE_DISABLED", "1")
+
+from synthetic_pdf import build_pdf  # noqa: E402
+from precise_pdf_parser import PrecisePDFParser  # noqa: E402
+import pdf_result_model as model  # noqa: E402
+
+
+def decode_page(row: List[Any]) -> Dict[str, Any]:
+    """Python twin of decodePage() in server/pdf-parser-pool.ts"""
+    exercises = []
+    for ex in row[2]:
+        week_row = ex[3]
+        if isinstance(week_row, list):
+            weeks = {model.week_key(i): {"weight": w} for i, w in enumerate(week_row, 1)}
+        else:
+            weeks = {key: {"weight": w} for key, w in week_row.items()}
+        exercise = {"id": ex[0], "name": ex[1], "setsReps": ex[2], "weeks": weeks}
+        for field, value in zip(("scarico", "recupero", "note"), ex[4:]):
+            if value is not None:
+                exercise[field] = value
+        exercises.append(exercise)
+    return {"pageNumber": row[0], "title": row[1], "exercises": exercises}
+
+
+def _best_ms(fn: Callable[[], Any], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return round(best, 3)
+
+
+def run(days: int, rows: int, repeats: int) -> Dict[str, Any]:
+    pdf_bytes, _ = build_pdf(days, rows, noise=0, seed=7)
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+        f.write(pdf_bytes)
+        f.flush()
+        result = PrecisePDFParser(workers=1).parse_pdf(f.name)
+
+    encodings: Dict[str, Dict[str, Callable[..., Any]]] = {
+        "json_indented": {
+            "dump": lambda: json.dumps(result, indent=2).encode(),
+            "load": lambda data: json.loads(data),
+        },
+        "json": {
+            "dump": lambda: model.dumps(result),
+            "load": lambda data: json.loads(data),
+        },
+        "json_rows": {
+            "dump": lambda: model.dumps(result, rows=True),
+            "load": lambda data: [decode_page(p) for p in json.loads(data)["pages"]],
+        },
+    }
+    if model.MSGPACK_AVAILABLE:
+        import msgpack
+        encodings["msgpack"] = {
+            "dump": lambda: model.dumps(result, model.FORMAT_MSGPACK),
+            "load": lambda data: msgpack.unpackb(data),
+        }
+        encodings["msgpack_rows"] = {
+            "dump": lambda: model.dumps(result, model.FORMAT_MSGPACK, rows=True),
+            "load": lambda data: [decode_page(p) for p in msgpack.unpackb(data)["pages"]],
+        }
+
+    report = {"days": days, "rows": rows, "exercises": sum(len(p["exercises"]) for p in result["pages"]),
+              "encodings": {}}
+    for name, codec in encodings.items():
+        data = codec["dump"]()
+        loaded = codec["load"](data)
+        pages = loaded if isinstance(loaded, list) else loaded["pages"]
+        report["encodings"][name] = {
+            "bytes": len(data),
+            "serialize_ms": _best_ms(codec["dump"], repeats),
+            "parse_ms": _best_ms(lambda: codec["load"](data), repeats),
+            "roundtrip_ok": pages == result["pages"],
+        }
+    return report
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['days']} days, {report['exercises']} exercises")
+    print(f"{'encoding':14} {'bytes':>9} {'serialize ms':>13} {'parse ms':>9}  roundtrip")
+    for name, r in report["encodings"].items():
+        print(f"{name:14} {r['bytes']:9d} {r['serialize_ms']:13.2f} {r['parse_ms']:9.2f}  "
+              f"{'ok' if r['roundtrip_ok'] else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare parse-result encodings")
+    arg_parser.add_argument("--days", type=int, default=60)
+    arg_parser.add_argument("--rows", type=int, default=20)
+    arg_parser.add_argument("--repeats", type=int, default=20)
+    arg_parser.add_argument("--output", help="Write results as JSON to this file")
+    args = arg_parser.parse_args()
+
+    report = run(args.days, args.rows, args.repeats)
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
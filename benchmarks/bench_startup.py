@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for enhanced_pdf_parser.py
+
+Compares importing the parser as it is now (fallback backends loaded lazily)
+with the previous behaviour, where pandas, camelot and tabula were imported at
+module load. Each sample runs in a fresh interpreter.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--output results.json]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import importlib.util
+from typing import Dict, Any, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EAGER_BACKENDS = ["pandas", "camelot", "tabula"]
+
+
+def _time_import(statement: str) -> float:
+    """Wall time in ms of a fresh interpreter running statement"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], cwd=REPO_ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - started) * 1000
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 2),
+        "min_ms": round(ordered[0], 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def run(runs: int) -> Dict[str, Any]:
+    installed = [name for name in EAGER_BACKENDS if importlib.util.find_spec(name) is not None]
+    scenarios = {
+        "baseline_python": "pass",
+        "lazy": "import enhanced_pdf_parser",
+        "eager": "; ".join(["import enhanced_pdf_parser"] + [f"import {name}" for name in installed]),
+    }
+
+    results: Dict[str, Any] = {"runs": runs, "eager_backends": installed, "scenarios": {}}
+    for name, statement in scenarios.items():
+        # Warm the OS page cache so the first sample is not an outlier
+        _time_import(statement)
+        samples = [_time_import(statement) for _ in range(runs)]
+        results["scenarios"][name] = _summarize(samples)
+
+    lazy = results["scenarios"]["lazy"]["p50_ms"]
+    eager = results["scenarios"]["eager"]["p50_ms"]
+    results["saved_ms"] = round(eager - lazy, 2)
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--runs", type=int, default=10)
+    arg_parser.add_argument("--output", help="Write results as JSON to this file")
+    args = arg_parser.parse_args()
+
+    results = run(args.runs)
+    for name, summary in results["scenarios"].items():
+        print(f"{name:16} p50 {summary['p50_ms']:8.1f} ms  (min {summary['min_ms']:.1f}, max {summary['max_ms']:.1f})")
+    print(f"eager backends: {', '.join(results['eager_backends']) or 'none installed'}")
+    print(f"saved per cold start: {results['saved_ms']:.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for server/telegram_dispatch.py against a local stand-in
+
+Starts a stand-in Bot API server on localhost that accepts sendMessage,
+sendVideo and sendMediaGroup, simulates upload bandwidth and answers every
+Nth request with a 429, then dispatches a synthetic session of dummy videos
+at several concurrency levels. Each run uses a fresh ledger; a second send
+with the same ledger checks that nothing is shipped twice.
+
+Usage: python benchmarks/bench_telegram.py [--videos N] [--size-mb N] [--mbps N]
+                                           [--rate-limit-every N] [--concurrency 1,3,6]
+                                           [--output results.json]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, "server"))
+
+import telegram_dispatch  # noqa: E402
+
+TOKEN = "bench-token"
+CHAT_ID = "1"
+
+
+class StandInBotAPI(ThreadingHTTPServer):
+    """Minimal Bot API: counts calls, throttles uploads, injects 429s"""
+    daemon_threads = True
+
+    def __init__(self, mbps: float, rate_limit_every: int):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.mbps = mbps
+        self.rate_limit_every = rate_limit_every
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.next_message_id = 1
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def message_ids(self, count: int) -> List[int]:
+        with self.lock:
+            start = self.next_message_id
+            self.next_message_id += count
+        return list(range(start, start + count))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as api.telegram.org does
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server: StandInBotAPI = self.server  # type: ignore[assignment]
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        method = self.path.rsplit("/", 1)[-1]
+
+        with server.lock:
+            server.requests += 1
+            throttled = server.rate_limit_every and server.requests % server.rate_limit_every == 0
+            if throttled:
+                server.rate_limited += 1
+        if throttled:
+            return self._reply(429, {"ok": False, "error_code": 429,
+                                     "description": "Too Many Requests: retry after 1",
+                                     "parameters": {"retry_after": 1}})
+
+        # Simulated upstream bandwidth for the upload itself
+        if server.mbps:
+            time.sleep(len(body) * 8 / (server.mbps * 1_000_000))
+
+        if method == "sendMediaGroup":
+            form = BytesParser(policy=policy.HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body)
+            fields = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                      for part in form.iter_parts()}
+            media = json.loads(fields["media"])
+            result: Any = [{"message_id": i} for i in server.message_ids(len(media))]
+        else:
+            result = {"message_id": server.message_ids(1)[0]}
+        self._reply(200, {"ok": True, "result": result})
+
+
+def make_session(upload_dir: str, videos: int, size_mb: float) -> Dict[str, Any]:
+    """Session payload with `videos` dummy files spread over exercises and weeks"""
+    exercises, records = [], []
+    payload = os.urandom(int(size_mb * 1024 * 1024))
+    for i in range(videos):
+        exercise_id, week_id = f"ex{i // 4}", f"week{i % 4 + 1}"
+        if i % 4 == 0:
+            exercises.append({"id": exercise_id, "name": f"Esercizio {i // 4 + 1}",
+                              "setsReps": "4x6", "weeks": {}})
+        exercises[-1]["weeks"][week_id] = {"weight": "100kg", "rpe": 8, "video": {"id": str(i)}}
+        filename = f"bench_{i}.mp4"
+        with open(os.path.join(upload_dir, filename), "wb") as f:
+            # Distinct content per file, like real uploads
+            f.write(payload + i.to_bytes(4, "big"))
+        records.append({"id": i, "exerciseId": exercise_id, "weekId": week_id, "filename": filename})
+    return {"session": {"id": 1, "selectedDay": "Giorno 1", "exercises": exercises},
+            "videos": records, "uploadDir": upload_dir}
+
+
+def run_once(server: StandInBotAPI, payload: Dict[str, Any], concurrency: int) -> Dict[str, Any]:
+    start_requests, start_limited = server.requests, server.rate_limited
+    started = time.perf_counter()
+    result = telegram_dispatch.dispatch(payload, TOKEN, CHAT_ID, server.api_base, concurrency)
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "requests": server.requests - start_requests,
+        "rateLimited": server.rate_limited - start_limited,
+        **{k: result[k] for k in ("summary", "sent", "skipped", "groups")},
+        "failed": len(result["failed"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=24)
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--mbps", type=float, default=100.0, help="Simulated upload bandwidth per request")
+    parser.add_argument("--rate-limit-every", type=int, default=5, help="Answer every Nth request with 429 (0: never)")
+    parser.add_argument("--concurrency", default="1,3,6")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    server = StandInBotAPI(args.mbps, args.rate_limit_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Progress lines would drown the report
+    telegram_dispatch.emit = lambda *a, **k: None
+
+    runs = []
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            with tempfile.TemporaryDirectory() as upload_dir:
+                payload = make_session(upload_dir, args.videos, args.size_mb)
+                first = run_once(server, payload, concurrency)
+                resend = run_once(server, payload, concurrency)
+            runs.append({"concurrency": concurrency, "first": first, "resend": resend})
+            print(f"concurrency={concurrency:<3} first: {first['seconds']:>7.2f}s "
+                  f"{first['sent']} sent in {first['groups']} groups, {first['requests']} requests "
+                  f"({first['rateLimited']} rate limited) | resend: {resend['seconds']:.2f}s "
+                  f"{resend['sent']} sent, {resend['skipped']} skipped")
+    finally:
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "args": vars(args), "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
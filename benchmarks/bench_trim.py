@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Speed / accuracy benchmark for the trim modes of server/trim_video.py
+
+Cuts the same random (t_in, t_out) windows out of local sample clips with
+every mode (copy, smart, accurate) and reports p50/p95 wall time plus how far
+the output duration is from the requested one. Stream copy snaps to the
+keyframe before t_in, so its error grows with the GOP length; smart-cut and
+the full re-encode should both be frame accurate.
+
+Without --clips, H.264 sample clips are generated with ffmpeg's lavfi sources.
+
+Usage: python benchmarks/bench_trim.py [--clips a.mp4,b.mp4] [--cuts N] [--seed N]
+                                       [--modes copy,smart,accurate] [--output results.json]
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from typing import Dict, Any, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, "server"))
+
+from trim_video import trim_video, TRIM_MODES  # noqa: E402
+
+# name, duration (s), GOP length (frames at 30 fps)
+SAMPLE_CLIPS = [
+    {"name": "gop2s_60s", "duration": 60, "gop": 60},
+    {"name": "gop5s_120s", "duration": 120, "gop": 150},
+]
+CUT_LENGTH = (3.0, 20.0)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def make_sample_clip(path: str, duration: int, gop: int) -> None:
+    """720p30 H.264 + AAC test pattern with a fixed GOP length"""
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", str(gop), "-keyint_min", str(gop),
+        "-sc_threshold", "0", "-pix_fmt", "yuv420p", "-c:a", "aac", path
+    ], check=True)
+
+
+def probe_duration(path: str) -> float:
+    out = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration", "-of", "csv=p=0", path
+    ], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+def random_cuts(duration: float, count: int, rng: random.Random) -> List[Dict[str, float]]:
+    cuts = []
+    for _ in range(count):
+        length = rng.uniform(*CUT_LENGTH)
+        t_in = round(rng.uniform(0, max(0.0, duration - length)), 3)
+        cuts.append({"t_in": t_in, "t_out": round(t_in + length, 3)})
+    return cuts
+
+
+def run(clips: List[str], modes: List[str], cuts: int, seed: int, work_dir: str) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "cuts": cuts,
+            "seed": seed,
+        },
+        "results": [],
+    }
+
+    for clip in clips:
+        windows = random_cuts(probe_duration(clip), cuts, rng)
+        for mode in modes:
+            timings, errors, failures = [], [], 0
+            for i, window in enumerate(windows):
+                output = os.path.join(work_dir, f"{mode}_{i}.mp4")
+                started = time.perf_counter()
+                # trim_video reports success on stdout; keep the table readable
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    ok = trim_video(clip, output, window["t_in"], window["t_out"], mode)
+                timings.append((time.perf_counter() - started) * 1000)
+                if not ok:
+                    failures += 1
+                    continue
+                errors.append(abs(probe_duration(output) - (window["t_out"] - window["t_in"])))
+                os.remove(output)
+
+            results["results"].append({
+                "clip": os.path.basename(clip),
+                "mode": mode,
+                "p50_ms": round(_percentile(timings, 50), 1),
+                "p95_ms": round(_percentile(timings, 95), 1),
+                "mean_duration_error_s": round(sum(errors) / len(errors), 3) if errors else None,
+                "max_duration_error_s": round(max(errors), 3) if errors else None,
+                "failures": failures,
+            })
+    return results
+
+
+def _print_report(results: Dict[str, Any]) -> None:
+    print(f"{'clip':16} {'mode':9} {'p50 ms':>9} {'p95 ms':>9} {'mean err s':>11} {'max err s':>10} {'fail':>5}")
+    for r in results["results"]:
+        mean_err = "-" if r["mean_duration_error_s"] is None else f"{r['mean_duration_error_s']:.3f}"
+        max_err = "-" if r["max_duration_error_s"] is None else f"{r['max_duration_error_s']:.3f}"
+        print(f"{r['clip']:16} {r['mode']:9} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} "
+              f"{mean_err:>11} {max_err:>10} {r['failures']:5d}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark copy, smart-cut and full re-encode trims")
+    arg_parser.add_argument("--clips", help="Comma-separated local clips (default: generated samples)")
+    arg_parser.add_argument("--modes", default=",".join(TRIM_MODES))
+    arg_parser.add_argument("--cuts", type=int, default=5, help="Random windows per clip")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", help="Write results as JSON to this file")
+    args = arg_parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in TRIM_MODES]
+    if unknown:
+        print(f"Unknown mode(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.clips:
+            clips = [clip.strip() for clip in args.clips.split(",") if clip.strip()]
+        else:
+            clips = []
+            for sample in SAMPLE_CLIPS:
+                clip = os.path.join(work_dir, f"{sample['name']}.mp4")
+                make_sample_clip(clip, sample["duration"], sample["gop"])
+                clips.append(clip)
+        results = run(clips, modes, args.cuts, args.seed, work_dir)
+
+    _print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
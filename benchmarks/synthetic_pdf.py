@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Dependency-free generator of synthetic workout program PDFs
+
+Each workout page holds a ruled table in the layout PrecisePDFParser expects:
+a "Giorno N" title row, the header
+Esercizio | Sett. 1..5 | Scarico+test | Recupero | Note pesi
+and one row per exercise. Noise pages (cover, nutrition text, image-only)
+can be interleaved to exercise the page filters. With a photo size, every day
+page also carries its own embedded photo, like image-heavy programs do.
+
+Usage: python benchmarks/synthetic_pdf.py <output.pdf> [--days N] [--rows N] [--noise N] [--seed N]
+                                          [--photo-size PX]
+"""
+import random
+import argparse
+import zlib
+from typing import Dict, Any, List, Tuple
+
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+MARGIN = 30
+ROW_HEIGHT = 22
+FONT_SIZE = 9
+
+HEADER = ["Esercizio", "Sett. 1", "Sett. 2", "Sett. 3", "Sett. 4", "Sett. 5",
+          "Scarico+test", "Recupero", "Note pesi"]
+COLUMN_WIDTHS = [190, 62, 62, 62, 62, 62, 90, 80, 112]
+
+EXERCISES = [
+    "Squat", "Panca piana", "Stacco da terra", "Military press", "Rematore bilanciere",
+    "Trazioni alla sbarra", "Affondi manubri", "Curl bilanciere", "French press",
+    "Hip thrust", "Leg press", "Lat machine", "Dip alle parallele", "Plank",
+    "Croci ai cavi", "Alzate laterali", "Stacco rumeno", "Front squat",
+]
+SETS_REPS = ["4 x 8", "5 x 5", "3 x 10", "3 x 12", "4 x 6", "6 x 3", "30\"", "3 x 20 sec", "45 iso"]
+RECOVERY = ["1'", "90\"", "2'", "2'30\"", "3'"]
+NOTES = ["", "80kg", "RPE 8", "+2.5kg", "tempo 3-1-1", "100kg"]
+NOISE_TEXT = [
+    "Indicazioni alimentari: distribuire i carboidrati attorno all'allenamento.",
+    "Bere almeno due litri di acqua al giorno e dormire sette-otto ore.",
+    "Proteine: 1.8 - 2 g per kg di peso corporeo, suddivise in quattro pasti.",
+    "Integrazione consigliata: creatina 3-5 g al giorno, vitamina D in inverno.",
+]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _text(x: float, y: float, text: str, size: int = FONT_SIZE) -> str:
+    return f"BT /F1 {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET"
+
+
+def _line(x1: float, y1: float, x2: float, y2: float) -> str:
+    return f"{x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S"
+
+
+def make_day(day: int, rows: int, rng: random.Random) -> Dict[str, Any]:
+    """Random exercise rows for one day, plus the exercises a parser should find"""
+    table_rows = []
+    for i in range(rows):
+        name = f"{rng.choice(EXERCISES)} {i + 1}"
+        weeks = [rng.choice(SETS_REPS) if rng.random() > 0.2 else "" for _ in range(5)]
+        table_rows.append([name] + weeks + [
+            rng.choice(["test", "", "3 x 5"]),
+            rng.choice(RECOVERY),
+            rng.choice(NOTES),
+        ])
+    return {"title": f"Giorno {day}", "rows": table_rows}
+
+
+def _table_page(day: Dict[str, Any]) -> str:
+    """Content stream of a ruled day table with a spanning title row"""
+    ops = ["0.5 w"]
+    table_width = sum(COLUMN_WIDTHS)
+    rows = [[day["title"]] + [""] * (len(HEADER) - 1), HEADER] + day["rows"]
+    top = PAGE_HEIGHT - MARGIN
+    bottom = top - ROW_HEIGHT * len(rows)
+    left = MARGIN
+    right = left + table_width
+
+    # Horizontal rulings
+    for i in range(len(rows) + 1):
+        y = top - i * ROW_HEIGHT
+        ops.append(_line(left, y, right, y))
+
+    # Vertical rulings; inner ones skip the spanning title row
+    x = left
+    for i, width in enumerate(COLUMN_WIDTHS + [0]):
+        y_start = top if i in (0, len(COLUMN_WIDTHS)) else top - ROW_HEIGHT
+        ops.append(_line(x, y_start, x, bottom))
+        x += width
+
+    for r, row in enumerate(rows):
+        y = top - (r + 1) * ROW_HEIGHT + 7
+        x = left
+        for c, cell in enumerate(row):
+            if cell:
+                ops.append(_text(x + 4, y, cell))
+            x += COLUMN_WIDTHS[c]
+    return "\n".join(ops)
+
+
+def _cover_page(title: str) -> str:
+    return "\n".join([
+        _text(MARGIN, PAGE_HEIGHT / 2 + 20, title, 28),
+        _text(MARGIN, PAGE_HEIGHT / 2 - 20, "Programma di allenamento personalizzato", 14),
+    ])
+
+
+def _text_page(rng: random.Random) -> str:
+    ops = [_text(MARGIN, PAGE_HEIGHT - MARGIN - 20, "Nutrizione e recupero", 18)]
+    y = PAGE_HEIGHT - MARGIN - 60
+    for _ in range(12):
+        ops.append(_text(MARGIN, y, rng.choice(NOISE_TEXT), 11))
+        y -= 18
+    return "\n".join(ops)
+
+
+def _image_page() -> str:
+    return f"q {PAGE_WIDTH - 2 * MARGIN} 0 0 {PAGE_HEIGHT - 2 * MARGIN} {MARGIN} {MARGIN} cm /Im1 Do Q"
+
+
+def _photo(page_content: str) -> str:
+    return page_content + f"\nq 160 0 0 120 {PAGE_WIDTH - MARGIN - 160} {MARGIN} cm /Ph1 Do Q"
+
+
+def _image_stream(rng: random.Random, size: int = 64) -> bytes:
+    pixels = bytes(rng.randrange(256) for _ in range(size * size * 3))
+    return zlib.compress(pixels)
+
+
+def build_pdf(days: int = 5, rows: int = 8, noise: int = 2, seed: int = 0,
+              photo_size: int = 0) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Return (pdf_bytes, expected). expected lists every workout page with its
+    1-based page number, title and exercise rows, for output-equivalence checks.
+    """
+    rng = random.Random(seed)
+    streams: List[str] = [_cover_page("Scheda di allenamento")]
+    photos: Dict[int, bytes] = {}
+    expected: Dict[str, Any] = {"days": [], "page_count": 0}
+
+    noise_kinds = ["text", "image"]
+    noise_after = set(rng.sample(range(1, days + 1), min(noise, days))) if noise else set()
+    for d in range(1, days + 1):
+        day = make_day(d, rows, rng)
+        if photo_size:
+            # Random pixels do not compress, like photos
+            photos[len(streams)] = zlib.compress(rng.randbytes(photo_size * photo_size * 3), 1)
+            streams.append(_photo(_table_page(day)))
+        else:
+            streams.append(_table_page(day))
+        expected["days"].append({"pageNumber": len(streams), "title": day["title"], "rows": day["rows"]})
+        if d in noise_after:
+            kind = noise_kinds[len(streams) % len(noise_kinds)]
+            streams.append(_text_page(rng) if kind == "text" else _image_page())
+    expected["page_count"] = len(streams)
+
+    return _serialize(streams, _image_stream(rng), photos, photo_size), expected
+
+
+def _image_object(data: bytes, size: int) -> bytes:
+    return (
+        f"<< /Type /XObject /Subtype /Image /Width {size} /Height {size} /ColorSpace /DeviceRGB "
+        f"/BitsPerComponent 8 /Filter /FlateDecode /Length {len(data)} >>\n".encode()
+        + b"stream\n" + data + b"\nendstream"
+    )
+
+
+def _serialize(streams: List[str], image_data: bytes, photos: Dict[int, bytes], photo_size: int) -> bytes:
+    """Assemble page content streams into a minimal PDF 1.4 file"""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    image_id = add(_image_object(image_data, 64))
+
+    page_ids = []
+    for index, content in enumerate(streams):
+        data = content.encode("latin-1")
+        content_id = add(b"<< /Length " + str(len(data)).encode() + b" >>\nstream\n" + data + b"\nendstream")
+        xobjects = f"/Im1 {image_id} 0 R"
+        if index in photos:
+            xobjects += f" /Ph1 {add(_image_object(photos[index], photo_size))} 0 R"
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> /XObject << {xobjects} >> >> "
+            f"/Contents {content_id} 0 R >>".encode()
+        ))
+
+    objects[catalog_id - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode()
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (f"trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n").encode()
+    return bytes(out)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate a synthetic workout program PDF")
+    arg_parser.add_argument("output")
+    arg_parser.add_argument("--days", type=int, default=5)
+    arg_parser.add_argument("--rows", type=int, default=8)
+    arg_parser.add_argument("--noise", type=int, default=2)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--photo-size", type=int, default=0, help="Embed a PX x PX photo on every day page")
+    args = arg_parser.parse_args()
+
+    pdf_bytes, _ = build_pdf(args.days, args.rows, args.noise, args.seed, args.photo_size)
+    with open(args.output, "wb") as f:
+        f.write(pdf_bytes)
+    print(f"Wrote {args.output} ({len(pdf_bytes)} bytes)")
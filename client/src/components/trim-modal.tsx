@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 import { Button } from './ui/button';
 import { Scissors, X } from 'lucide-react';
+import { uploadTrimSource } from '@/lib/api';
 
 interface TrimModalProps {
   blob: Blob;
@@ -15,6 +16,9 @@ export function TrimModal({ blob, onSave, onCancel }: TrimModalProps) {
   const [end, setEnd] = useState<number>(0);
   const [isProcessing, setIsProcessing] = useState<boolean>(false);
   const videoRef = useRef<HTMLVideoElement>(null);
+  // Content hash of the recording once the server has it, so trying another
+  // cut does not upload the whole video again
+  const sourceRef = useRef<string | null>(null);
 
   useEffect(() => {
     const videoUrl = URL.createObjectURL(blob);
@@ -59,15 +63,27 @@ export function TrimModal({ blob, onSave, onCancel }: TrimModalProps) {
     setIsProcessing(true);
     
     try {
-      const formData = new FormData();
-      formData.append('file', blob, 'raw.webm');
-      formData.append('t_in', start.toString());
-      formData.append('t_out', end.toString());
-      
-      const response = await fetch('/api/manual-trim', {
-        method: 'POST',
-        body: formData
-      });
+      // The recording goes up in resumable chunks once; trims then refer to it
+      const uploadSource = () =>
+        uploadTrimSource(new File([blob], 'raw.webm', { type: blob.type || 'video/webm' }));
+      const requestTrim = (source: string) => {
+        const formData = new FormData();
+        formData.append('source', source);
+        formData.append('t_in', start.toString());
+        formData.append('t_out', end.toString());
+        return fetch('/api/manual-trim', {
+          method: 'POST',
+          body: formData
+        });
+      };
+
+      sourceRef.current ??= await uploadSource();
+      let response = await requestTrim(sourceRef.current);
+      if (response.status === 404) {
+        // The server no longer keeps the recording: upload it again
+        sourceRef.current = await uploadSource();
+        response = await requestTrim(sourceRef.current);
+      }
       
       if (!response.ok) {
         throw new Error('Errore durante il taglio del video');
@@ -15,6 +15,58 @@ export async function uploadPDF(file: File) {
   return response.json();
 }
 
+// Streams parsed days from /api/upload-pdf/stream, calling onPage for each one
+// as soon as the server has parsed it. Resolves with the same shape as uploadPDF.
+export async function uploadPDFStream(file: File, onPage: (page: any) => void) {
+  const formData = new FormData();
+  formData.append('pdf', file);
+
+  const response = await fetch('/api/upload-pdf/stream', {
+    method: 'POST',
+    body: formData,
+  });
+
+  if (!response.ok || !response.body) {
+    const error = await response.text();
+    throw new Error(error || 'Errore durante il caricamento del PDF');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const pages: any[] = [];
+  let buffer = '';
+  let done: any = null;
+
+  while (true) {
+    const { value, done: finished } = await reader.read();
+    if (finished) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let newline;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (!line) continue;
+
+      const message = JSON.parse(line);
+      if (message.type === 'page') {
+        pages.push(message.page);
+        onPage(message.page);
+      } else if (message.type === 'error') {
+        throw new Error(message.error);
+      } else if (message.type === 'done') {
+        done = message;
+      }
+    }
+  }
+
+  if (!done) {
+    throw new Error('Errore durante il caricamento del PDF');
+  }
+
+  return { sessionId: done.sessionId, filename: done.filename, pages };
+}
+
 export async function selectDay(sessionId: number, dayId: string, exercises: any[]) {
   const response = await fetch('/api/select-day', {
     method: 'POST',
@@ -29,23 +81,85 @@ export async function selectDay(sessionId: number, dayId: string, exercises: any
   return response.json();
 }
 
-export async function uploadVideo(sessionId: number, exerciseId: string, weekId: string, file: File) {
-  const formData = new FormData();
-  formData.append('video', file);
-  formData.append('sessionId', sessionId.toString());
-  formData.append('exerciseId', exerciseId);
-  formData.append('weekId', weekId);
+const UPLOAD_RETRIES = 5;
 
-  const response = await fetch('/api/upload-video', {
+// Sends a file in chunks through /api/uploads. After a network error it asks
+// the server how much has arrived and continues from there, so a dropped
+// connection does not restart the whole upload. A 409 (offset mismatch, or a
+// chunk still being written) moves to the server's offset after a growing
+// pause, at most UPLOAD_RETRIES times in a row.
+async function uploadResumable(file: File, purpose: 'video' | 'trim', fields: Record<string, string> = {}) {
+  const created = await fetch('/api/uploads', {
     method: 'POST',
-    body: formData,
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filename: file.name, size: file.size, mimeType: file.type, purpose, ...fields }),
   });
-
-  if (!response.ok) {
+  if (!created.ok) {
     throw new Error('Errore durante il caricamento del video');
   }
 
-  return response.json();
+  const { id, chunkSize } = await created.json();
+  let offset = 0;
+  let failures = 0;
+  let conflicts = 0;
+  let resync = false;
+
+  while (true) {
+    try {
+      if (resync) {
+        const status = await fetch(`/api/uploads/${id}`);
+        if (!status.ok) {
+          throw new Error('Errore durante il caricamento del video');
+        }
+        const data = await status.json();
+        if (data.complete) return data;
+        offset = data.offset;
+        resync = false;
+      }
+
+      const response = await fetch(`/api/uploads/${id}`, {
+        method: 'PATCH',
+        headers: {
+          'Content-Type': 'application/offset+octet-stream',
+          'Upload-Offset': offset.toString(),
+        },
+        body: file.slice(offset, offset + chunkSize),
+      });
+      const data = await response.json();
+      if (response.status === 409 && typeof data.offset === 'number') {
+        if (++conflicts > UPLOAD_RETRIES) {
+          throw new Error(data.error || 'Errore durante il caricamento del video');
+        }
+        await new Promise((resolve) => setTimeout(resolve, 250 * 2 ** (conflicts - 1)));
+        offset = data.offset;
+        continue;
+      }
+      if (!response.ok) {
+        throw new Error(data.error || 'Errore durante il caricamento del video');
+      }
+      if (data.complete) return data;
+      offset = data.offset;
+      failures = 0;
+      conflicts = 0;
+    } catch (error) {
+      // fetch rejects with a TypeError when the network drops
+      if (!(error instanceof TypeError) || ++failures > UPLOAD_RETRIES) {
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+      resync = true;
+    }
+  }
+}
+
+export async function uploadVideo(sessionId: number, exerciseId: string, weekId: string, file: File) {
+  return uploadResumable(file, 'video', { sessionId: sessionId.toString(), exerciseId, weekId });
+}
+
+// Uploads a recording to trim and returns its source hash for /api/manual-trim
+export async function uploadTrimSource(file: File): Promise<string> {
+  const { source } = await uploadResumable(file, 'trim');
+  return source;
 }
 
 export async function updateExercise(sessionId: number, exerciseId: string, weekId: string, data: { rpe?: number; notes?: string }) {
@@ -84,6 +198,11 @@ export async function restartApp() {
   return response.json();
 }
 
+const TELEGRAM_POLL_MS = 1000;
+const TELEGRAM_TIMEOUT_MS = 10 * 60 * 1000;
+
+// Queues the send, then polls the dispatch job until Telegram has everything,
+// for at most TELEGRAM_TIMEOUT_MS
 export async function sendToTelegram() {
   const response = await fetch('/api/send-to-telegram', {
     method: 'POST',
@@ -94,5 +213,21 @@ export async function sendToTelegram() {
     throw new Error(error || 'Errore nell\'invio su Telegram');
   }
 
-  return response.json();
+  const { jobId } = await response.json();
+  const deadline = Date.now() + TELEGRAM_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, TELEGRAM_POLL_MS));
+    const status = await fetch(`/api/telegram-jobs/${jobId}`);
+    if (!status.ok) {
+      throw new Error('Errore nell\'invio su Telegram');
+    }
+    const job = await status.json();
+    if (job.status === 'done') {
+      return job;
+    }
+    if (job.status === 'partial' || job.status === 'failed') {
+      throw new Error(job.error || 'Errore nell\'invio su Telegram');
+    }
+  }
+  throw new Error('L\'invio su Telegram non è terminato in tempo: riprova, i file già inviati non verranno ripetuti');
 }
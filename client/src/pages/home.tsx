@@ -60,6 +60,16 @@ interface VideoUpload {
 type UploadState = 'idle' | 'uploading' | 'success' | 'error';
 type SendState = 'idle' | 'sending' | 'success' | 'error';
 
+// Create an available day from a parsed PDF page
+function toWorkoutDay(page: any): WorkoutDay {
+  return {
+    id: `day-${page.pageNumber}`,
+    name: `Giorno ${page.pageNumber}`,
+    description: page.title,
+    exercises: page.exercises
+  };
+}
+
 export default function Home() {
   const [uploadState, setUploadState] = useState<UploadState>('idle');
   const [sendState, setSendState] = useState<SendState>('idle');
@@ -90,11 +100,15 @@ export default function Home() {
     }
   }, [sessionData]);
 
+  // Days are listed as the server parses them; they become selectable once
+  // the session exists
   const uploadPDFMutation = useMutation({
-    mutationFn: api.uploadPDF,
+    mutationFn: (file: File) =>
+      api.uploadPDFStream(file, (page) => setAvailableDays(prev => [...prev, toWorkoutDay(page)])),
     onMutate: () => {
       setUploadState('uploading');
       setUploadProgress(0);
+      setAvailableDays([]);
       
       // Simulate progress
       const interval = setInterval(() => {
@@ -111,13 +125,7 @@ export default function Home() {
       setUploadState('success');
       setUploadProgress(100);
       
-      // Create available days from PDF pages
-      const days = data.pages.map((page: any) => ({
-        id: `day-${page.pageNumber}`,
-        name: `Giorno ${page.pageNumber}`,
-        description: page.title,
-        exercises: page.exercises
-      }));
+      const days = data.pages.map(toWorkoutDay);
       setAvailableDays(days);
       
       // Create session object with the returned session ID
@@ -268,6 +276,13 @@ export default function Home() {
   const handleDaySelect = (dayId: string, exercises: Exercise[]) => {
     console.log('Day selection attempt:', { dayId, sessionId: currentSession?.id, exercisesCount: exercises.length });
     
+    if (uploadState === 'uploading') {
+      toast({
+        title: "Analisi in corso",
+        description: "Attendi la fine dell'analisi del PDF per scegliere il giorno",
+      });
+      return;
+    }
     if (!currentSession?.id) {
       toast({
         title: "Errore",
@@ -346,7 +361,7 @@ export default function Home() {
         />
 
         {/* Step 2: Day Selection */}
-        {uploadState === 'success' && availableDays.length > 0 && (
+        {(uploadState === 'success' || uploadState === 'uploading') && availableDays.length > 0 && (
           <DaySelection
             days={availableDays}
             selectedDay={currentSession?.selectedDay ?? undefined}
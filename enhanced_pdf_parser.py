@@ -5,174 +5,174 @@ Enhanced PDF parser with comprehensive table extraction capabilities
 import sys
 import json
 import os
-from typing import Dict, Any, List, Optional
+import threading
+import importlib
+import importlib.util
+from typing import Dict, Any, List, Optional, Iterator, Callable, TYPE_CHECKING
 import pdfplumber
-import pandas as pd
-import re
+from pdf_parser_engine import ParserEngine, PageContext, Strategy
+from pdf_memory import MemoryGuard
+from pdf_source import PDFSource, cli_source
+from pdf_keywords import (
+    KeywordSet, WORKOUT_KEYWORDS, TABLE_INDICATORS, HEADER_CELLS, COLUMN_EXERCISE, COLUMN_WEEK,
+    EMPTY_VALUES, WEEK_NUMBER_PATTERN, NUMERIC_CELL_PATTERN, scan_table_head, find_title
+)
+from pdf_result_model import Exercise, Page, FORMAT_JSON, FORMAT_MSGPACK, MSGPACK_AVAILABLE, print_result
+from pdf_parser_metrics import new_metrics, enable_metrics, attach_serialize_time
+from pdf_parser_worker import serve
 
-try:
-    import camelot
-    CAMELOT_AVAILABLE = True
-except ImportError:
-    CAMELOT_AVAILABLE = False
+if TYPE_CHECKING:
+    import pandas as pd
 
-try:
-    import tabula
-    TABULA_AVAILABLE = True
-except ImportError:
-    TABULA_AVAILABLE = False
+# pandas, camelot (OpenCV/Ghostscript) and tabula (a JVM) are only imported
+# when a page actually falls through to a fallback that needs them
+CAMELOT_AVAILABLE = importlib.util.find_spec("camelot") is not None
+TABULA_AVAILABLE = importlib.util.find_spec("tabula") is not None
+
+DATAFRAME_TEXT = KeywordSet(TABLE_INDICATORS + ('settimana', 'week'))
+EXERCISE_LINE = KeywordSet((
+    'squat', 'panca', 'stacco', 'press', 'curl', 'row', 'pull',
+    'push', 'dip', 'chin', 'lunge', 'dead', 'front', 'back'
+))
+MISSING_VALUES = EMPTY_VALUES | {'nan'}
+
+# camelot and tabula reopen the PDF for every page they look at (tabula in a
+# JVM), so they only run on pages drawn like a table: with at least this many
+# ruling lines or rectangles, the precise parser's pre-filter threshold
+FALLBACK_MIN_RULINGS = 2
+
+_backends: Dict[str, Any] = {}
+_backends_lock = threading.Lock()
+
+def _load_backend(name: str):
+    """Import a fallback backend on first use; None if it cannot be loaded"""
+    with _backends_lock:
+        if name not in _backends:
+            try:
+                _backends[name] = importlib.import_module(name)
+            except Exception as e:
+                print(f"Could not load {name}: {e}", file=sys.stderr)
+                _backends[name] = None
+        return _backends[name]
 
 class EnhancedPDFParser:
-    def __init__(self):
-        self.workout_keywords = [
-            'esercizio', 'exercise', 'allenamento', 'workout', 'training',
-            'serie', 'set', 'sets', 'ripetizioni', 'rep', 'reps',
-            'settimana', 'week', 'sett', 'giorno', 'day', 'kg', 'peso'
+    def __init__(self, collect_metrics: Optional[bool] = None):
+        self.collect_metrics = collect_metrics
+        self.workout_text = KeywordSet(WORKOUT_KEYWORDS + ('kg', 'peso'))
+        
+        # Cheapest strategies first; each page stops at the first one that yields exercises
+        strategies = [
+            Strategy("pdfplumber_table", self._extract_table_page),
+            Strategy("text", self._extract_text_page),
         ]
+        if CAMELOT_AVAILABLE:
+            strategies.append(Strategy("camelot_lattice", self._table_fallback(
+                lambda ctx: self._extract_with_camelot(ctx, "lattice"))))
+            strategies.append(Strategy("camelot_stream", self._table_fallback(
+                lambda ctx: self._extract_with_camelot(ctx, "stream"))))
+        if TABULA_AVAILABLE:
+            strategies.append(Strategy("tabula", self._table_fallback(self._extract_with_tabula)))
+        self.engine = ParserEngine(strategies, page_gate=self._has_workout_text)
         
-    def parse_pdf(self, pdf_path: str) -> Dict[str, Any]:
-        """Parse PDF using multiple extraction methods"""
+    def parse_pdf(self, pdf_path: PDFSource) -> Dict[str, Any]:
+        """
+        Parse PDF, running the extraction cascade page by page. camelot and
+        tabula need a path, so they only run for path sources.
+        """
+        metrics = new_metrics(self.collect_metrics)
         try:
-            # Try pdfplumber first
-            pages_data = self._extract_with_pdfplumber(pdf_path)
+            reports = []
+            guard = MemoryGuard()
+            pages_data = list(self.engine.iter_pages(pdf_path, reports, metrics, guard))
             
-            # If pdfplumber fails, try camelot
-            if not pages_data and CAMELOT_AVAILABLE:
-                pages_data = self._extract_with_camelot(pdf_path)
-            
-            # If both fail, try tabula
-            if not pages_data and TABULA_AVAILABLE:
-                pages_data = self._extract_with_tabula(pdf_path)
-            
-            return {
+            result = {
                 "pages": pages_data,
                 "success": True,
-                "total_pages": len(pages_data) if pages_data else 0
+                "total_pages": len(pages_data) if pages_data else 0,
+                "strategies": reports
             }
+            if guard.limited:
+                result["memory_limited"] = guard.limited
+            if metrics.enabled:
+                result["metrics"] = metrics.to_dict()
+            return result
                 
         except Exception as e:
             print(f"Error parsing PDF: {e}", file=sys.stderr)
             return {"pages": [], "success": False, "error": str(e)}
     
-    def _extract_with_pdfplumber(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract using pdfplumber"""
-        pages_data = []
-        
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    page_data = self._extract_page_data_pdfplumber(page, page_num + 1)
-                    if page_data:
-                        pages_data.append(page_data)
-        except Exception as e:
-            print(f"PDFPlumber extraction failed: {e}", file=sys.stderr)
-            
-        return pages_data
+    def iter_pages(self, pdf_path: PDFSource, guard: Optional[MemoryGuard] = None) -> Iterator[Dict[str, Any]]:
+        """Yield each parsed day as soon as its page has been extracted"""
+        yield from self.engine.iter_pages(pdf_path, guard=guard)
     
-    def _extract_with_camelot(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract using camelot"""
-        pages_data = []
-        
-        try:
-            # Extract all tables from PDF
-            tables = camelot.read_pdf(pdf_path, pages='all', flavor='lattice')
-            
-            if not tables:
-                tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream')
-            
-            page_tables = {}
-            for table in tables:
-                page_num = table.page
-                if page_num not in page_tables:
-                    page_tables[page_num] = []
-                page_tables[page_num].append(table.df)
-            
-            for page_num, tables_list in page_tables.items():
-                for table_df in tables_list:
-                    if self._is_workout_dataframe(table_df):
-                        exercises = self._parse_dataframe_to_exercises(table_df)
-                        if exercises:
-                            pages_data.append({
-                                "pageNumber": page_num,
-                                "title": f"Giorno {page_num}",
-                                "exercises": exercises
-                            })
-                            
-        except Exception as e:
-            print(f"Camelot extraction failed: {e}", file=sys.stderr)
-            
-        return pages_data
+    def _has_workout_text(self, ctx: PageContext) -> bool:
+        """Check the page text for workout content"""
+        text = ctx.text.lower()
+        return bool(text) and self.workout_text.contains(text)
     
-    def _extract_with_tabula(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract using tabula"""
-        pages_data = []
-        
-        try:
-            # Extract all tables from PDF
-            tables = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
-            
-            for page_num, table_df in enumerate(tables, 1):
-                if isinstance(table_df, pd.DataFrame) and self._is_workout_dataframe(table_df):
-                    exercises = self._parse_dataframe_to_exercises(table_df)
-                    if exercises:
-                        pages_data.append({
-                            "pageNumber": page_num,
-                            "title": f"Giorno {page_num}",
-                            "exercises": exercises
-                        })
-                        
-        except Exception as e:
-            print(f"Tabula extraction failed: {e}", file=sys.stderr)
-            
-        return pages_data
+    def _extract_table_page(self, ctx: PageContext) -> Optional[Page]:
+        """Extract exercises from the first workout table found by pdfplumber"""
+        for table in ctx.tables:
+            if not table or len(table) < 2:
+                continue
+            is_workout, header_row_idx = scan_table_head(table)
+            if is_workout:
+                exercises = self._parse_workout_table(table, header_row_idx)
+                if exercises:
+                    return Page(ctx.page_num, self._extract_page_title(ctx.text, ctx.page_num), exercises)
+        return None
     
-    def _extract_page_data_pdfplumber(self, page, page_num: int) -> Optional[Dict[str, Any]]:
-        """Extract data from a single page using pdfplumber"""
-        try:
-            text = page.extract_text()
-            if not text or not any(keyword in text.lower() for keyword in self.workout_keywords):
+    def _extract_text_page(self, ctx: PageContext) -> Optional[Page]:
+        """Extract exercises from the page text when no table matched"""
+        return self._extract_from_text(ctx.text, ctx.page_num)
+    
+    def _table_fallback(self, extract: Callable[[PageContext], Optional[Page]]) -> Callable[[PageContext], Optional[Page]]:
+        """
+        Wrap a heavy fallback so it is skipped on pages without table rulings:
+        intro, nutrition and photo pages pass the keyword gate but hold no table
+        """
+        def run(ctx: PageContext) -> Optional[Page]:
+            if ctx.ruling_count < FALLBACK_MIN_RULINGS:
                 return None
-            
-            tables = page.extract_tables()
-            if not tables:
-                return self._extract_from_text(text, page_num)
-                
-            for table in tables:
-                if self._is_workout_table(table):
-                    exercises = self._parse_workout_table(table)
-                    if exercises:
-                        return {
-                            "pageNumber": page_num,
-                            "title": self._extract_page_title(text, page_num),
-                            "exercises": exercises
-                        }
-            
-            return self._extract_from_text(text, page_num)
-            
-        except Exception as e:
-            print(f"Error processing page {page_num}: {e}", file=sys.stderr)
-            return None
+            return extract(ctx)
+        return run
     
-    def _is_workout_table(self, table: List[List[str]]) -> bool:
-        """Check if table contains workout data"""
-        if not table or len(table) < 2:
-            return False
-            
-        table_text = ' '.join([
-            ' '.join([str(cell) for cell in row if cell]) 
-            for row in table[:3]
-        ]).lower()
+    def _extract_with_camelot(self, ctx: PageContext, flavor: str) -> Optional[Page]:
+        """Extract this page's tables using camelot"""
+        camelot = _load_backend("camelot")
+        if camelot is None or not isinstance(ctx.pdf_path, str):
+            return None
         
-        workout_indicators = [
-            'esercizio', 'exercise', 'serie', 'set', 'ripetizioni', 'rep',
-            'squat', 'panca', 'bench', 'press', 'curl', 'row', 'pull',
-            'deadlift', 'stacco', 'kg', 'peso', 'weight'
-        ]
+        tables = camelot.read_pdf(ctx.pdf_path, pages=str(ctx.page_num), flavor=flavor)
+        return self._page_from_dataframes([table.df for table in tables], ctx.page_num)
+    
+    def _extract_with_tabula(self, ctx: PageContext) -> Optional[Page]:
+        """Extract this page's tables using tabula"""
+        tabula = _load_backend("tabula")
+        if tabula is None or not isinstance(ctx.pdf_path, str):
+            return None
         
-        return any(indicator in table_text for indicator in workout_indicators)
+        # In-process (jpype) JVM: started on the first fallback and reused by
+        # every later call for the lifetime of the process, e.g. a --serve worker
+        tables = tabula.read_pdf(ctx.pdf_path, pages=ctx.page_num, multiple_tables=True,
+                                 force_subprocess=False)
+        pd = _load_backend("pandas")
+        return self._page_from_dataframes(
+            [df for df in tables if isinstance(df, pd.DataFrame)], ctx.page_num
+        )
+    
+    def _page_from_dataframes(self, dataframes: List["pd.DataFrame"], page_num: int) -> Optional[Page]:
+        """Build a page from the first DataFrame that holds workout data"""
+        for table_df in dataframes:
+            if self._is_workout_dataframe(table_df):
+                exercises = self._parse_dataframe_to_exercises(table_df)
+                if exercises:
+                    return Page(page_num, f"Giorno {page_num}", exercises)
+        return None
     
-    def _is_workout_dataframe(self, df: pd.DataFrame) -> bool:
+    def _is_workout_dataframe(self, df: "pd.DataFrame") -> bool:
         """Check if DataFrame contains workout data"""
+        pd = _load_backend("pandas")
         if df.empty or len(df) < 2:
             return False
             
@@ -184,57 +184,29 @@ class EnhancedPDFParser:
         
         # Also check column names
         column_text = ' '.join([str(col) for col in df.columns]).lower()
-        all_text = df_text + ' ' + column_text
-        
-        workout_indicators = [
-            'esercizio', 'exercise', 'serie', 'set', 'ripetizioni', 'rep',
-            'squat', 'panca', 'bench', 'press', 'curl', 'row', 'pull',
-            'deadlift', 'stacco', 'kg', 'peso', 'weight', 'settimana', 'week'
-        ]
-        
-        return any(indicator in all_text for indicator in workout_indicators)
+        return DATAFRAME_TEXT.contains(df_text + ' ' + column_text)
     
-    def _parse_workout_table(self, table: List[List[str]]) -> List[Dict[str, Any]]:
-        """Parse workout table into exercises"""
+    def _parse_workout_table(self, table: List[List[str]], header_row_idx: int) -> List[Exercise]:
+        """Parse workout table into exercises; header_row_idx comes from scan_table_head()"""
         if not table or len(table) < 2:
             return []
         
         exercises = []
         
-        # Find header row
-        header_row_idx = 0
-        for i in range(min(3, len(table))):
-            row_text = ' '.join([str(cell) for cell in table[i] if cell]).lower()
-            if any(keyword in row_text for keyword in ['esercizio', 'exercise', 'serie', 'set']):
-                header_row_idx = i
-                break
-        
         headers = [str(cell).lower().strip() if cell else "" for cell in table[header_row_idx]]
         
-        # Find exercise column
+        # One scan per header finds both the exercise column and the week/weight columns
         exercise_col = -1
-        for i, header in enumerate(headers):
-            if any(keyword in header for keyword in ['esercizio', 'exercise', 'nome', 'name']):
-                exercise_col = i
-                break
-        
-        # Find week/weight columns with more comprehensive detection
         week_cols = {}
         for i, header in enumerate(headers):
-            header_clean = header.strip().lower()
-            # Enhanced week detection patterns
-            if (re.search(r'sett|week|\d+|peso|weight|kg|w\d|settimana', header_clean) and 
-                len(header_clean) > 0 and 
-                header_clean not in ['esercizio', 'exercise', 'nome', 'name']):
-                
-                # Extract week number if possible
-                week_match = re.search(r'(\d+)', header_clean)
-                if week_match:
-                    week_num = week_match.group(1)
-                    week_cols[f"settimana_{week_num}"] = i
-                else:
-                    week_num = len(week_cols) + 1
-                    week_cols[f"settimana_{week_num}"] = i
+            labels = HEADER_CELLS.classify(header)
+            if exercise_col < 0 and COLUMN_EXERCISE in labels:
+                exercise_col = i
+            week_match = WEEK_NUMBER_PATTERN.search(header)
+            if COLUMN_WEEK in labels or week_match:
+                # Use the week number if the header has one
+                week_num = week_match.group() if week_match else len(week_cols) + 1
+                week_cols[f"settimana_{week_num}"] = i
         
         # Process data rows
         for row_idx, row in enumerate(table[header_row_idx + 1:], 1):
@@ -251,7 +223,7 @@ class EnhancedPDFParser:
                     if cell and str(cell).strip() and len(str(cell).strip()) > 2:
                         cell_text = str(cell).strip()
                         # Skip obvious non-exercise content
-                        if not re.match(r'^\d+[\d\s\.\,]*$', cell_text):
+                        if not NUMERIC_CELL_PATTERN.match(cell_text):
                             exercise_name = cell_text
                             break
             
@@ -264,65 +236,43 @@ class EnhancedPDFParser:
                 for week_name, col_idx in week_cols.items():
                     if col_idx < len(row) and row[col_idx]:
                         value = str(row[col_idx]).strip()
-                        if value and value.lower() not in ['none', 'null', 'nan', '']:
-                            weeks[week_name] = {"weight": value}
+                        if value.lower() not in MISSING_VALUES:
+                            weeks[week_name] = value
             
             # Ensure standard 4-week structure
-            for i in range(1, 5):
-                week_key = f"settimana_{i}"
-                if week_key not in weeks:
-                    weeks[week_key] = {"weight": ""}
-            
-            exercise = {
-                "id": f"ex_{len(exercises) + 1}",
-                "name": exercise_name,
-                "setsReps": "3 x 10",
-                "weeks": weeks
-            }
-            
-            exercises.append(exercise)
+            exercises.append(Exercise(f"ex_{len(exercises) + 1}", exercise_name, "3 x 10", weeks).fill_weeks(4))
             
             if len(exercises) >= 15:  # Allow more exercises
                 break
         
         return exercises
     
-    def _parse_dataframe_to_exercises(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _parse_dataframe_to_exercises(self, df: "pd.DataFrame") -> List[Exercise]:
         """Convert DataFrame to exercise list"""
+        pd = _load_backend("pandas")
         exercises = []
         
         # Find exercise column
-        exercise_col = None
-        for col in df.columns:
-            col_str = str(col).lower()
-            if any(keyword in col_str for keyword in ['esercizio', 'exercise', 'nome', 'name']):
-                exercise_col = col
-                break
+        column_labels = [(col, HEADER_CELLS.classify(str(col).lower())) for col in df.columns]
+        exercise_col = next((col for col, labels in column_labels if COLUMN_EXERCISE in labels), None)
         
         if exercise_col is None and len(df.columns) > 0:
             exercise_col = df.columns[0]  # Use first column as fallback
         
         # Find week columns
         week_cols = {}
-        for col in df.columns:
-            col_str = str(col).lower()
-            if (re.search(r'sett|week|\d+|peso|weight|kg|w\d|settimana', col_str) and 
-                col != exercise_col):
-                
-                week_match = re.search(r'(\d+)', col_str)
-                if week_match:
-                    week_num = week_match.group(1)
-                    week_cols[f"settimana_{week_num}"] = col
-                else:
-                    week_num = len(week_cols) + 1
-                    week_cols[f"settimana_{week_num}"] = col
+        for col, labels in column_labels:
+            week_match = WEEK_NUMBER_PATTERN.search(str(col))
+            if (COLUMN_WEEK in labels or week_match) and col != exercise_col:
+                week_num = week_match.group() if week_match else len(week_cols) + 1
+                week_cols[f"settimana_{week_num}"] = col
         
         # Process rows
         for idx, row in df.iterrows():
             if exercise_col and pd.notna(row[exercise_col]):
                 exercise_name = str(row[exercise_col]).strip()
                 
-                if len(exercise_name) < 3 or re.match(r'^\d+[\d\s\.\,]*$', exercise_name):
+                if len(exercise_name) < 3 or NUMERIC_CELL_PATTERN.match(exercise_name):
                     continue
                 
                 # Build weeks data
@@ -330,23 +280,11 @@ class EnhancedPDFParser:
                 for week_name, col in week_cols.items():
                     if pd.notna(row[col]):
                         value = str(row[col]).strip()
-                        if value and value.lower() not in ['none', 'null', 'nan', '']:
-                            weeks[week_name] = {"weight": value}
+                        if value.lower() not in MISSING_VALUES:
+                            weeks[week_name] = value
                 
                 # Ensure standard structure
-                for i in range(1, 5):
-                    week_key = f"settimana_{i}"
-                    if week_key not in weeks:
-                        weeks[week_key] = {"weight": ""}
-                
-                exercise = {
-                    "id": f"ex_{len(exercises) + 1}",
-                    "name": exercise_name,
-                    "setsReps": "3 x 10",
-                    "weeks": weeks
-                }
-                
-                exercises.append(exercise)
+                exercises.append(Exercise(f"ex_{len(exercises) + 1}", exercise_name, "3 x 10", weeks).fill_weeks(4))
                 
                 if len(exercises) >= 15:
                     break
@@ -355,14 +293,9 @@ class EnhancedPDFParser:
     
     def _extract_page_title(self, text: str, page_num: int) -> str:
         """Extract page title from text"""
-        lines = text.split('\n')[:10]
-        for line in lines:
-            line = line.strip()
-            if any(keyword in line.lower() for keyword in ['giorno', 'day', 'allenamento', 'workout']):
-                return line
-        return f"Giorno {page_num}"
+        return find_title(text) or f"Giorno {page_num}"
     
-    def _extract_from_text(self, text: str, page_num: int) -> Optional[Dict[str, Any]]:
+    def _extract_from_text(self, text: str, page_num: int) -> Optional[Page]:
         """Extract workout data from text when tables are not available"""
         lines = text.split('\n')
         exercises = []
@@ -374,46 +307,71 @@ class EnhancedPDFParser:
                 continue
                 
             # Look for exercise patterns (more comprehensive)
-            if any(keyword in line.lower() for keyword in [
-                'squat', 'panca', 'stacco', 'press', 'curl', 'row', 'pull',
-                'push', 'dip', 'chin', 'lunge', 'dead', 'front', 'back'
-            ]) and not re.match(r'^\d+[\d\s\.\,]*$', line):
+            if EXERCISE_LINE.contains(line.lower()) and not NUMERIC_CELL_PATTERN.match(line):
                 exercise_count += 1
-                exercise = {
-                    "id": f"ex_{exercise_count}",
-                    "name": line,
-                    "setsReps": "3 x 10",
-                    "weeks": {
-                        "settimana_1": {"weight": ""},
-                        "settimana_2": {"weight": ""},
-                        "settimana_3": {"weight": ""},
-                        "settimana_4": {"weight": ""}
-                    }
-                }
-                exercises.append(exercise)
+                exercises.append(Exercise(f"ex_{exercise_count}", line, "3 x 10").fill_weeks(4))
                 
                 if exercise_count >= 10:
                     break
         
         if exercises:
-            return {
-                "pageNumber": page_num,
-                "title": self._extract_page_title(text, page_num),
-                "exercises": exercises
-            }
+            return Page(page_num, self._extract_page_title(text, page_num), exercises)
         
         return None
 
-def parsePDF(pdf_path: str) -> Dict[str, Any]:
+def parsePDF(pdf_path: PDFSource) -> Dict[str, Any]:
     """Main function to parse PDF"""
     parser = EnhancedPDFParser()
     return parser.parse_pdf(pdf_path)
 
+def streamPDF(pdf_path: PDFSource) -> Iterator[Dict[str, Any]]:
+    """Yield one {"type": "page"} event per parsed day, then a {"type": "done"} summary"""
+    parser = EnhancedPDFParser()
+    guard = MemoryGuard()
+    total_pages = 0
+    try:
+        for page_data in parser.iter_pages(pdf_path, guard):
+            total_pages += 1
+            yield {"type": "page", "page": page_data}
+    except Exception as e:
+        print(f"Error parsing PDF: {e}", file=sys.stderr)
+        yield {"type": "done", "success": False, "error": str(e)}
+        return
+    done = {"type": "done", "success": True, "total_pages": total_pages}
+    if guard.limited:
+        done["memory_limited"] = guard.limited
+    yield done
+
 if __name__ == "__main__":
+    if "--metrics" in sys.argv:
+        sys.argv.remove("--metrics")
+        enable_metrics()
+    pretty = "--pretty" in sys.argv
+    if pretty:
+        sys.argv.remove("--pretty")
+    output_format = FORMAT_JSON
+    if "--msgpack" in sys.argv:
+        sys.argv.remove("--msgpack")
+        if not MSGPACK_AVAILABLE:
+            print("Error: --msgpack needs the msgpack package", file=sys.stderr)
+            sys.exit(1)
+        output_format = FORMAT_MSGPACK
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "--serve":
+        serve(parsePDF, streamPDF)
+        sys.exit(0)
+    
+    if len(sys.argv) == 3 and sys.argv[1] == "--stream":
+        for event in streamPDF(cli_source(sys.argv[2])):
+            print(json.dumps(event, separators=(",", ":")), flush=True)
+        sys.exit(0)
+    
     if len(sys.argv) != 2:
-        print("Usage: python enhanced_pdf_parser.py <pdf_path>")
+        print("Usage: python enhanced_pdf_parser.py [--metrics] [--pretty | --msgpack] <pdf_path | ->")
+        print("       python enhanced_pdf_parser.py [--metrics] --stream <pdf_path | ->")
+        print("       python enhanced_pdf_parser.py [--metrics] --serve")
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
-    result = parsePDF(pdf_path)
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    result = parsePDF(cli_source(sys.argv[1]))
+    attach_serialize_time(result)
+    print_result(result, output_format, pretty)
\ No newline at end of file
@@ -5,121 +5,103 @@ Optimized PDF parser using only essential dependencies
 import sys
 import json
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator
 import pdfplumber
-import re
+from pdf_parser_engine import ParserEngine, PageContext, Strategy
+from pdf_memory import MemoryGuard
+from pdf_source import PDFSource, as_openable, cli_source
+from pdf_keywords import (
+    KeywordSet, WORKOUT_TEXT, HEADER_CELLS, COLUMN_EXERCISE, COLUMN_WEEK,
+    EMPTY_VALUES, WEEK_NUMBER_PATTERN, scan_table_head, find_title
+)
+from pdf_result_model import Exercise, Page, FORMAT_JSON, FORMAT_MSGPACK, MSGPACK_AVAILABLE, print_result
+from pdf_parser_metrics import new_metrics, enable_metrics, attach_serialize_time
+
+EXERCISE_LINE = KeywordSet(('squat', 'panca', 'stacco', 'press', 'curl', 'row'))
 
 class OptimizedPDFParser:
-    def __init__(self):
-        self.workout_keywords = [
-            'esercizio', 'exercise', 'allenamento', 'workout', 'training',
-            'serie', 'set', 'sets', 'ripetizioni', 'rep', 'reps',
-            'settimana', 'week', 'sett', 'giorno', 'day'
-        ]
+    def __init__(self, collect_metrics: Optional[bool] = None):
+        self.collect_metrics = collect_metrics
+        self.workout_text = WORKOUT_TEXT
+        self.engine = ParserEngine(
+            [
+                Strategy("pdfplumber_table", self._extract_table_page),
+                Strategy("text", self._extract_text_page),
+            ],
+            page_gate=self._has_workout_text
+        )
         
-    def parse_pdf(self, pdf_path: str) -> Dict[str, Any]:
-        """Parse PDF and extract workout data"""
+    def parse_pdf(self, pdf_path: PDFSource) -> Dict[str, Any]:
+        """Parse PDF (a path, bytes or a binary file object) and extract workout data"""
+        metrics = new_metrics(self.collect_metrics)
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                pages_data = []
-                
-                for page_num, page in enumerate(pdf.pages):
-                    page_data = self._extract_page_data(page, page_num + 1)
-                    if page_data:
-                        pages_data.append(page_data)
+            with metrics.stage("open"):
+                pdf = pdfplumber.open(as_openable(pdf_path))
+            with pdf:
+                reports = []
+                guard = MemoryGuard()
+                pages_data = list(self.engine.iter_document(pdf, pdf_path, reports, metrics, guard))
                 
-                return {
+                result = {
                     "pages": pages_data,
                     "success": True,
-                    "total_pages": len(pdf.pages)
+                    "total_pages": len(pdf.pages),
+                    "strategies": reports
                 }
+                if guard.limited:
+                    result["memory_limited"] = guard.limited
+                if metrics.enabled:
+                    result["metrics"] = metrics.to_dict()
+                return result
                 
         except Exception as e:
             print(f"Error parsing PDF: {e}", file=sys.stderr)
             return {"pages": [], "success": False, "error": str(e)}
     
-    def _extract_page_data(self, page, page_num: int) -> Optional[Dict[str, Any]]:
-        """Extract data from a single page"""
-        try:
-            # Extract text to check for workout content
-            text = page.extract_text()
-            if not text or not any(keyword in text.lower() for keyword in self.workout_keywords):
-                return None
-            
-            # Extract tables
-            tables = page.extract_tables()
-            if not tables:
-                # Try text-based extraction
-                return self._extract_from_text(text, page_num)
-                
-            for table in tables:
-                if self._is_workout_table(table):
-                    exercises = self._parse_workout_table(table)
-                    if exercises:
-                        return {
-                            "pageNumber": page_num,
-                            "title": self._extract_page_title(text, page_num),
-                            "exercises": exercises
-                        }
-            
-            # Fallback to text extraction
-            return self._extract_from_text(text, page_num)
-            
-        except Exception as e:
-            print(f"Error processing page {page_num}: {e}", file=sys.stderr)
-            return None
+    def iter_pages(self, pdf_path: PDFSource, guard: Optional[MemoryGuard] = None,
+                   stats: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield each parsed day as soon as its page has been extracted; stats gets the page count"""
+        yield from self.engine.iter_pages(pdf_path, guard=guard, stats=stats)
     
-    def _is_workout_table(self, table: List[List[str]]) -> bool:
-        """Check if table contains workout data"""
-        if not table or len(table) < 2:
-            return False
-            
-        # Check all rows, not just headers, for workout content
-        table_text = ' '.join([
-            ' '.join([str(cell) for cell in row if cell]) 
-            for row in table[:3]  # Check first 3 rows
-        ]).lower()
-        
-        # More flexible keyword matching
-        workout_indicators = [
-            'esercizio', 'exercise', 'serie', 'set', 'ripetizioni', 'rep',
-            'squat', 'panca', 'bench', 'press', 'curl', 'row', 'pull',
-            'deadlift', 'stacco', 'kg', 'peso', 'weight'
-        ]
-        
-        return any(indicator in table_text for indicator in workout_indicators)
+    def _has_workout_text(self, ctx: PageContext) -> bool:
+        """Check the page text for workout content"""
+        text = ctx.text.lower()
+        return bool(text) and self.workout_text.contains(text)
+    
+    def _extract_table_page(self, ctx: PageContext) -> Optional[Page]:
+        """Extract exercises from the first workout table on the page"""
+        for table in ctx.tables:
+            if not table or len(table) < 2:
+                continue
+            is_workout, header_row_idx = scan_table_head(table)
+            if is_workout:
+                exercises = self._parse_workout_table(table, header_row_idx)
+                if exercises:
+                    return Page(ctx.page_num, self._extract_page_title(ctx.text, ctx.page_num), exercises)
+        return None
     
-    def _parse_workout_table(self, table: List[List[str]]) -> List[Dict[str, Any]]:
-        """Parse workout table into exercises"""
+    def _extract_text_page(self, ctx: PageContext) -> Optional[Page]:
+        """Fallback to text extraction"""
+        return self._extract_from_text(ctx.text, ctx.page_num)
+    
+    def _parse_workout_table(self, table: List[List[str]], header_row_idx: int) -> List[Exercise]:
+        """Parse workout table into exercises; header_row_idx comes from scan_table_head()"""
         if not table or len(table) < 2:
             return []
         
         exercises = []
         
-        # Try multiple header row positions
-        header_row_idx = 0
-        for i in range(min(3, len(table))):
-            row_text = ' '.join([str(cell) for cell in table[i] if cell]).lower()
-            if any(keyword in row_text for keyword in ['esercizio', 'exercise', 'serie', 'set']):
-                header_row_idx = i
-                break
-        
         headers = [str(cell).lower().strip() if cell else "" for cell in table[header_row_idx]]
         
-        # More flexible column detection
+        # One scan per header finds both the exercise column and the week/weight columns
         exercise_col = -1
-        for i, header in enumerate(headers):
-            if any(keyword in header for keyword in ['esercizio', 'exercise', 'nome', 'name']):
-                exercise_col = i
-                break
-        
-        # Find week/weight columns
         week_cols = {}
         for i, header in enumerate(headers):
-            header_clean = header.strip()
+            labels = HEADER_CELLS.classify(header)
+            if exercise_col < 0 and COLUMN_EXERCISE in labels:
+                exercise_col = i
             # Look for week patterns, numbers, or weight indicators
-            if (re.search(r'sett|week|\d+|peso|weight|kg', header_clean) and 
-                len(header_clean) > 0 and header_clean not in ['esercizio', 'exercise']):
+            if COLUMN_WEEK in labels or WEEK_NUMBER_PATTERN.search(header):
                 week_num = len(week_cols) + 1
                 week_cols[f"settimana_{week_num}"] = i
         
@@ -148,23 +130,11 @@ class OptimizedPDFParser:
                 for week_name, col_idx in week_cols.items():
                     if col_idx < len(row) and row[col_idx]:
                         value = str(row[col_idx]).strip()
-                        if value and value.lower() not in ['none', 'null', '']:
-                            weeks[week_name] = {"weight": value}
+                        if value.lower() not in EMPTY_VALUES:
+                            weeks[week_name] = value
             
             # Ensure we have at least 4 weeks structure
-            for i in range(1, 5):
-                week_key = f"settimana_{i}"
-                if week_key not in weeks:
-                    weeks[week_key] = {"weight": ""}
-            
-            exercise = {
-                "id": f"ex_{len(exercises) + 1}",
-                "name": exercise_name,
-                "setsReps": "3 x 10",
-                "weeks": weeks
-            }
-            
-            exercises.append(exercise)
+            exercises.append(Exercise(f"ex_{len(exercises) + 1}", exercise_name, "3 x 10", weeks).fill_weeks(4))
             
             # Limit to reasonable number of exercises
             if len(exercises) >= 10:
@@ -172,23 +142,11 @@ class OptimizedPDFParser:
         
         return exercises
     
-    def _find_column_index(self, headers: List[str], keywords: List[str]) -> int:
-        """Find column index by keywords"""
-        for i, header in enumerate(headers):
-            if any(keyword in header for keyword in keywords):
-                return i
-        return -1
-    
     def _extract_page_title(self, text: str, page_num: int) -> str:
         """Extract page title from text"""
-        lines = text.split('\n')[:10]  # Check first 10 lines
-        for line in lines:
-            line = line.strip()
-            if any(keyword in line.lower() for keyword in ['giorno', 'day', 'allenamento', 'workout']):
-                return line
-        return f"Giorno {page_num}"
+        return find_title(text) or f"Giorno {page_num}"
     
-    def _extract_from_text(self, text: str, page_num: int) -> Optional[Dict[str, Any]]:
+    def _extract_from_text(self, text: str, page_num: int) -> Optional[Page]:
         """Extract workout data from text when tables are not available"""
         lines = text.split('\n')
         exercises = []
@@ -200,43 +158,66 @@ class OptimizedPDFParser:
                 continue
                 
             # Look for exercise patterns
-            if any(keyword in line.lower() for keyword in ['squat', 'panca', 'stacco', 'press', 'curl', 'row']):
+            if EXERCISE_LINE.contains(line.lower()):
                 exercise_count += 1
-                exercise = {
-                    "id": f"ex_{exercise_count}",
-                    "name": line,
-                    "setsReps": "3 x 10",
-                    "weeks": {
-                        "settimana_1": {"weight": ""},
-                        "settimana_2": {"weight": ""},
-                        "settimana_3": {"weight": ""},
-                        "settimana_4": {"weight": ""}
-                    }
-                }
-                exercises.append(exercise)
+                exercises.append(Exercise(f"ex_{exercise_count}", line, "3 x 10").fill_weeks(4))
                 
                 if exercise_count >= 7:  # Limit to 7 exercises
                     break
         
         if exercises:
-            return {
-                "pageNumber": page_num,
-                "title": self._extract_page_title(text, page_num),
-                "exercises": exercises
-            }
+            return Page(page_num, self._extract_page_title(text, page_num), exercises)
         
         return None
 
-def parsePDF(pdf_path: str) -> Dict[str, Any]:
+def parsePDF(pdf_path: PDFSource) -> Dict[str, Any]:
     """Main function to parse PDF"""
     parser = OptimizedPDFParser()
     return parser.parse_pdf(pdf_path)
 
+def streamPDF(pdf_path: PDFSource) -> Iterator[Dict[str, Any]]:
+    """Yield one {"type": "page"} event per parsed day, then a {"type": "done"} summary"""
+    parser = OptimizedPDFParser()
+    guard = MemoryGuard()
+    stats: Dict[str, Any] = {}
+    try:
+        for page_data in parser.iter_pages(pdf_path, guard, stats):
+            yield {"type": "page", "page": page_data}
+    except Exception as e:
+        print(f"Error parsing PDF: {e}", file=sys.stderr)
+        yield {"type": "done", "success": False, "error": str(e)}
+        return
+    # The document's page count, as in parse_pdf(); the days were the page events
+    done = {"type": "done", "success": True, "total_pages": stats.get("total_pages", 0)}
+    if guard.limited:
+        done["memory_limited"] = guard.limited
+    yield done
+
 if __name__ == "__main__":
+    if "--metrics" in sys.argv:
+        sys.argv.remove("--metrics")
+        enable_metrics()
+    pretty = "--pretty" in sys.argv
+    if pretty:
+        sys.argv.remove("--pretty")
+    output_format = FORMAT_JSON
+    if "--msgpack" in sys.argv:
+        sys.argv.remove("--msgpack")
+        if not MSGPACK_AVAILABLE:
+            print("Error: --msgpack needs the msgpack package", file=sys.stderr)
+            sys.exit(1)
+        output_format = FORMAT_MSGPACK
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--stream":
+        for event in streamPDF(cli_source(sys.argv[2])):
+            print(json.dumps(event, separators=(",", ":")), flush=True)
+        sys.exit(0)
+    
     if len(sys.argv) != 2:
-        print("Usage: python optimized_pdf_parser.py <pdf_path>")
+        print("Usage: python optimized_pdf_parser.py [--metrics] [--pretty | --msgpack] <pdf_path | ->")
+        print("       python optimized_pdf_parser.py [--metrics] --stream <pdf_path | ->")
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
-    result = parsePDF(pdf_path)
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    result = parsePDF(cli_source(sys.argv[1]))
+    attach_serialize_time(result)
+    print_result(result, output_format, pretty)
\ No newline at end of file
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Keyword matching shared by the PDF parsers
+
+The parsers classify page text, table rows and header cells by the keywords
+they contain. Every keyword list is compiled once, at import, into a single
+alternation regex, so a string is scanned once instead of once per keyword:
+- KeywordSet answers "does the text contain any of these keywords"
+- KeywordClassifier tells, in one scan, which of several keyword categories
+  a text contains
+
+Matching is plain substring matching on the text as given; keywords are
+lowercase, so callers lowercase the text first, as they did before.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# Page text of a workout day
+WORKOUT_KEYWORDS = (
+    'esercizio', 'exercise', 'allenamento', 'workout', 'training',
+    'serie', 'set', 'sets', 'ripetizioni', 'rep', 'reps',
+    'settimana', 'week', 'sett', 'giorno', 'day'
+)
+# First rows of a workout table
+TABLE_INDICATORS = (
+    'esercizio', 'exercise', 'serie', 'set', 'ripetizioni', 'rep',
+    'squat', 'panca', 'bench', 'press', 'curl', 'row', 'pull',
+    'deadlift', 'stacco', 'kg', 'peso', 'weight'
+)
+# The header row among a table's first rows
+HEADER_ROW_KEYWORDS = ('esercizio', 'exercise', 'serie', 'set')
+# Header cells: the exercise name column and the week/weight columns; a
+# header with a number in it (WEEK_NUMBER_PATTERN) is a week column too
+EXERCISE_COLUMN_KEYWORDS = ('esercizio', 'exercise', 'nome', 'name')
+WEEK_COLUMN_KEYWORDS = ('sett', 'week', 'peso', 'weight', 'kg')
+# Lines that can be a day's title
+TITLE_KEYWORDS = ('giorno', 'day', 'allenamento', 'workout')
+
+# Cell values that mean "nothing here"
+EMPTY_VALUES = frozenset({'none', 'null', ''})
+
+WEEK_NUMBER_PATTERN = re.compile(r'\d+')
+NUMERIC_CELL_PATTERN = re.compile(r'^\d+[\d\s\.\,]*$')
+# Sets/reps, durations, isometrics, totals: "4 x 8", "30\"", "20 iso", "45 sec", "50 totali"
+SETS_REPS_PATTERN = re.compile(r'(\d+\s*x\s*\d+|\d+["\']|\d+\s*iso|\d+\s*sec|\d+\s*totali)', re.IGNORECASE)
+
+ROW_INDICATOR = "indicator"
+ROW_HEADER = "header"
+COLUMN_EXERCISE = "exercise"
+COLUMN_WEEK = "week"
+
+
+def _alternation(keywords: Iterable[str]) -> str:
+    # Longest first: re alternation takes the first branch that matches
+    return "|".join(re.escape(keyword) for keyword in sorted(set(keywords), key=len, reverse=True))
+
+
+class KeywordSet:
+    """A keyword list compiled into one regex: contains() is any(k in text for k in keywords)"""
+    __slots__ = ("keywords", "_search")
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(keywords)
+        self._search = re.compile(_alternation(self.keywords)).search
+
+    def contains(self, text: str) -> bool:
+        return self._search(text) is not None
+
+
+class KeywordClassifier:
+    """
+    Keyword categories compiled into one regex. classify() returns the
+    categories whose keywords occur in the text, from a single left-to-right
+    scan that stops once every category has been seen.
+
+    Each search resumes one character after the previous match, so the scan
+    sees the longest keyword starting at every position that has one; each
+    keyword is credited with the categories of all keywords it contains
+    ('settimana' also counts as 'sett' and 'set'), which makes the answer the
+    same as testing every keyword separately.
+    """
+    __slots__ = ("categories", "_labels", "_search")
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        labels_by_keyword: Dict[str, Set[str]] = {}
+        for label, keywords in categories.items():
+            for keyword in keywords:
+                labels_by_keyword.setdefault(keyword, set()).add(label)
+
+        self.categories = frozenset(categories)
+        self._labels: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset(
+                label for other, labels in labels_by_keyword.items() if other in keyword for label in labels
+            )
+            for keyword in labels_by_keyword
+        }
+        # Not a lookahead: a plain alternation keeps re's fast scan for the first character
+        self._search = re.compile(_alternation(labels_by_keyword)).search
+
+    def classify(self, text: str) -> FrozenSet[str]:
+        found: FrozenSet[str] = frozenset()
+        match = self._search(text)
+        while match is not None:
+            found |= self._labels[match.group()]
+            if found == self.categories:
+                break
+            match = self._search(text, match.start() + 1)
+        return found
+
+
+WORKOUT_TEXT = KeywordSet(WORKOUT_KEYWORDS)
+TITLE_TEXT = KeywordSet(TITLE_KEYWORDS)
+TABLE_ROWS = KeywordClassifier({ROW_INDICATOR: TABLE_INDICATORS, ROW_HEADER: HEADER_ROW_KEYWORDS})
+HEADER_CELLS = KeywordClassifier({COLUMN_EXERCISE: EXERCISE_COLUMN_KEYWORDS, COLUMN_WEEK: WEEK_COLUMN_KEYWORDS})
+
+
+def row_text(row: List) -> str:
+    """A table row's non-empty cells as one lowercase string"""
+    return ' '.join(str(cell) for cell in row if cell).lower()
+
+
+def scan_table_head(table: List[List], count: int = 3) -> Tuple[bool, int]:
+    """
+    Classify the table's first rows: whether any has workout content and the
+    index of the header row (0 when none looks like one). Stops at the header
+    row, whose keywords are workout indicators too.
+    """
+    is_workout = False
+    for i, row in enumerate(table[:count]):
+        labels = TABLE_ROWS.classify(row_text(row))
+        is_workout = is_workout or ROW_INDICATOR in labels
+        if ROW_HEADER in labels:
+            return is_workout, i
+    return is_workout, 0
+
+
+def find_title(text: str, max_lines: int = 10) -> Optional[str]:
+    """First of the text's leading lines that reads like a day title"""
+    for line in text.split('\n')[:max_lines]:
+        line = line.strip()
+        if TITLE_TEXT.contains(line.lower()):
+            return line
+    return None
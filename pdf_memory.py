@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Constant-memory mode and RSS ceiling for the PDF parsing pipeline
+
+pdfplumber keeps every page's layout objects, and pdfminer every resolved
+object, alive until the document is closed. With PDF_PARSER_LOW_MEMORY=1 the
+parsers release each page as soon as it has been processed and drop image
+XObjects from its resources before layout analysis, so photos are never
+loaded. Only the parsed days are kept.
+
+PDF_PARSER_MAX_RSS_MB sets a ceiling on the process RSS (0, the default,
+disables it). Once a document crosses it the guard switches to low-memory
+mode and collects garbage. If RSS is still over the ceiling, parsing stops:
+the days parsed so far are returned, flagged with "memory_limited".
+"""
+import os
+import gc
+import ctypes
+import resource
+from typing import Dict, Any, Optional
+
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import LIT
+
+LOW_MEMORY = os.environ.get("PDF_PARSER_LOW_MEMORY", "") in ("1", "true", "yes")
+MAX_RSS_MB = float(os.environ.get("PDF_PARSER_MAX_RSS_MB", "0"))
+
+_LIT_IMAGE = LIT("Image")
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+# glibc keeps freed heap memory mapped; malloc_trim hands it back to the OS
+try:
+    _malloc_trim = ctypes.CDLL("libc.so.6").malloc_trim
+except (OSError, AttributeError):
+    _malloc_trim = None
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MiB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # No procfs: the peak is the best available upper bound (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+
+class MemoryGuard:
+    """
+    Per-document memory policy. The parsers call prepare() before a page is
+    analysed, release() once it is done and over_limit() before moving on to
+    the next one. After over_limit() has returned True, limited describes
+    where parsing stopped.
+    """
+
+    def __init__(self, low_memory: Optional[bool] = None, max_rss_mb: Optional[float] = None):
+        self.low_memory = LOW_MEMORY if low_memory is None else low_memory
+        self.max_rss_mb = MAX_RSS_MB if max_rss_mb is None else max_rss_mb
+        self.limited: Optional[Dict[str, Any]] = None
+
+    def prepare(self, page) -> None:
+        """Hide the page's image XObjects from the layout analysis"""
+        if not self.low_memory:
+            return
+        try:
+            page_obj = page.page_obj
+            resources = resolve1(page_obj.resources) or {}
+            xobjects = resolve1(resources.get("XObject")) or {}
+            kept = {name: ref for name, ref in xobjects.items()
+                    if resolve1(ref).get("Subtype") is not _LIT_IMAGE}
+            if len(kept) != len(xobjects):
+                # A new dict: resource dicts can be shared with other pages
+                page_obj.resources = dict(resources, XObject=kept)
+        except Exception:
+            # Leave an unusual page as it is rather than fail it
+            pass
+
+    def release(self, page) -> None:
+        """Drop the page's layout objects and the document's object cache"""
+        if not self.low_memory:
+            return
+        page.close()
+        doc = getattr(page.pdf, "doc", None)
+        for cache_name in ("_cached_objs", "_parsed_objs"):
+            cache = getattr(doc, cache_name, None)
+            if cache is not None:
+                cache.clear()
+
+    def over_limit(self, page) -> bool:
+        """True when parsing must stop after this page"""
+        if self.max_rss_mb <= 0:
+            return False
+        if current_rss_mb() <= self.max_rss_mb:
+            return False
+        # Degrade first: give back what the pages so far hold and release
+        # every page from now on
+        self.low_memory = True
+        for seen in page.pdf.pages:
+            seen.close()
+        self.release(page)
+        gc.collect()
+        if _malloc_trim is not None:
+            _malloc_trim(0)
+        rss_mb = current_rss_mb()
+        if rss_mb <= self.max_rss_mb:
+            return False
+        self.limited = {"limit_mb": self.max_rss_mb, "rss_mb": round(rss_mb, 1),
+                        "stopped_after_page": page.page_number}
+        return True
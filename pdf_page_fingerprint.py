@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Content fingerprints of individual PDF pages
+
+A page's fingerprint hashes its raw content streams, its resources (fonts,
+XObjects, ...) and its geometry, so two revisions of a program PDF give the
+same fingerprint for every page that was not edited, regardless of what
+changed elsewhere in the file. The page's position is left out: a page moved
+by an inserted or deleted page keeps its fingerprint.
+"""
+import hashlib
+from typing import Any, Dict, Optional, Set
+
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSLiteral
+
+# Resource trees are shallow; the limit only guards against pathological files
+_MAX_DEPTH = 32
+
+
+class PageFingerprinter:
+    """
+    Computes page fingerprints for one open document. Stream digests are
+    memoised by object id, so fonts and images shared by many pages are
+    hashed once per document.
+    """
+
+    def __init__(self, salt: str = ""):
+        self.salt = salt
+        self._stream_digests: Dict[int, bytes] = {}
+
+    def fingerprint(self, page) -> Optional[str]:
+        """Hex fingerprint of a pdfplumber page, or None if it cannot be computed"""
+        try:
+            page_obj = page.page_obj
+            h = hashlib.sha256()
+            h.update(f"{self.salt}|{tuple(page_obj.mediabox)}|{page_obj.rotate}|".encode())
+            for stream in page_obj.contents or []:
+                self._update(h, stream, set(), 0)
+            h.update(b"|resources|")
+            self._update(h, page_obj.resources, set(), 0)
+            return h.hexdigest()
+        except Exception:
+            return None
+
+    def _update(self, h, obj: Any, seen: Set[int], depth: int) -> None:
+        if depth > _MAX_DEPTH:
+            raise ValueError("Resource tree too deep")
+
+        if isinstance(obj, PDFObjRef):
+            if obj.objid in seen:
+                h.update(b"<cycle>")
+                return
+            seen = seen | {obj.objid}
+            obj = obj.resolve()
+
+        if isinstance(obj, PDFStream):
+            h.update(self._stream_digest(obj, seen, depth))
+        elif isinstance(obj, dict):
+            h.update(b"{")
+            for key in sorted(obj, key=str):
+                h.update(str(key).encode() + b":")
+                self._update(h, obj[key], seen, depth + 1)
+            h.update(b"}")
+        elif isinstance(obj, (list, tuple)):
+            h.update(b"[")
+            for item in obj:
+                self._update(h, item, seen, depth + 1)
+            h.update(b"]")
+        elif isinstance(obj, PSLiteral):
+            h.update(b"/" + str(obj.name).encode())
+        else:
+            h.update(repr(obj).encode())
+
+    def _stream_digest(self, stream: PDFStream, seen: Set[int], depth: int) -> bytes:
+        objid = getattr(stream, "objid", None)
+        if objid is not None and objid in self._stream_digests:
+            return self._stream_digests[objid]
+
+        h = hashlib.sha256()
+        self._update(h, stream.attrs, seen, depth + 1)
+        # Hash the stored bytes; decoding them would cost more than the hash
+        data = stream.get_rawdata()
+        h.update(data if data is not None else stream.get_data())
+        digest = h.digest()
+
+        if objid is not None:
+            self._stream_digests[objid] = digest
+        return digest
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Shared per-page parsing engine with pluggable extraction strategies
+"""
+import sys
+import time
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple
+import pdfplumber
+from pdf_parser_metrics import NULL_METRICS
+from pdf_memory import MemoryGuard
+from pdf_source import as_openable
+from pdf_result_model import Page
+
+_UNSET = object()
+
+
+class PageContext:
+    """
+    Per-page artefacts shared by every strategy. Text and tables are computed
+    on first access and reused, so the page layout is only analysed once no
+    matter how many strategies look at it.
+    """
+
+    def __init__(self, page, page_num: int, pdf_path: Any = None, metrics=NULL_METRICS):
+        self.page = page
+        self.page_num = page_num
+        self.pdf_path = pdf_path
+        self.metrics = metrics
+        self._text = _UNSET
+        self._tables = _UNSET
+
+    @property
+    def text(self) -> str:
+        if self._text is _UNSET:
+            with self.metrics.stage("extract_text", self.page_num):
+                self._text = self.page.extract_text() or ""
+        return self._text
+
+    @property
+    def tables(self) -> List[List[List[Optional[str]]]]:
+        if self._tables is _UNSET:
+            with self.metrics.stage("extract_tables", self.page_num):
+                self._tables = self.page.extract_tables() or []
+            self.metrics.count("tables_found", len(self._tables), self.page_num)
+        return self._tables
+
+    @property
+    def ruling_count(self) -> int:
+        """Ruling lines plus rectangles: a table drawn with borders has several"""
+        return len(self.page.lines) + len(self.page.rects)
+
+
+class Strategy:
+    """A named extraction step: returns a Page, or None to fall through to the next one"""
+
+    def __init__(self, name: str, extract: Callable[[PageContext], Optional[Page]]):
+        self.name = name
+        self.extract = extract
+
+
+class ParserEngine:
+    """
+    Runs an ordered strategy cascade on each page and stops at the first
+    strategy that yields exercises. page_gate can reject a page before any
+    strategy runs.
+    """
+
+    def __init__(self, strategies: List[Strategy],
+                 page_gate: Optional[Callable[[PageContext], bool]] = None):
+        self.strategies = strategies
+        self.page_gate = page_gate
+
+    def extract_page(self, ctx: PageContext) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Return (page_data, report), page_data as a PDFPage dict. report records
+        every attempted strategy and its cost; it is None when the page gate
+        rejected the page.
+        """
+        ctx.metrics.count("pages_seen")
+        try:
+            if self.page_gate:
+                with ctx.metrics.stage("page_gate", ctx.page_num):
+                    accepted = self.page_gate(ctx)
+                if not accepted:
+                    return None, None
+        except Exception as e:
+            print(f"Error processing page {ctx.page_num}: {e}", file=sys.stderr)
+            return None, None
+
+        attempts = []
+        for strategy in self.strategies:
+            started = time.perf_counter()
+            try:
+                page_data = strategy.extract(ctx)
+            except Exception as e:
+                print(f"Strategy {strategy.name} failed on page {ctx.page_num}: {e}", file=sys.stderr)
+                page_data = None
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            ctx.metrics.add_time(f"strategy.{strategy.name}", elapsed_ms, ctx.page_num)
+            matched = bool(page_data and page_data.exercises)
+            attempts.append({
+                "strategy": strategy.name,
+                "ms": round(elapsed_ms, 2),
+                "matched": matched
+            })
+            if matched:
+                return page_data.to_dict(), self._report(ctx, strategy.name, attempts)
+
+        return None, self._report(ctx, None, attempts)
+
+    @staticmethod
+    def _report(ctx: PageContext, winner: Optional[str], attempts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {"pageNumber": ctx.page_num, "strategy": winner, "attempts": attempts}
+
+    def iter_document(self, pdf, pdf_path: Any = None,
+                      reports: Optional[List[Dict[str, Any]]] = None,
+                      metrics=NULL_METRICS,
+                      guard: Optional[MemoryGuard] = None,
+                      stats: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Run the cascade over every page of an already opened PDF. guard
+        releases pages as they are done and stops early at its RSS ceiling.
+        stats["total_pages"] gets the document's page count.
+        """
+        guard = guard if guard is not None else MemoryGuard()
+        if stats is not None:
+            stats["total_pages"] = len(pdf.pages)
+        for page_num, page in enumerate(pdf.pages):
+            guard.prepare(page)
+            page_data, report = self.extract_page(PageContext(page, page_num + 1, pdf_path, metrics))
+            guard.release(page)
+            if report is not None and reports is not None:
+                reports.append(report)
+            if page_data:
+                yield page_data
+            if guard.over_limit(page):
+                return
+
+    def iter_pages(self, pdf_path: Any, reports: Optional[List[Dict[str, Any]]] = None,
+                   metrics=NULL_METRICS,
+                   guard: Optional[MemoryGuard] = None,
+                   stats: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield each parsed day as soon as its page is done, collecting strategy
+        reports and, in stats, the page count. pdf_path may also be the
+        document's bytes or a file object.
+        """
+        with metrics.stage("open"):
+            pdf = pdfplumber.open(as_openable(pdf_path))
+        with pdf:
+            yield from self.iter_document(pdf, pdf_path, reports, metrics, guard, stats)
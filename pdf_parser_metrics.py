@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-stage timers and counters for the PDF parsing pipeline
+
+Enabled with PDF_PARSER_METRICS=1 (or the parsers' --metrics flag). When
+disabled the parsers get NULL_METRICS, whose hooks do nothing.
+"""
+import os
+import json
+import time
+from typing import Dict, Any, Optional
+
+_enabled = os.environ.get("PDF_PARSER_METRICS", "") in ("1", "true", "yes")
+
+
+def metrics_enabled() -> bool:
+    return _enabled
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    """Turn metrics on for the rest of the process (used by --metrics)"""
+    global _enabled
+    _enabled = enabled
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "page_num", "started")
+
+    def __init__(self, metrics: "ParserMetrics", stage: str, page_num: Optional[int]):
+        self.metrics = metrics
+        self.stage = stage
+        self.page_num = page_num
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.add_time(self.stage, (time.perf_counter() - self.started) * 1000, self.page_num)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class ParserMetrics:
+    """
+    Accumulates stage timings (ms + call count) and counters, both as document
+    totals and per page. to_dict() is what ends up in the result's "metrics".
+    """
+    enabled = True
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.pages: Dict[int, Dict[str, Dict[str, float]]] = {}
+
+    def stage(self, name: str, page_num: Optional[int] = None) -> _StageTimer:
+        """Context manager timing one run of a stage"""
+        return _StageTimer(self, name, page_num)
+
+    def add_time(self, name: str, ms: float, page_num: Optional[int] = None) -> None:
+        total = self.stages.setdefault(name, {"ms": 0.0, "calls": 0})
+        total["ms"] += ms
+        total["calls"] += 1
+        if page_num is not None:
+            page_stages = self._page(page_num)["stages"]
+            page_stages[name] = page_stages.get(name, 0.0) + ms
+
+    def count(self, name: str, n: int = 1, page_num: Optional[int] = None) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+        if page_num is not None:
+            page_counters = self._page(page_num)["counters"]
+            page_counters[name] = page_counters.get(name, 0) + n
+
+    def _page(self, page_num: int) -> Dict[str, Dict[str, float]]:
+        if page_num not in self.pages:
+            self.pages[page_num] = {"stages": {}, "counters": {}}
+        return self.pages[page_num]
+
+    def merge(self, other: Dict[str, Any]) -> None:
+        """Fold in another to_dict() snapshot, e.g. from a process-pool worker"""
+        for name, total in other.get("stages", {}).items():
+            mine = self.stages.setdefault(name, {"ms": 0.0, "calls": 0})
+            mine["ms"] += total["ms"]
+            mine["calls"] += total["calls"]
+        for name, n in other.get("counters", {}).items():
+            self.counters[name] = self.counters.get(name, 0) + n
+        for page in other.get("pages", []):
+            self.pages[page["pageNumber"]] = {"stages": page["stages"], "counters": page["counters"]}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": {name: {"ms": round(t["ms"], 2), "calls": t["calls"]} for name, t in self.stages.items()},
+            "counters": dict(self.counters),
+            "pages": [
+                {
+                    "pageNumber": page_num,
+                    "stages": {name: round(ms, 2) for name, ms in page["stages"].items()},
+                    "counters": dict(page["counters"]),
+                }
+                for page_num, page in sorted(self.pages.items())
+            ],
+        }
+
+
+class NullMetrics:
+    """Drop-in replacement used when metrics are disabled"""
+    enabled = False
+
+    def stage(self, name: str, page_num: Optional[int] = None) -> _NullTimer:
+        return _NULL_TIMER
+
+    def add_time(self, name: str, ms: float, page_num: Optional[int] = None) -> None:
+        pass
+
+    def count(self, name: str, n: int = 1, page_num: Optional[int] = None) -> None:
+        pass
+
+    def merge(self, other: Dict[str, Any]) -> None:
+        pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {}
+
+
+NULL_METRICS = NullMetrics()
+
+
+def new_metrics(enabled: Optional[bool] = None):
+    """A fresh ParserMetrics when enabled, otherwise the shared NULL_METRICS"""
+    if enabled is None:
+        enabled = _enabled
+    return ParserMetrics() if enabled else NULL_METRICS
+
+
+def attach_serialize_time(result: Dict[str, Any]) -> None:
+    """
+    Time compact JSON serialization of result and record it as the
+    "serialize" stage. Does nothing when the result carries no metrics.
+    """
+    metrics = result.get("metrics")
+    if not metrics:
+        return
+    started = time.perf_counter()
+    json.dumps({k: v for k, v in result.items() if k != "metrics"}, separators=(",", ":"))
+    metrics.setdefault("stages", {})["serialize"] = {
+        "ms": round((time.perf_counter() - started) * 1000, 2), "calls": 1
+    }
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Line-delimited JSON worker loop shared by the PDF parsers' --serve mode
+"""
+import sys
+import json
+import os
+import time
+from typing import Dict, Any, Callable, Iterator, Optional
+
+from pdf_source import PDFSource, request_source
+from pdf_result_model import encode_result, page_row
+from pdf_parser_metrics import attach_serialize_time
+
+Writer = Callable[[Dict[str, Any]], None]
+ParseFn = Callable[[PDFSource], Dict[str, Any]]
+StreamFn = Callable[[PDFSource], Iterator[Dict[str, Any]]]
+StatsFn = Callable[[], Dict[str, Any]]
+
+
+def handle_request(request: Dict[str, Any], write: Writer, parse: ParseFn, stream: StreamFn,
+                   cache_stats: Optional[StatsFn] = None) -> Dict[str, Any]:
+    """
+    Answer one worker request with the parser's parse and stream functions.
+
+    Request:  {"id": "...", "path": "/path/to/file.pdf"}
+              {"id": "...", "data": "<the PDF, base64>"}
+    Response: {"id": "...", "result": {...}, "elapsedMs": 12.3}
+
+    With "stream": true, every parsed day is first sent as
+    {"id": "...", "event": "page", "page": {...}} and the final result carries
+    only the summary fields.
+
+    With "encoding": "rows", pages are sent in the compact row form of
+    pdf_result_model.py. Results carry the result schema version.
+
+    A {"id": "...", "op": "stats"} request returns {"id": "...", "cache": {...}};
+    parsers without a result cache report {"enabled": false}.
+    """
+    response: Dict[str, Any] = {"id": request.get("id")}
+    if request.get("op") == "stats":
+        response["cache"] = cache_stats() if cache_stats is not None else {"enabled": False}
+        return response
+
+    pdf_path = request_source(request)
+    rows = request.get("encoding") == "rows"
+    if request.get("stream"):
+        for event in stream(pdf_path):
+            if event["type"] == "page":
+                page = page_row(event["page"]) if rows else event["page"]
+                write({"id": request.get("id"), "event": "page", "page": page})
+            else:
+                response["result"] = encode_result({k: v for k, v in event.items() if k != "type"})
+    else:
+        result = parse(pdf_path)
+        attach_serialize_time(result)
+        response["result"] = encode_result(result, rows)
+    return response
+
+
+def serve(parse: ParseFn, stream: StreamFn, cache_stats: Optional[StatsFn] = None) -> None:
+    """
+    Long-lived worker mode: read one JSON request per line from stdin and
+    write one JSON response per line to stdout. Imports stay warm for the
+    lifetime of the process.
+
+    Requests are handled one at a time: parsing is CPU-bound Python, so a
+    second request in the same process would only contend for the GIL.
+    server/pdf-parser-pool.ts scales with more worker processes instead.
+
+    Each request goes through handle_request() with the parser's functions.
+    Responses carrying a "result" get the request's elapsedMs attached.
+    """
+    def write(message: Dict[str, Any]) -> None:
+        sys.stdout.write(json.dumps(message, separators=(",", ":")) + "\n")
+        sys.stdout.flush()
+
+    write({"event": "ready", "pid": os.getpid()})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            write({"id": None, "result": {"pages": [], "success": False, "error": f"Invalid request: {e}"}})
+            continue
+
+        started = time.perf_counter()
+        try:
+            response = handle_request(request, write, parse, stream, cache_stats)
+        except Exception as e:
+            response = {"id": request.get("id"),
+                        "result": {"pages": [], "success": False, "error": str(e)}}
+        if "result" in response:
+            response["elapsedMs"] = round((time.perf_counter() - started) * 1000, 2)
+        write(response)
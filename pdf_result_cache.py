@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+On-disk, size-bounded LRU cache for PDF parse results
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+DEFAULT_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", os.path.join(os.getcwd(), ".pdf_cache"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("PDF_CACHE_MAX_MB", "64")) * 1024 * 1024)
+DEFAULT_PAGE_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "pages")
+DEFAULT_PAGE_MAX_BYTES = int(float(os.environ.get("PDF_PAGE_CACHE_MAX_MB", "32")) * 1024 * 1024)
+CACHE_ENABLED = os.environ.get("PDF_CACHE_DISABLED", "") not in ("1", "true", "yes")
+
+
+class ParseResultCache:
+    """
+    Stores one JSON file per entry, named after the SHA-256 of the PDF bytes
+    plus the parser settings. Entry mtimes are bumped on every hit, so eviction
+    removes the least recently used files once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(pdf_bytes: bytes, salt: str) -> str:
+        """Build the cache key from the PDF content and the parser settings"""
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        settings = hashlib.sha256(salt.encode()).hexdigest()[:16]
+        return f"{digest}-{settings}"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result atomically, then evict old entries if over budget"""
+        if self._write(key, result):
+            self._evict()
+
+    def put_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Store several entries with a single eviction pass at the end"""
+        written = [self._write(key, result) for key, result in items]
+        if any(written):
+            self._evict()
+
+    def _write(self, key: str, result: Dict[str, Any]) -> bool:
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        # Oldest access first
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus the current on-disk footprint"""
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "maxBytes": self.max_bytes,
+            }
+
+
+_default_cache: Optional[ParseResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ParseResultCache]:
+    """Shared process-wide cache, or None when caching is disabled"""
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ParseResultCache()
+    return _default_cache
+
+
+_default_page_cache: Optional[ParseResultCache] = None
+
+
+def get_default_page_cache() -> Optional[ParseResultCache]:
+    """Shared per-page result cache (see PrecisePDFParser), or None when caching is disabled"""
+    global _default_page_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_page_cache is None:
+            _default_page_cache = ParseResultCache(DEFAULT_PAGE_CACHE_DIR, DEFAULT_PAGE_MAX_BYTES)
+    return _default_page_cache
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Result model shared by the PDF parsers, and its wire encodings
+
+Exercise and Page are the parsers' in-pipeline types; to_dict() gives the
+PDFPage / Exercise shape of shared/schema.ts, which is what results, caches
+and streamed events carry.
+
+On the way out a result can be encoded as:
+- minified JSON (the default)
+- msgpack, when the optional msgpack package is installed
+- "rows": every page as [pageNumber, title, exercises] and every exercise as
+  [id, name, setsReps, weeks, scarico?, recupero?, note?], with weeks as the
+  list of weights of settimana_1..n. Trailing absent fields are dropped and
+  weeks that are not numbered 1..n in order stay a {weekId: weight} object.
+  decodePage() in server/pdf-parser-pool.ts turns a row back into a PDFPage.
+
+Encoded results carry "schema": RESULT_SCHEMA_VERSION.
+"""
+import sys
+import json
+import importlib.util
+from typing import Any, Dict, List, Optional, Union
+
+RESULT_SCHEMA_VERSION = 2
+
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+
+WEEK_PREFIX = "settimana_"
+_EXTRA_FIELDS = ("scarico", "recupero", "note")
+
+
+def week_key(number: Union[int, str]) -> str:
+    return f"{WEEK_PREFIX}{number}"
+
+
+class Exercise:
+    """
+    One exercise row. weeks maps week ids to weights in insertion order;
+    scarico, recupero and note are None when the parser does not read them.
+    """
+    __slots__ = ("id", "name", "sets_reps", "weeks", "scarico", "recupero", "note")
+
+    def __init__(self, id: str, name: str, sets_reps: str,
+                 weeks: Optional[Dict[str, str]] = None,
+                 scarico: Optional[str] = None, recupero: Optional[str] = None,
+                 note: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.sets_reps = sets_reps
+        self.weeks: Dict[str, str] = weeks if weeks is not None else {}
+        self.scarico = scarico
+        self.recupero = recupero
+        self.note = note
+
+    def fill_weeks(self, count: int) -> "Exercise":
+        """Make sure settimana_1..count exist, empty when the table had nothing"""
+        for number in range(1, count + 1):
+            self.weeks.setdefault(week_key(number), "")
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "id": self.id,
+            "name": self.name,
+            "setsReps": self.sets_reps,
+            "weeks": {key: {"weight": weight} for key, weight in self.weeks.items()},
+        }
+        for field in _EXTRA_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+
+class Page:
+    """A parsed day: page number, title and its exercises"""
+    __slots__ = ("page_number", "title", "exercises")
+
+    def __init__(self, page_number: int, title: str, exercises: List[Exercise]):
+        self.page_number = page_number
+        self.title = title
+        self.exercises = exercises
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pageNumber": self.page_number,
+            "title": self.title,
+            "exercises": [exercise.to_dict() for exercise in self.exercises],
+        }
+
+
+def _week_row(weeks: Dict[str, Dict[str, Any]]) -> Union[List[str], Dict[str, str]]:
+    weights = [week.get("weight", "") for week in weeks.values()]
+    if all(key == week_key(i) for i, key in enumerate(weeks, 1)):
+        return weights
+    return dict(zip(weeks, weights))
+
+
+def exercise_row(exercise: Dict[str, Any]) -> List[Any]:
+    row = [exercise["id"], exercise["name"], exercise["setsReps"], _week_row(exercise.get("weeks") or {})]
+    row.extend(exercise.get(field) for field in _EXTRA_FIELDS)
+    while row[-1] is None:
+        row.pop()
+    return row
+
+
+def page_row(page: Dict[str, Any]) -> List[Any]:
+    return [page["pageNumber"], page["title"], [exercise_row(e) for e in page["exercises"]]]
+
+
+def encode_result(result: Dict[str, Any], rows: bool = False) -> Dict[str, Any]:
+    """The result with its schema version and, with rows, its pages as rows"""
+    encoded = dict(result, schema=RESULT_SCHEMA_VERSION)
+    if rows and "pages" in result:
+        encoded["pages"] = [page_row(page) for page in result["pages"]]
+        encoded["encoding"] = "rows"
+    return encoded
+
+
+def dumps(result: Dict[str, Any], fmt: str = FORMAT_JSON, rows: bool = False) -> bytes:
+    """Serialize a result: minified UTF-8 JSON, or msgpack"""
+    encoded = encode_result(result, rows)
+    if fmt == FORMAT_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack output needs the msgpack package")
+        import msgpack
+        return msgpack.packb(encoded, use_bin_type=True)
+    if fmt != FORMAT_JSON:
+        raise ValueError(f"Unknown output format {fmt!r}")
+    return json.dumps(encoded, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def print_result(result: Dict[str, Any], fmt: str = FORMAT_JSON, pretty: bool = False) -> None:
+    """CLI output: minified JSON, indented JSON with pretty, or msgpack bytes"""
+    if pretty and fmt == FORMAT_JSON:
+        print(json.dumps(encode_result(result), indent=2))
+        return
+    sys.stdout.buffer.write(dumps(result, fmt))
+    if fmt == FORMAT_JSON:
+        sys.stdout.buffer.write(b"\n")
+    sys.stdout.buffer.flush()
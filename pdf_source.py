@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Where a PDF comes from: a filesystem path, raw bytes or a binary file object
+
+pdfplumber.open() takes a path or a seekable binary stream, so an uploaded
+document can be parsed straight from memory without a temp file. Only code
+that hands the document to other processes by path (the precise parser's
+page-parallel pool) spills it to one, through as_path(). On the command line
+"-" reads the document from stdin; a --serve request carries either
+{"path": ...} or the document itself as base64 in {"data": ...}.
+"""
+import io
+import os
+import sys
+import base64
+import tempfile
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Union
+
+PDFSource = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, BinaryIO]
+
+STDIN_ARG = "-"
+
+
+def as_openable(source: PDFSource) -> Union[str, BinaryIO]:
+    """A path or seekable stream for pdfplumber.open()"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if source.seekable():
+        return source
+    # pdfminer seeks around the file (the xref table is at the end)
+    return io.BytesIO(source.read())
+
+
+def read_bytes(source: PDFSource) -> bytes:
+    """The whole document, e.g. to hash it; seekable file objects are left where they were"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if not source.seekable():
+        return source.read()
+    position = source.tell()
+    try:
+        source.seek(0)
+        return source.read()
+    finally:
+        source.seek(position)
+
+
+@contextmanager
+def as_path(source: PDFSource) -> Iterator[str]:
+    """A path to the document: its own, or a temp file removed when the context exits"""
+    if isinstance(source, (str, os.PathLike)):
+        yield os.fspath(source)
+        return
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(read_bytes(source))
+        yield path
+    finally:
+        os.remove(path)
+
+
+def cli_source(arg: str) -> PDFSource:
+    """Command line argument to source: "-" reads the document from stdin"""
+    return sys.stdin.buffer.read() if arg == STDIN_ARG else arg
+
+
+def request_source(request: Dict[str, Any]) -> PDFSource:
+    """Document of a --serve request: inline base64 "data" or a "path" on disk"""
+    if request.get("data"):
+        return base64.b64decode(request["data"])
+    if request.get("path"):
+        return request["path"]
+    raise ValueError("Missing 'path' or 'data' in request")
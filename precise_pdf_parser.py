@@ -5,39 +5,273 @@ Precise PDF parser for Davide Bollella workout format
 import sys
 import json
 import os
-from typing import Dict, Any, List, Optional
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Iterator
 import pdfplumber
-import re
+from pdf_result_cache import ParseResultCache, get_default_cache, get_default_page_cache
+from pdf_page_fingerprint import PageFingerprinter
+from pdf_memory import MemoryGuard, LOW_MEMORY, MAX_RSS_MB
+from pdf_source import PDFSource, as_openable, as_path, read_bytes, cli_source
+from pdf_keywords import KeywordSet, EMPTY_VALUES, SETS_REPS_PATTERN
+from pdf_result_model import Exercise, Page, FORMAT_JSON, FORMAT_MSGPACK, MSGPACK_AVAILABLE, print_result
+from pdf_parser_engine import ParserEngine, PageContext, Strategy
+from pdf_parser_worker import serve
+from pdf_parser_metrics import NULL_METRICS, metrics_enabled, enable_metrics, new_metrics, attach_serialize_time
+
+# Bump whenever the extraction logic changes so cached results are invalidated
+PARSER_VERSION = "precise-4"
+
+# Page-parallel extraction: worker processes and the minimum page count
+# before it is worth paying the process fan-out
+DEFAULT_PARALLEL_WORKERS = int(os.environ.get("PDF_PARSER_PROCESSES", str(os.cpu_count() or 1)))
+DEFAULT_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARSER_PARALLEL_MIN_PAGES", "12"))
+
+# Cheap page pre-filter run before extract_tables()
+PREFILTER_ENABLED = os.environ.get("PDF_PARSER_PREFILTER", "1") not in ("0", "false", "no")
+PREFILTER_MIN_CHARS = 20
+PREFILTER_MIN_RULINGS = 2
+PREFILTER_KEYWORD = "esercizio"
+
+# Exercise-column values of rows that repeat the header or a day title
+NOT_AN_EXERCISE = KeywordSet(('esercizio', 'giorno', 'sett'))
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool, kept alive so --serve mode pays the spawn cost once"""
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            # spawn, not fork: workers start clean instead of inheriting the
+            # parent's open documents and caches
+            _process_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _process_pool_workers = workers
+        return _process_pool
+
+def _extract_page_range(pdf_path: str, start: int, end: int, collect_metrics: bool = False,
+                        use_page_cache: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Process-pool task: open the PDF and extract pages [start, end)"""
+    parser = PrecisePDFParser(workers=1, page_cache=get_default_page_cache() if use_page_cache else None)
+    metrics = new_metrics(collect_metrics)
+    with metrics.stage("open"):
+        pdf = pdfplumber.open(pdf_path)
+    with pdf:
+        pages_data, stats = parser._process_pages(pdf.pages[start:end], start, pdf_path, metrics)
+    stats["metrics"] = metrics.to_dict()
+    return pages_data, stats
 
 class PrecisePDFParser:
-    def __init__(self):
-        pass
+    def __init__(self, workers: int = DEFAULT_PARALLEL_WORKERS,
+                 parallel_min_pages: int = DEFAULT_PARALLEL_MIN_PAGES,
+                 prefilter: bool = PREFILTER_ENABLED,
+                 collect_metrics: Optional[bool] = None,
+                 page_cache: Optional[ParseResultCache] = None):
+        self.workers = max(1, workers)
+        self.parallel_min_pages = parallel_min_pages
+        self.prefilter = prefilter
+        self.collect_metrics = metrics_enabled() if collect_metrics is None else collect_metrics
+        # Per-page results keyed by page fingerprint, so a revised PDF only
+        # re-extracts the pages that changed
+        self.page_cache = page_cache
+        self.engine = ParserEngine(
+            [Strategy("pdfplumber_table", self._extract_table_page)],
+            page_gate=self._is_candidate_page if prefilter else None
+        )
         
-    def parse_pdf(self, pdf_path: str) -> Dict[str, Any]:
-        """Parse PDF with precise table structure detection"""
+    def parse_pdf(self, pdf_path: PDFSource) -> Dict[str, Any]:
+        """Parse PDF (a path, bytes or a binary file object) with precise table structure detection"""
         try:
             pages_data = []
+            stats: Dict[str, Any] = {}
+            metrics = new_metrics(self.collect_metrics)
             
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    page_data = self._extract_page_data(page, page_num + 1)
-                    if page_data:
-                        pages_data.append(page_data)
+            with metrics.stage("open"):
+                source = as_openable(pdf_path)
+                pdf = pdfplumber.open(source)
+                page_count = len(pdf.pages)
+            with pdf:
+                parallel = self._should_parallelize(page_count)
+                if not parallel:
+                    pages_data, stats = self._process_pages(pdf.pages, 0, pdf_path, metrics)
+            
+            if parallel:
+                # Workers open the document themselves, so an in-memory one is
+                # written to a temp file for the duration of the run
+                with as_path(source) as path:
+                    pages_data, stats = self._parse_parallel(path, page_count, metrics)
             
-            return {
+            result = {
                 "pages": pages_data,
                 "success": True,
-                "total_pages": len(pages_data)
+                "total_pages": len(pages_data),
+                "skipped_pages": stats["skipped_pages"],
+                "strategies": stats["strategies"]
             }
+            if stats.get("memory_limited"):
+                result["memory_limited"] = stats["memory_limited"]
+            if self.page_cache is not None:
+                result["reused_pages"] = stats["reused_pages"]
+                result["recomputed_pages"] = stats["recomputed_pages"]
+            if metrics.enabled:
+                result["metrics"] = metrics.to_dict()
+            return result
                 
         except Exception as e:
             print(f"Error parsing PDF: {e}", file=sys.stderr)
             return {"pages": [], "success": False, "error": str(e)}
     
-    def _extract_page_data(self, page, page_num: int) -> Optional[Dict[str, Any]]:
+    def cache_salt(self) -> str:
+        """Settings that change the output: part of every document key and page fingerprint"""
+        return f"{PARSER_VERSION}|prefilter={int(self.prefilter)}"
+    
+    def iter_pages(self, pdf_path: PDFSource, stats: Optional[Dict[str, Any]] = None,
+                   metrics=NULL_METRICS) -> Iterator[Dict[str, Any]]:
+        """Yield each parsed day as soon as its page has been extracted"""
+        stats = stats if stats is not None else {}
+        with metrics.stage("open"):
+            pdf = pdfplumber.open(as_openable(pdf_path))
+        with pdf:
+            yield from self._iter_pages(pdf.pages, 0, stats, pdf_path, metrics)
+    
+    def _should_parallelize(self, page_count: int) -> bool:
+        """
+        Only large documents go through the process pool. Not in low-memory
+        mode, where every worker would hold its own copy, nor under an RSS
+        ceiling, which only means something for a single process
+        """
+        return (self.workers > 1 and page_count >= self.parallel_min_pages
+                and not LOW_MEMORY and MAX_RSS_MB <= 0)
+    
+    def _parse_parallel(self, pdf_path: str, page_count: int,
+                        metrics=NULL_METRICS) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Split the document into contiguous page ranges, one per worker, and merge in page order"""
+        workers = min(self.workers, page_count)
+        chunk = -(-page_count // workers)
+        ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+        
+        pool = _get_process_pool(self.workers)
+        futures = [
+            pool.submit(_extract_page_range, pdf_path, start, end, metrics.enabled,
+                        self.page_cache is not None)
+            for start, end in ranges
+        ]
+        
+        pages_data = []
+        stats: Dict[str, Any] = {"skipped_pages": 0, "strategies": [], "reused_pages": [], "recomputed_pages": []}
+        for future in futures:
+            range_pages, range_stats = future.result()
+            pages_data.extend(range_pages)
+            stats["skipped_pages"] += range_stats["skipped_pages"]
+            stats["strategies"].extend(range_stats["strategies"])
+            stats["reused_pages"].extend(range_stats.get("reused_pages", []))
+            stats["recomputed_pages"].extend(range_stats.get("recomputed_pages", []))
+            metrics.merge(range_stats["metrics"])
+        return pages_data, stats
+    
+    def _process_pages(self, pages, offset: int, pdf_path: Any = None,
+                       metrics=NULL_METRICS) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Extract a run of pages, returning the parsed days plus skip count and strategy reports"""
+        stats: Dict[str, Any] = {}
+        pages_data = list(self._iter_pages(pages, offset, stats, pdf_path, metrics))
+        return pages_data, stats
+    
+    def _iter_pages(self, pages, offset: int, stats: Dict[str, Any], pdf_path: Any = None,
+                    metrics=NULL_METRICS) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the parsed days of a run of pages, recording pre-filter skips and
+        strategy reports in stats. With a page cache, pages whose fingerprint is
+        cached are reused instead of extracted, and stats also lists the reused
+        and recomputed page numbers. Cached entries hold nothing that depends on
+        the page's position, so a reused page gets its number (and default title)
+        here. If the memory guard stops the run early, stats["memory_limited"]
+        says where.
+        """
+        stats.setdefault("skipped_pages", 0)
+        stats.setdefault("strategies", [])
+        page_cache = self.page_cache
+        if page_cache is not None:
+            stats.setdefault("reused_pages", [])
+            stats.setdefault("recomputed_pages", [])
+            fingerprinter = PageFingerprinter(self.cache_salt())
+            pending: List[Tuple[str, Dict[str, Any]]] = []
+        guard = MemoryGuard()
+        
+        for idx, page in enumerate(pages):
+            page_num = offset + idx + 1
+            if page_cache is None:
+                guard.prepare(page)
+                page_data, report = self.engine.extract_page(PageContext(page, page_num, pdf_path, metrics))
+            else:
+                with metrics.stage("fingerprint", page_num):
+                    fingerprint = fingerprinter.fingerprint(page)
+                cached = page_cache.get(fingerprint) if fingerprint else None
+                if cached is not None:
+                    page_data, report = cached["page"], cached["report"]
+                    if page_data:
+                        page_data = dict(page_data, pageNumber=page_num)
+                    if report is not None:
+                        report = dict(report, pageNumber=page_num, reused=True)
+                    stats["reused_pages"].append(page_num)
+                    metrics.count("pages_reused", 1, page_num)
+                else:
+                    # Fingerprint first: it must see the page's images
+                    guard.prepare(page)
+                    page_data, report = self.engine.extract_page(PageContext(page, page_num, pdf_path, metrics))
+                    stats["recomputed_pages"].append(page_num)
+                    if fingerprint:
+                        pending.append((fingerprint, {"page": page_data, "report": report}))
+            guard.release(page)
+            
+            if report is None:
+                stats["skipped_pages"] += 1
+            else:
+                stats["strategies"].append(report)
+                if page_data:
+                    if not page_data["title"]:
+                        page_data = dict(page_data, title=f"Giorno {page_num}")
+                    yield page_data
+            if guard.over_limit(page):
+                stats["memory_limited"] = guard.limited
+                break
+        
+        if page_cache is not None and pending:
+            page_cache.put_many(pending)
+    
+    def _is_candidate_page(self, ctx: PageContext) -> bool:
+        """
+        Decide from cheap layout signals whether a page can hold a workout table.
+        extract_tables() only finds ruled tables and _extract_table_page needs an
+        'Esercizio' header, so pages without ruling lines/rects, with almost no
+        text or without the keyword in their raw chars cannot produce a day.
+        """
+        try:
+            if ctx.ruling_count < PREFILTER_MIN_RULINGS:
+                return False
+            
+            chars = ctx.page.chars
+            if len(chars) < PREFILTER_MIN_CHARS:
+                return False
+            
+            raw_text = "".join(char["text"] for char in chars).lower()
+            return PREFILTER_KEYWORD in raw_text
+        except Exception:
+            # Never drop a page because the pre-filter itself failed
+            return True
+    
+    def _extract_table_page(self, ctx: PageContext) -> Optional[Page]:
         """Extract data from a single page"""
+        page_num = ctx.page_num
         try:
-            tables = page.extract_tables()
+            tables = ctx.tables
             if not tables:
                 return None
             
@@ -46,8 +280,8 @@ class PrecisePDFParser:
             if not table or len(table) < 3:
                 return None
             
-            # Extract page title from first row
-            page_title = self._extract_page_title(table, page_num)
+            # Extract page title from first row; _iter_pages names untitled days
+            page_title = self._extract_page_title(table)
             
             # Find the header row (usually row 1, after title)
             header_row = None
@@ -63,14 +297,14 @@ class PrecisePDFParser:
                 return None
             
             # Parse exercises from data rows
-            exercises = self._parse_exercises(table, header_row_idx)
+            with ctx.metrics.stage("parse_exercises", page_num):
+                exercises = self._parse_exercises(table, header_row_idx)
+            data_rows = len(table) - header_row_idx - 1
+            ctx.metrics.count("rows_kept", len(exercises), page_num)
+            ctx.metrics.count("rows_skipped", data_rows - len(exercises), page_num)
             
             if exercises:
-                return {
-                    "pageNumber": page_num,
-                    "title": page_title,
-                    "exercises": exercises
-                }
+                return Page(page_num, page_title, exercises)
             
             return None
             
@@ -78,15 +312,15 @@ class PrecisePDFParser:
             print(f"Error processing page {page_num}: {e}", file=sys.stderr)
             return None
     
-    def _extract_page_title(self, table: List[List], page_num: int) -> str:
-        """Extract page title from table"""
+    def _extract_page_title(self, table: List[List]) -> str:
+        """Extract page title from table, or "" if the first cell is not one"""
         if table and table[0] and table[0][0]:
             title = str(table[0][0]).strip()
             if title and 'giorno' in title.lower():
                 return title
-        return f"Giorno {page_num}"
+        return ""
     
-    def _parse_exercises(self, table: List[List], header_row_idx: int) -> List[Dict[str, Any]]:
+    def _parse_exercises(self, table: List[List], header_row_idx: int) -> List[Exercise]:
         """Parse exercises from table data"""
         exercises = []
         
@@ -125,7 +359,7 @@ class PrecisePDFParser:
                 continue
             
             # Skip rows that look like headers or separators
-            if any(keyword in exercise_name.lower() for keyword in ['esercizio', 'giorno', 'sett']):
+            if NOT_AN_EXERCISE.contains(exercise_name.lower()):
                 continue
             
             # Build weeks data with all available columns
@@ -133,14 +367,11 @@ class PrecisePDFParser:
             
             # Extract week data
             for week_name, col_idx in week_cols.items():
+                weeks[week_name] = ""
                 if len(row) > col_idx and row[col_idx]:
                     value = str(row[col_idx]).strip()
-                    if value and value.lower() not in ['none', 'null', '']:
-                        weeks[week_name] = {"weight": value}
-                    else:
-                        weeks[week_name] = {"weight": ""}
-                else:
-                    weeks[week_name] = {"weight": ""}
+                    if value.lower() not in EMPTY_VALUES:
+                        weeks[week_name] = value
             
             # Extract additional data
             scarico_data = ""
@@ -155,7 +386,7 @@ class PrecisePDFParser:
             note_data = ""
             if len(row) > note_col and row[note_col]:
                 note_value = str(row[note_col]).strip()
-                if note_value and note_value.lower() not in ['none', 'null', '']:
+                if note_value.lower() not in EMPTY_VALUES:
                     note_data = note_value
             
             # Determine sets/reps from first week data, recupero, or note data
@@ -163,34 +394,23 @@ class PrecisePDFParser:
             
             # Prima prova a usare il contenuto della settimana 1
             first_week_content = ""
-            for week_name in weeks:
-                if weeks[week_name].get("weight"):
-                    first_week_content = weeks[week_name]["weight"]
+            for weight in weeks.values():
+                if weight:
+                    first_week_content = weight
                     break
             
             # Pattern più ampio per riconoscere sets/reps, durate, isometriche, ecc.
-            sets_reps_pattern = r'(\d+\s*x\s*\d+|\d+["\']|\d+\s*iso|\d+\s*sec|\d+\s*totali)'
-            
-            if first_week_content and re.search(sets_reps_pattern, first_week_content, re.IGNORECASE):
+            if first_week_content and SETS_REPS_PATTERN.search(first_week_content):
                 sets_reps = first_week_content
-            elif recupero_data and re.search(sets_reps_pattern, recupero_data, re.IGNORECASE):
+            elif recupero_data and SETS_REPS_PATTERN.search(recupero_data):
                 sets_reps = recupero_data
-            elif note_data and re.search(sets_reps_pattern, note_data, re.IGNORECASE):
+            elif note_data and SETS_REPS_PATTERN.search(note_data):
                 sets_reps = note_data
             
             # Mantieni le settimane vuote come vuote - la logica per il riepilogo sarà nel frontend
             
-            exercise = {
-                "id": f"ex_{len(exercises) + 1}",
-                "name": exercise_name,
-                "setsReps": sets_reps,
-                "weeks": weeks,
-                "scarico": scarico_data,
-                "recupero": recupero_data,
-                "note": note_data
-            }
-            
-            exercises.append(exercise)
+            exercises.append(Exercise(f"ex_{len(exercises) + 1}", exercise_name, sets_reps, weeks,
+                                      scarico=scarico_data, recupero=recupero_data, note=note_data))
             
             # Limit exercises per page
             if len(exercises) >= 20:
@@ -198,16 +418,138 @@ class PrecisePDFParser:
         
         return exercises
 
-def parsePDF(pdf_path: str) -> Dict[str, Any]:
-    """Main function to parse PDF"""
-    parser = PrecisePDFParser()
-    return parser.parse_pdf(pdf_path)
+# Result fields that describe a single run and are not stored in the document cache
+_RUN_ONLY_FIELDS = ("metrics", "reused_pages", "recomputed_pages")
+
+def _read_once(pdf_path: PDFSource) -> PDFSource:
+    """File objects become bytes, so hashing and parsing read the upload only once"""
+    if isinstance(pdf_path, (str, os.PathLike, bytes)):
+        return pdf_path
+    return read_bytes(pdf_path)
+
+def parsePDF(pdf_path: PDFSource, use_cache: bool = True) -> Dict[str, Any]:
+    """Main function to parse PDF: a path, the document's bytes or a binary file object"""
+    cache = get_default_cache() if use_cache else None
+    parser = PrecisePDFParser(page_cache=get_default_page_cache() if use_cache else None)
+    if cache is None:
+        return parser.parse_pdf(pdf_path)
+
+    pdf_path = _read_once(pdf_path)
+    lookup = new_metrics()
+    with lookup.stage("cache_lookup"):
+        try:
+            key = ParseResultCache.make_key(read_bytes(pdf_path), parser.cache_salt())
+        except OSError:
+            return parser.parse_pdf(pdf_path)
+        cached = cache.get(key)
+
+    if cached is not None:
+        if lookup.enabled:
+            cached["metrics"] = dict(lookup.to_dict(), cache_hit=True)
+        return cached
+
+    result = parser.parse_pdf(pdf_path)
+    # A run cut short by the memory ceiling is not the document's result
+    if result.get("success") and not result.get("memory_limited"):
+        cache.put(key, {k: v for k, v in result.items() if k not in _RUN_ONLY_FIELDS})
+    if "metrics" in result:
+        result["metrics"]["stages"].update(lookup.to_dict()["stages"])
+        result["metrics"]["cache_hit"] = False
+    return result
+
+def streamPDF(pdf_path: PDFSource, use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming counterpart of parsePDF: yields one {"type": "page", "page": {...}}
+    event per parsed day, then a final {"type": "done", ...} summary
+    """
+    cache = get_default_cache() if use_cache else None
+    parser = PrecisePDFParser(page_cache=get_default_page_cache() if use_cache else None)
+    key = None
+    if cache is not None:
+        pdf_path = _read_once(pdf_path)
+        try:
+            key = ParseResultCache.make_key(read_bytes(pdf_path), parser.cache_salt())
+        except OSError:
+            key = None
+
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            for page_data in cached["pages"]:
+                yield {"type": "page", "page": page_data}
+            yield {"type": "done", "success": True, "total_pages": cached["total_pages"],
+                   "skipped_pages": cached.get("skipped_pages", 0)}
+            return
+
+    pages_data = []
+    stats: Dict[str, Any] = {}
+    metrics = new_metrics()
+    try:
+        for page_data in parser.iter_pages(pdf_path, stats, metrics):
+            pages_data.append(page_data)
+            yield {"type": "page", "page": page_data}
+    except Exception as e:
+        print(f"Error parsing PDF: {e}", file=sys.stderr)
+        yield {"type": "done", "success": False, "error": str(e)}
+        return
+
+    result = {
+        "pages": pages_data,
+        "success": True,
+        "total_pages": len(pages_data),
+        "skipped_pages": stats.get("skipped_pages", 0),
+        "strategies": stats.get("strategies", [])
+    }
+    if key is not None and not stats.get("memory_limited"):
+        cache.put(key, result)
+    done = {"type": "done", "success": True, "total_pages": result["total_pages"],
+            "skipped_pages": result["skipped_pages"]}
+    if stats.get("memory_limited"):
+        done["memory_limited"] = stats["memory_limited"]
+    if parser.page_cache is not None:
+        done["reused_pages"] = stats["reused_pages"]
+        done["recomputed_pages"] = stats["recomputed_pages"]
+    if metrics.enabled:
+        done["metrics"] = metrics.to_dict()
+    yield done
+
+def cacheStats() -> Dict[str, Any]:
+    """Hit/miss counters of the parse-result cache"""
+    cache = get_default_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats(), "pages": get_default_page_cache().stats()}
 
 if __name__ == "__main__":
+    if "--metrics" in sys.argv:
+        sys.argv.remove("--metrics")
+        enable_metrics()
+    pretty = "--pretty" in sys.argv
+    if pretty:
+        sys.argv.remove("--pretty")
+    output_format = FORMAT_JSON
+    if "--msgpack" in sys.argv:
+        sys.argv.remove("--msgpack")
+        if not MSGPACK_AVAILABLE:
+            print("Error: --msgpack needs the msgpack package", file=sys.stderr)
+            sys.exit(1)
+        output_format = FORMAT_MSGPACK
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "--serve":
+        serve(parsePDF, streamPDF, cacheStats)
+        sys.exit(0)
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--stream":
+        for event in streamPDF(cli_source(sys.argv[2])):
+            print(json.dumps(event, separators=(",", ":")), flush=True)
+        sys.exit(0)
+
     if len(sys.argv) != 2:
-        print("Usage: python precise_pdf_parser.py <pdf_path>")
+        print("Usage: python precise_pdf_parser.py [--metrics] [--pretty | --msgpack] <pdf_path | ->")
+        print("       python precise_pdf_parser.py [--metrics] --stream <pdf_path | ->")
+        print("       python precise_pdf_parser.py [--metrics] --serve")
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
-    result = parsePDF(pdf_path)
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    result = parsePDF(cli_source(sys.argv[1]))
+    attach_serialize_time(result)
+    print_result(result, output_format, pretty)
\ No newline at end of file
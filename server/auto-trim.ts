@@ -0,0 +1,57 @@
+import { spawn } from "child_process";
+import path from "path";
+
+// Node side of server/auto_trim.py: proposes the segments of a video where
+// the lifter is moving, from frame differences on a low-res, low-fps decode.
+// Proposals use the same t_in/t_out fields as trim batches.
+
+const AUTO_TRIM_SCRIPT = path.join("server", "auto_trim.py");
+
+export interface AutoTrimSegment {
+  t_in: number;
+  t_out: number;
+  confidence: number;
+  motion: number;
+}
+
+export interface AutoTrimResult {
+  duration: number;
+  fps: number;
+  frames: number;
+  segments: AutoTrimSegment[];
+  analysisMs: number;
+}
+
+// Analyses already running, so concurrent callers share one decode
+const inFlight = new Map<string, Promise<AutoTrimResult>>();
+
+export function detectSegments(videoPath: string): Promise<AutoTrimResult> {
+  const running = inFlight.get(videoPath);
+  if (running) return running;
+
+  const analysis = new Promise<AutoTrimResult>((resolve, reject) => {
+    const child = spawn("python3", [AUTO_TRIM_SCRIPT, videoPath]);
+    let output = "";
+    let error = "";
+    child.stdout.on("data", (data) => {
+      output += data.toString();
+    });
+    child.stderr.on("data", (data) => {
+      error += data.toString();
+    });
+    child.on("error", reject);
+    child.on("close", (code) => {
+      if (code !== 0) {
+        return reject(new Error(error.trim() || `auto_trim.py exited with code ${code}`));
+      }
+      try {
+        resolve(JSON.parse(output));
+      } catch (e) {
+        reject(e as Error);
+      }
+    });
+  }).finally(() => inFlight.delete(videoPath));
+
+  inFlight.set(videoPath, analysis);
+  return analysis;
+}
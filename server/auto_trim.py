@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Automatic lifting-segment detection for trim_video.py
+
+ffmpeg decodes the video at low resolution and low frame rate into raw
+grayscale frames on a pipe; NumPy differences consecutive frames in blocks
+to get a per-frame motion energy and to spot scene changes (camera cuts or
+big camera moves). Stretches where motion stays clearly above the clip's
+own noise floor become candidate segments, each with a confidence score.
+
+The proposals use the same {"t_in", "t_out"} fields as the batch trimmer, so
+to_batch_segments() output can be fed straight to trim_video.py --batch.
+"""
+import sys
+import os
+import json
+import time
+import subprocess
+import numpy as np
+from video_utils import get_video_info
+
+ANALYSIS_FPS = 5
+ANALYSIS_WIDTH = 160
+# Frames are diffed this many at a time, bounding memory on long clips
+BLOCK_FRAMES = 256
+
+# A pixel counts as moving when it changes by more than this (0-255 scale)
+PIXEL_THRESHOLD = 12
+# Mean absolute difference above which a frame pair is a scene change
+SCENE_CHANGE_THRESHOLD = 40.0
+
+SMOOTH_SECONDS = 1.0
+MIN_SEGMENT_SECONDS = 2.0
+MERGE_GAP_SECONDS = 1.5
+PAD_SECONDS = 0.75
+
+
+def _analysis_size(info, width=ANALYSIS_WIDTH):
+    video = info.get("video") or {}
+    src_w, src_h = video.get("width") or 16, video.get("height") or 9
+    height = max(2, int(round(width * src_h / src_w / 2)) * 2)
+    return width, height
+
+
+def iter_frame_blocks(video_path, width, height, fps=ANALYSIS_FPS, block=BLOCK_FRAMES):
+    """Yield uint8 arrays of shape (n, height, width) decoded by ffmpeg at low res/fps"""
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        # Cheap decoding: quality of individual frames barely matters here
+        '-threads', '0', '-skip_loop_filter', 'all', '-flags2', 'fast',
+        '-i', video_path,
+        '-an', '-vf', f"fps={fps},scale={width}:{height}:flags=fast_bilinear,format=gray",
+        '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1'
+    ]
+    frame_size = width * height
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            data = proc.stdout.read(frame_size * block)
+            count = len(data) // frame_size
+            if count:
+                yield np.frombuffer(data[:count * frame_size], dtype=np.uint8).reshape(count, height, width)
+            if len(data) < frame_size * block:
+                break
+        proc.wait()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+
+def motion_profile(blocks):
+    """
+    Per frame-pair motion energy (fraction of moving pixels) and mean absolute
+    difference, computed block by block with the last frame carried over.
+    """
+    energy, mad = [], []
+    previous = None
+    frames = 0
+    for block in blocks:
+        frames += len(block)
+        stack = block if previous is None else np.concatenate([previous[None], block])
+        if len(stack) > 1:
+            diff = np.abs(stack[1:].astype(np.int16) - stack[:-1].astype(np.int16))
+            energy.append((diff > PIXEL_THRESHOLD).mean(axis=(1, 2)))
+            mad.append(diff.mean(axis=(1, 2)))
+        previous = block[-1]
+    if not energy:
+        return np.zeros(0), np.zeros(0), frames
+    return np.concatenate(energy), np.concatenate(mad), frames
+
+
+def _runs(mask):
+    """(start, end) index pairs of consecutive True values, end exclusive"""
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def detect_segments(energy, mad, fps, duration):
+    """Turn the motion profile into [{"t_in", "t_out", "confidence", "motion"}]"""
+    if len(energy) < 2:
+        return []
+
+    window = max(1, int(round(SMOOTH_SECONDS * fps)))
+    smoothed = np.convolve(energy, np.ones(window) / window, mode='same')
+    floor, peak = np.percentile(smoothed, 20), np.percentile(smoothed, 95)
+    if peak - floor < 1e-3:
+        # Flat clip: no part moves clearly more than the rest
+        return []
+    threshold = floor + 0.35 * (peak - floor)
+    active = smoothed > threshold
+
+    # Scene changes split segments so one proposal never spans a camera cut
+    cuts = set(np.flatnonzero(mad > SCENE_CHANGE_THRESHOLD).tolist())
+    active[list(cuts)] = False
+
+    # Bridge short pauses (re-racking, a breath between reps) not at a cut
+    runs = _runs(active)
+    gap = int(round(MERGE_GAP_SECONDS * fps))
+    merged = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] <= gap and not any(merged[-1][1] <= c < start for c in cuts):
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    kept = [(start, end) for start, end in merged if (end - start) / fps >= MIN_SEGMENT_SECONDS]
+    # Pair i spans frames i and i + 1, so pairs [start, end) span frames start
+    # to end, i.e. start / fps to end / fps seconds in
+    bounds = [(start / fps, end / fps) for start, end in kept]
+
+    segments = []
+    for i, (start, end) in enumerate(kept):
+        lo, hi = bounds[i]
+        # Padding stops halfway to the neighbouring proposals, so none overlap
+        t_in = max(0.0, lo - PAD_SECONDS, (bounds[i - 1][1] + lo) / 2 if i > 0 else 0.0)
+        t_out = min(duration, hi + PAD_SECONDS, (hi + bounds[i + 1][0]) / 2 if i + 1 < len(bounds) else duration)
+        level = float(smoothed[start:end].mean())
+        contrast = min(1.0, max(0.0, (level - floor) / (peak - floor)))
+        coverage = float(active[start:end].mean())
+        segments.append({
+            "t_in": round(float(t_in), 2),
+            "t_out": round(float(t_out), 2),
+            "confidence": round(float(0.6 * contrast + 0.4 * coverage), 3),
+            "motion": round(level, 4),
+        })
+    return segments
+
+
+def analyze(video_path, fps=ANALYSIS_FPS, width=ANALYSIS_WIDTH):
+    """Propose lifting segments for a video"""
+    started = time.perf_counter()
+    info = get_video_info(video_path)
+    frame_w, frame_h = _analysis_size(info, width)
+    energy, mad, frames = motion_profile(iter_frame_blocks(video_path, frame_w, frame_h, fps))
+    duration = info.get("duration") or frames / fps
+    return {
+        "duration": duration,
+        "fps": fps,
+        "frames": frames,
+        "segments": detect_segments(energy, mad, fps, duration),
+        "analysisMs": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def to_batch_segments(segments, output_dir, prefix, min_confidence=0.0):
+    """trim_video.py --batch input for the proposals at or above min_confidence"""
+    chosen = [seg for seg in segments if seg["confidence"] >= min_confidence]
+    return [
+        {"t_in": seg["t_in"], "t_out": seg["t_out"],
+         "output": os.path.join(output_dir, f"{prefix}_{i + 1}_trimmed.mp4")}
+        for i, seg in enumerate(chosen)
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Propose lifting segments in a video")
+    arg_parser.add_argument("video")
+    arg_parser.add_argument("--fps", type=float, default=ANALYSIS_FPS)
+    arg_parser.add_argument("--width", type=int, default=ANALYSIS_WIDTH)
+    arg_parser.add_argument("--batch-dir", help="Print trim_video.py --batch segments writing into this directory")
+    arg_parser.add_argument("--min-confidence", type=float, default=0.0)
+    args = arg_parser.parse_args()
+
+    try:
+        result = analyze(args.video, args.fps, args.width)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        print(f"Error: {getattr(e, 'stderr', None) or e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.batch_dir:
+        prefix = os.path.splitext(os.path.basename(args.video))[0]
+        print(json.dumps(to_batch_segments(result["segments"], args.batch_dir, prefix, args.min_confidence)))
+    else:
+        print(json.dumps(result))
@@ -0,0 +1,166 @@
+import crypto from "crypto";
+import path from "path";
+import fs from "fs";
+import type { StorageEngine } from "multer";
+import { removeVideoInfo } from "./video-info";
+import { previewQueue } from "./video-previews";
+
+// Content-addressed store for uploaded videos. An upload is hashed (SHA-256)
+// while it streams to a temp file, then moved to blobs/<hash><ext> - or
+// dropped when that blob already exists. Each video_uploads row pointing at a
+// blob is one reference (counted in blobs/refs.json), and the blob is only
+// unlinked when the last one is released, together with its probe sidecar and
+// previews. Those are keyed by file name, so duplicates reuse them as well.
+
+const BLOB_SUBDIR = "blobs";
+
+// Extra fields the blob storage engine sets on req.file
+export interface BlobInfo {
+  hash: string;
+  deduplicated: boolean;
+}
+
+// Extension kept on blob names so static serving sends the right type
+export function blobExtension(originalName: string): string {
+  return path.extname(originalName).toLowerCase().replace(/[^a-z0-9.]/g, "").slice(0, 8);
+}
+
+class BlobStore {
+  private blobDir: string;
+  private tmpDir: string;
+  private refsPath: string;
+  private refs: Record<string, number>;
+  private saving: Promise<void> = Promise.resolve();
+
+  constructor(private uploadDir: string) {
+    this.blobDir = path.join(uploadDir, BLOB_SUBDIR);
+    this.tmpDir = path.join(this.blobDir, "tmp");
+    this.refsPath = path.join(this.blobDir, "refs.json");
+    fs.mkdirSync(this.tmpDir, { recursive: true });
+    this.refs = this.loadRefs();
+  }
+
+  // Temp file on the same filesystem as the blobs, so commit() can rename it
+  stagingPath(name: string): string {
+    return path.join(this.tmpDir, name);
+  }
+
+  filePath(filename: string): string {
+    return path.join(this.uploadDir, filename);
+  }
+
+  references(filename: string): number {
+    return this.refs[filename] ?? 0;
+  }
+
+  // Move a hashed temp file into the store (unless the blob exists) and take
+  // a reference to the blob
+  async commit(tmpPath: string, hash: string, ext: string): Promise<{ filename: string; deduplicated: boolean }> {
+    const filename = `${BLOB_SUBDIR}/${hash}${ext}`;
+    const blobPath = path.join(this.uploadDir, filename);
+    // Referenced before any await, so a concurrent release cannot unlink it
+    this.refs[filename] = this.references(filename) + 1;
+    this.saveRefs();
+    try {
+      const deduplicated = await fs.promises.stat(blobPath).then(() => true, () => false);
+      if (deduplicated) {
+        await fs.promises.unlink(tmpPath);
+      } else {
+        await fs.promises.rename(tmpPath, blobPath);
+      }
+      return { filename, deduplicated };
+    } catch (error) {
+      this.release(filename);
+      throw error;
+    }
+  }
+
+  // Drop one reference. Returns true when nothing uses the file any more and
+  // it has been removed with its sidecar and previews. Files from before the
+  // store count as one reference.
+  release(filename: string): boolean {
+    const remaining = (this.refs[filename] ?? 1) - 1;
+    if (remaining > 0) {
+      this.refs[filename] = remaining;
+      this.saveRefs();
+      return false;
+    }
+    if (filename in this.refs) {
+      delete this.refs[filename];
+      this.saveRefs();
+    }
+    const filePath = path.join(this.uploadDir, filename);
+    try {
+      fs.unlinkSync(filePath);
+    } catch (error) {
+      console.warn("Could not delete video file:", (error as Error).message);
+    }
+    removeVideoInfo(filePath);
+    previewQueue.remove(filePath);
+    return true;
+  }
+
+  // multer storage engine hashing each file as it is written
+  storageEngine(): StorageEngine {
+    return {
+      _handleFile: (req, file, cb) => {
+        const tmpPath = this.stagingPath(crypto.randomUUID());
+        const hash = crypto.createHash("sha256");
+        const out = fs.createWriteStream(tmpPath);
+        let size = 0;
+        let failed = false;
+        const fail = (error: Error) => {
+          if (failed) return;
+          failed = true;
+          out.destroy();
+          fs.unlink(tmpPath, () => {});
+          cb(error);
+        };
+
+        file.stream.on("data", (chunk: Buffer) => {
+          hash.update(chunk);
+          size += chunk.length;
+        });
+        file.stream.on("error", fail);
+        out.on("error", fail);
+        out.on("finish", () => {
+          if (failed) return;
+          const digest = hash.digest("hex");
+          this.commit(tmpPath, digest, blobExtension(file.originalname)).then(
+            ({ filename, deduplicated }) =>
+              cb(null, { filename, path: path.join(this.uploadDir, filename), size, hash: digest, deduplicated } as Partial<Express.Multer.File>),
+            fail,
+          );
+        });
+        file.stream.pipe(out);
+      },
+      _removeFile: (req, file, cb) => {
+        this.release(file.filename);
+        cb(null);
+      },
+    };
+  }
+
+  private loadRefs(): Record<string, number> {
+    try {
+      return JSON.parse(fs.readFileSync(this.refsPath, "utf-8"));
+    } catch {
+      return {};
+    }
+  }
+
+  // Writes are chained so refs.json always ends up with the latest counts
+  private saveRefs() {
+    this.saving = this.saving.then(async () => {
+      const tmpPath = `${this.refsPath}.tmp`;
+      try {
+        await fs.promises.writeFile(tmpPath, JSON.stringify(this.refs));
+        await fs.promises.rename(tmpPath, this.refsPath);
+      } catch (error) {
+        console.warn("Could not save blob references:", (error as Error).message);
+      }
+    });
+  }
+}
+
+export const blobStore = new BlobStore(path.join(process.cwd(), "uploads"));
@@ -0,0 +1,360 @@
+import crypto from "crypto";
+import fs from "fs";
+import { spawn } from "child_process";
+import type { Request } from "express";
+import { blobStore, blobExtension } from "./blob-store";
+
+// Resumable, offset-based uploads (a small subset of tus). The client creates
+// an upload with its total size, then PATCHes chunks that carry an
+// Upload-Offset header. After a dropped connection it asks for the current
+// offset (HEAD) and carries on from there instead of starting over. Chunks
+// are appended straight to a staging file and hashed as they arrive, and the
+// container headers are probed as soon as enough bytes are in, so the last
+// chunk only has to finish the hash before the file moves into the blob store.
+// A file the probe reads as something other than a video is refused (415)
+// and discarded without waiting for the rest of it.
+
+const MAX_UPLOAD_BYTES = 50 * 1024 * 1024; // Same limit as the multer uploads
+const UPLOAD_TTL_MS = parseInt(process.env.UPLOAD_TTL_MS || String(24 * 60 * 60 * 1000));
+const EARLY_PROBE_BYTES = 2 * 1024 * 1024;
+const SWEEP_INTERVAL_MS = 10 * 60 * 1000;
+const NOT_A_VIDEO = "Only video files are allowed";
+export const SUGGESTED_CHUNK_BYTES = 2 * 1024 * 1024;
+
+export type UploadPurpose = "video" | "trim";
+
+export interface UploadMeta {
+  id: string;
+  originalName: string;
+  mimeType: string;
+  size: number;
+  purpose: UploadPurpose;
+  fields: Record<string, string>;
+  offset: number;
+  createdAt: number;
+  updatedAt: number;
+}
+
+// What ffprobe could read from the first bytes (moov-first MP4s, WebM)
+export interface EarlyProbe {
+  duration: number | null;
+  format: string | null;
+  video: { codec: string; width: number; height: number } | null;
+}
+
+export interface CompletedUpload {
+  filename: string;
+  path: string;
+  originalName: string;
+  mimeType: string;
+  size: number;
+  hash: string;
+  deduplicated: boolean;
+  fields: Record<string, string>;
+  purpose: UploadPurpose;
+}
+
+interface UploadState extends UploadMeta {
+  hash: crypto.Hash | null;
+  hashedBytes: number;
+  busy: boolean;
+  probe: EarlyProbe | null;
+  probing: Promise<void> | null;
+  rejected: string | null;
+}
+
+export class UploadError extends Error {
+  constructor(public status: number, message: string, public offset?: number) {
+    super(message);
+  }
+}
+
+export class ChunkedUploads {
+  private uploads = new Map<string, UploadState>();
+  // Responses of finished uploads, for a client whose last PATCH response was lost
+  private finished = new Map<string, { size: number; result: unknown; finishedAt: number }>();
+
+  constructor() {
+    this.load();
+    setInterval(() => this.sweep(), SWEEP_INTERVAL_MS).unref();
+  }
+
+  create(upload: { originalName: string; mimeType: string; size: number; purpose: UploadPurpose; fields: Record<string, string> }): UploadMeta {
+    if (!upload.mimeType.startsWith("video/")) {
+      throw new UploadError(400, NOT_A_VIDEO);
+    }
+    if (upload.size <= 0 || upload.size > MAX_UPLOAD_BYTES) {
+      throw new UploadError(413, `Upload size must be between 1 and ${MAX_UPLOAD_BYTES} bytes`);
+    }
+    const now = Date.now();
+    const state: UploadState = {
+      id: crypto.randomUUID(),
+      ...upload,
+      offset: 0,
+      createdAt: now,
+      updatedAt: now,
+      hash: crypto.createHash("sha256"),
+      hashedBytes: 0,
+      busy: false,
+      probe: null,
+      probing: null,
+      rejected: null,
+    };
+    fs.writeFileSync(this.partPath(state.id), "");
+    this.uploads.set(state.id, state);
+    this.saveMeta(state);
+    return this.meta(state);
+  }
+
+  get(id: string): (UploadMeta & { probe: EarlyProbe | null }) | undefined {
+    const state = this.uploads.get(id);
+    return state && { ...this.meta(state), probe: state.probe };
+  }
+
+  finishedUpload(id: string): { size: number; result: unknown } | undefined {
+    return this.finished.get(id);
+  }
+
+  // Remember what the final chunk's response was
+  recordResult(id: string, size: number, result: unknown) {
+    this.finished.set(id, { size, result, finishedAt: Date.now() });
+  }
+
+  // Append the request body at `offset`. Resolves with the new offset, plus
+  // the stored blob once the last byte is in.
+  async append(id: string, offset: number, req: Request): Promise<{ offset: number; completed?: CompletedUpload }> {
+    const state = this.uploads.get(id);
+    if (!state) throw new UploadError(404, "Upload not found");
+    if (state.busy) throw new UploadError(409, "A chunk is already being written", state.offset);
+    if (offset !== state.offset) throw new UploadError(409, "Upload-Offset does not match", state.offset);
+    this.checkProbe(state);
+
+    state.busy = true;
+    try {
+      await this.writeChunk(state, req);
+    } finally {
+      state.busy = false;
+      state.updatedAt = Date.now();
+      this.saveMeta(state);
+    }
+
+    if (!state.probing && state.offset >= Math.min(EARLY_PROBE_BYTES, state.size)) {
+      state.probing = this.probeEarly(state);
+    }
+    if (state.offset < state.size) {
+      return { offset: state.offset };
+    }
+    // The last chunk waits for the probe, so a non-video never reaches the blob store
+    await state.probing;
+    this.checkProbe(state);
+    return { offset: state.offset, completed: await this.complete(state) };
+  }
+
+  private checkProbe(state: UploadState) {
+    if (state.rejected) {
+      this.discard(state);
+      throw new UploadError(415, state.rejected);
+    }
+  }
+
+  abort(id: string): boolean {
+    const state = this.uploads.get(id);
+    if (!state) return false;
+    this.discard(state);
+    return true;
+  }
+
+  private writeChunk(state: UploadState, req: Request): Promise<void> {
+    return new Promise((resolve, reject) => {
+      const out = fs.createWriteStream(this.partPath(state.id), { flags: "a" });
+      const remaining = state.size - state.offset;
+      let written = 0;
+      let tooLarge = false;
+
+      req.on("data", (chunk: Buffer) => {
+        if (tooLarge) return;
+        if (written + chunk.length > remaining) {
+          // Keep what fits; the rest is beyond the declared size
+          chunk = chunk.subarray(0, remaining - written);
+          tooLarge = true;
+        }
+        written += chunk.length;
+        state.hash?.update(chunk);
+        if (!out.write(chunk)) {
+          req.pause();
+          out.once("drain", () => req.resume());
+        }
+      });
+      // On a dropped connection everything received so far is kept, and the
+      // client resumes from the offset HEAD reports
+      let ended = false;
+      const done = () => {
+        if (ended) return;
+        ended = true;
+        out.end();
+      };
+      req.on("end", done);
+      req.on("close", done);
+      req.on("error", done);
+
+      out.on("error", reject);
+      out.on("finish", () => {
+        state.offset += written;
+        if (state.hash) state.hashedBytes += written;
+        if (tooLarge) {
+          reject(new UploadError(413, "Chunk goes past the declared upload size", state.offset));
+        } else {
+          resolve();
+        }
+      });
+    });
+  }
+
+  private async complete(state: UploadState): Promise<CompletedUpload> {
+    let digest: string;
+    if (state.hash && state.hashedBytes === state.size) {
+      digest = state.hash.digest("hex");
+    } else {
+      // The in-memory hash was lost in a restart: hash the staged file once
+      digest = await this.hashFile(this.partPath(state.id));
+    }
+    this.uploads.delete(state.id);
+    fs.unlink(this.metaPath(state.id), () => {});
+
+    const { filename, deduplicated } = await blobStore.commit(
+      this.partPath(state.id),
+      digest,
+      blobExtension(state.originalName),
+    );
+    return {
+      filename,
+      path: blobStore.filePath(filename),
+      originalName: state.originalName,
+      mimeType: state.mimeType,
+      size: state.size,
+      hash: digest,
+      deduplicated,
+      fields: state.fields,
+      purpose: state.purpose,
+    };
+  }
+
+  private hashFile(filePath: string): Promise<string> {
+    return new Promise((resolve, reject) => {
+      const hash = crypto.createHash("sha256");
+      fs.createReadStream(filePath)
+        .on("data", (chunk) => hash.update(chunk))
+        .on("error", reject)
+        .on("end", () => resolve(hash.digest("hex")));
+    });
+  }
+
+  // Container and stream headers from the first bytes, so the client can be
+  // told early whether the file is a usable video. A file is rejected when
+  // ffprobe reads it without finding a video stream, or cannot read it at all
+  // once every byte is in; without ffprobe nothing is decided.
+  private probeEarly(state: UploadState): Promise<void> {
+    const whole = state.offset >= state.size;
+    return new Promise((resolve) => {
+      const child = spawn("ffprobe", [
+        "-v", "error", "-show_format", "-show_streams", "-of", "json", this.partPath(state.id),
+      ]);
+      let output = "";
+      let started = true;
+      child.stdout.on("data", (data) => {
+        output += data.toString();
+      });
+      child.on("error", () => {
+        started = false;
+        resolve();
+      });
+      child.on("close", (code) => {
+        if (!started) return resolve();
+        try {
+          if (code !== 0) throw new Error(`ffprobe exited with code ${code}`);
+          const data = JSON.parse(output);
+          const video = (data.streams ?? []).find((s: any) => s.codec_type === "video");
+          const duration = parseFloat(data.format?.duration);
+          state.probe = {
+            duration: isNaN(duration) ? null : duration,
+            format: data.format?.format_name ?? null,
+            video: video ? { codec: video.codec_name, width: video.width, height: video.height } : null,
+          };
+          if (!video) state.rejected = NOT_A_VIDEO;
+        } catch {
+          // Headers not readable yet (moov at the end); the full probe runs on completion
+          if (whole) state.rejected = NOT_A_VIDEO;
+        }
+        resolve();
+      });
+    });
+  }
+
+  private discard(state: UploadState) {
+    this.uploads.delete(state.id);
+    fs.unlink(this.partPath(state.id), () => {});
+    fs.unlink(this.metaPath(state.id), () => {});
+  }
+
+  private sweep() {
+    const cutoff = Date.now() - UPLOAD_TTL_MS;
+    this.uploads.forEach((state) => {
+      if (!state.busy && state.updatedAt < cutoff) this.discard(state);
+    });
+    this.finished.forEach((upload, id) => {
+      if (upload.finishedAt < cutoff) this.finished.delete(id);
+    });
+  }
+
+  private partPath(id: string): string {
+    return blobStore.stagingPath(`${id}.part`);
+  }
+
+  private metaPath(id: string): string {
+    return blobStore.stagingPath(`${id}.upload.json`);
+  }
+
+  private meta(state: UploadState): UploadMeta {
+    const { hash: _hash, hashedBytes: _hashed, busy: _busy, probe: _probe, probing: _probing, rejected: _rejected, ...meta } = state;
+    return meta;
+  }
+
+  private saveMeta(state: UploadState) {
+    try {
+      fs.writeFileSync(this.metaPath(state.id), JSON.stringify(this.meta(state)));
+    } catch (error) {
+      console.warn("Could not save upload state:", (error as Error).message);
+    }
+  }
+
+  // Pick up unfinished uploads after a restart; the staged file is the
+  // source of truth for the offset
+  private load() {
+    let names: string[] = [];
+    try {
+      names = fs.readdirSync(blobStore.stagingPath("."));
+    } catch {
+      return;
+    }
+    for (const name of names.filter((n) => n.endsWith(".upload.json"))) {
+      try {
+        const meta: UploadMeta = JSON.parse(fs.readFileSync(blobStore.stagingPath(name), "utf-8"));
+        const offset = fs.statSync(this.partPath(meta.id)).size;
+        this.uploads.set(meta.id, {
+          ...meta,
+          offset,
+          hash: null,
+          hashedBytes: 0,
+          busy: false,
+          probe: null,
+          probing: null,
+          rejected: null,
+        });
+      } catch {
+        fs.unlink(blobStore.stagingPath(name), () => {});
+      }
+    }
+  }
+}
+
+export const chunkedUploads = new ChunkedUploads();
@@ -0,0 +1,25 @@
+import path from "path";
+import type { Request, Response } from "express";
+
+// Trimmed clips, with byte-range support so seeking in a player only fetches
+// the ranges it needs. A clip never changes once written, so it is cached
+// as immutable. Only *_trimmed.mp4 files directly in clipDir are served.
+
+export function clipHandler(clipDir: string) {
+  return (req: Request, res: Response) => {
+    const filename = path.basename(req.params.filename);
+    if (!filename.endsWith('_trimmed.mp4')) {
+      return res.status(404).json({ error: 'Clip not found' });
+    }
+    res.sendFile(path.join(clipDir, filename), {
+      acceptRanges: true,
+      immutable: true,
+      maxAge: '7d',
+      headers: { 'Content-Type': 'video/mp4' }
+    }, (err) => {
+      if (err && !res.headersSent) {
+        res.status(404).json({ error: 'Clip not found' });
+      }
+    });
+  };
+}
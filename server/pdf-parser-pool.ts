@@ -0,0 +1,265 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
+import readline from "readline";
+import type { Exercise, PDFPage } from "@shared/schema";
+
+// Pool of long-lived `precise_pdf_parser.py --serve` workers.
+// Keeps the Python interpreter and pdfplumber imports warm between uploads.
+// Each worker parses one document at a time (parsing is CPU-bound Python, so
+// more would only share one core); requests wait here for an idle worker, and
+// a worker whose request times out is killed and replaced.
+// PDF_PARSER_SCRIPT=enhanced_pdf_parser.py switches to the fallback-heavy parser,
+// whose tabula JVM then also stays alive inside each worker.
+// A document is either a path on disk or an in-memory upload, which goes to
+// the worker inline (base64). The worker only writes it to a temp file when it
+// has at least PDF_PARSER_PARALLEL_MIN_PAGES pages and is split across the
+// parser's page-parallel process pool. Parsed pages come
+// back in the compact row encoding of pdf_result_model.py and are expanded
+// into PDFPage objects here.
+
+const PARSER_SCRIPT = process.env.PDF_PARSER_SCRIPT || "precise_pdf_parser.py";
+const POOL_SIZE = parseInt(process.env.PDF_PARSER_WORKERS || "2");
+const REQUEST_TIMEOUT_MS = parseInt(process.env.PDF_PARSER_TIMEOUT_MS || "60000");
+
+interface PendingRequest {
+  onPage?: (page: any) => void;
+  resolve: (value: any) => void;
+  reject: (reason: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+interface ParserWorker {
+  process: ChildProcessWithoutNullStreams;
+  pending: Map<string, PendingRequest>;
+  busy: boolean;
+}
+
+export type PdfSource = string | Buffer;
+
+export interface ParseResponse {
+  result: any;
+  elapsedMs: number;
+}
+
+// Counters are per worker process; the on-disk footprint is shared
+function sumCacheStats(stats: Record<string, any>[]): Record<string, any> {
+  const hits = stats.reduce((sum, s) => sum + s.hits, 0);
+  const misses = stats.reduce((sum, s) => sum + s.misses, 0);
+  return {
+    hits,
+    misses,
+    evictions: stats.reduce((sum, s) => sum + s.evictions, 0),
+    hitRate: hits + misses ? hits / (hits + misses) : 0,
+    entries: stats[0].entries,
+    bytes: stats[0].bytes,
+    maxBytes: stats[0].maxBytes,
+  };
+}
+
+function sourcePayload(source: PdfSource): Record<string, string> {
+  const document = typeof source === "string" ? { path: source } : { data: source.toString("base64") };
+  return { ...document, encoding: "rows" };
+}
+
+type WeekRow = string[] | Record<string, string>;
+type ExerciseRow = [string, string, string, WeekRow, string?, string?, string?];
+type PageRow = [number, string, ExerciseRow[]];
+
+const EXTRA_FIELDS = ["scarico", "recupero", "note"] as const;
+
+function decodeExercise(row: ExerciseRow): Exercise {
+  const [id, name, setsReps, weekRow] = row;
+  const weeks: Exercise["weeks"] = {};
+  if (Array.isArray(weekRow)) {
+    weekRow.forEach((weight, i) => {
+      weeks[`settimana_${i + 1}`] = { weight };
+    });
+  } else {
+    for (const weekId of Object.keys(weekRow)) {
+      weeks[weekId] = { weight: weekRow[weekId] };
+    }
+  }
+  const exercise: Exercise = { id, name, setsReps, weeks };
+  EXTRA_FIELDS.forEach((field, i) => {
+    const value = row[4 + i];
+    if (value != null) exercise[field] = value;
+  });
+  return exercise;
+}
+
+export function decodePage(row: PageRow): PDFPage {
+  return { pageNumber: row[0], title: row[1], exercises: row[2].map(decodeExercise) };
+}
+
+export function decodeResult(result: any): any {
+  if (result?.encoding !== "rows") return result;
+  const { encoding: _encoding, ...rest } = result;
+  return { ...rest, pages: rest.pages.map(decodePage) };
+}
+
+class PdfParserPool {
+  private workers: ParserWorker[] = [];
+  // Requests waiting for an idle worker, oldest first
+  private waiting: Array<(worker: ParserWorker) => void> = [];
+  private nextRequestId = 1;
+
+  private startWorker(): ParserWorker {
+    const child = spawn("python3", [PARSER_SCRIPT, "--serve"]);
+    const worker: ParserWorker = { process: child, pending: new Map(), busy: false };
+
+    const lines = readline.createInterface({ input: child.stdout });
+    lines.on("line", (line) => {
+      let message: any;
+      try {
+        message = JSON.parse(line);
+      } catch (e) {
+        console.error("PDF parser worker sent invalid JSON:", line);
+        return;
+      }
+      if (message.event === "ready") return;
+
+      const request = worker.pending.get(String(message.id));
+      if (!request) return;
+      if (message.event === "page") {
+        request.onPage?.(message.page);
+        return;
+      }
+      worker.pending.delete(String(message.id));
+      clearTimeout(request.timer);
+      request.resolve(message);
+    });
+
+    child.stdin.on("error", (err) => {
+      console.error("PDF parser worker stdin error:", err.message);
+    });
+
+    child.stderr.on("data", (data: Buffer) => {
+      console.error("PDF parser worker:", data.toString().trim());
+    });
+
+    child.on("error", (err) => {
+      console.error("Could not start PDF parser worker:", err.message);
+      this.retire(worker, err);
+    });
+
+    child.on("exit", (code) => {
+      console.warn(`PDF parser worker ${child.pid} exited with code ${code}`);
+      this.retire(worker, new Error("PDF parser worker exited"));
+    });
+
+    this.workers.push(worker);
+    return worker;
+  }
+
+  private retire(worker: ParserWorker, reason: Error) {
+    if (!this.workers.includes(worker)) return;
+    this.workers = this.workers.filter((w) => w !== worker);
+    worker.pending.forEach((request) => {
+      clearTimeout(request.timer);
+      request.reject(reason);
+    });
+    worker.pending.clear();
+    // The replacement takes over the waiting requests
+    this.handOut();
+  }
+
+  private ensureWorkers() {
+    while (this.workers.length < POOL_SIZE) {
+      this.startWorker();
+    }
+  }
+
+  private acquire(): Promise<ParserWorker> {
+    return new Promise((resolve) => {
+      this.waiting.push(resolve);
+      this.handOut();
+    });
+  }
+
+  private release(worker: ParserWorker) {
+    worker.busy = false;
+    this.handOut();
+  }
+
+  // Give idle workers to waiting requests, starting workers up to POOL_SIZE
+  private handOut() {
+    if (!this.waiting.length) return;
+    this.ensureWorkers();
+    while (this.waiting.length) {
+      const worker = this.workers.find((w) => !w.busy);
+      if (!worker) return;
+      worker.busy = true;
+      this.waiting.shift()!(worker);
+    }
+  }
+
+  private async run(payload: Record<string, any>, onPage?: (page: any) => void): Promise<any> {
+    const worker = await this.acquire();
+    try {
+      return await this.send(worker, payload, onPage);
+    } finally {
+      this.release(worker);
+    }
+  }
+
+  private send(
+    worker: ParserWorker,
+    payload: Record<string, any>,
+    onPage?: (page: any) => void,
+  ): Promise<any> {
+    const id = (this.nextRequestId++).toString();
+    if (!this.workers.includes(worker)) {
+      return Promise.reject(new Error("PDF parser worker exited"));
+    }
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        worker.pending.delete(id);
+        reject(new Error(`PDF parser request timed out after ${REQUEST_TIMEOUT_MS}ms`));
+        // A parse that never finishes would hold the worker forever, and a late
+        // reply could not be matched any more: replace the process
+        console.warn(`PDF parser worker ${worker.process.pid} timed out; restarting it`);
+        worker.process.kill();
+        this.retire(worker, new Error("PDF parser worker was restarted after a timeout"));
+      }, REQUEST_TIMEOUT_MS);
+
+      worker.pending.set(id, { onPage, resolve, reject, timer });
+      worker.process.stdin.write(JSON.stringify({ id, ...payload }) + "\n");
+    });
+  }
+
+  async parse(source: PdfSource): Promise<ParseResponse> {
+    const message = await this.run(sourcePayload(source));
+    return { result: decodeResult(message.result), elapsedMs: message.elapsedMs };
+  }
+
+  // Streams each parsed day to onPage as soon as the worker emits it;
+  // the resolved result only carries the summary fields.
+  async parseStream(source: PdfSource, onPage: (page: any) => void): Promise<ParseResponse> {
+    const message = await this.run({ ...sourcePayload(source), stream: true }, (row) => onPage(decodePage(row)));
+    return { result: message.result, elapsedMs: message.elapsedMs };
+  }
+
+  // Parse-result cache counters summed across all workers; a busy worker
+  // answers once its current document is done
+  async cacheStats(): Promise<Record<string, any>> {
+    this.ensureWorkers();
+    const replies = await Promise.all(this.workers.map((w) => this.send(w, { op: "stats" })));
+    const stats = replies.map((r) => r.cache);
+    if (!stats.length || !stats[0].enabled) {
+      return { enabled: false };
+    }
+
+    const summary: Record<string, any> = { enabled: true, ...sumCacheStats(stats) };
+    if (stats[0].pages) {
+      summary.pages = sumCacheStats(stats.map((s) => s.pages));
+    }
+    return summary;
+  }
+
+  shutdown() {
+    this.workers.forEach((w) => w.process.stdin.end());
+    this.workers = [];
+  }
+}
+
+export const pdfParserPool = new PdfParserPool();
@@ -1,7 +1,17 @@
-import type { Express } from "express";
+import type { Express, Response } from "express";
 import express from "express";
 import { createServer, type Server } from "http";
 import { storage } from "./storage";
+import { pdfParserPool } from "./pdf-parser-pool";
+import { getVideoInfo, probeVideo, readVideoInfo } from "./video-info";
+import { blobStore, type BlobInfo } from "./blob-store";
+import { chunkedUploads, UploadError, SUGGESTED_CHUNK_BYTES, type CompletedUpload } from "./chunked-upload";
+import { previewQueue } from "./video-previews";
+import { detectSegments } from "./auto-trim";
+import { trimQueue, TrimQueueFullError, TRIM_MODES, type TrimJob, type TrimJobSegment, type TrimMode } from "./trim-queue";
+import { trimCache } from "./trim-cache";
+import { clipHandler } from "./clips";
+import { telegramDispatcher } from "./telegram-dispatch";
 import multer from "multer";
 import path from "path";
 import fs from "fs";
@@ -15,76 +25,224 @@ if (!fs.existsSync(uploadDir)) {
   fs.mkdirSync(uploadDir, { recursive: true });
 }
 
-const upload = multer({
-  storage: multer.diskStorage({
-    destination: uploadDir,
-    filename: (req, file, cb) => {
-      const timestamp = Date.now();
-      const sanitizedName = file.originalname.replace(/[^a-zA-Z0-9.-]/g, '_');
-      cb(null, `${timestamp}_${sanitizedName}`);
+const uploadFileFilter: multer.Options['fileFilter'] = (req, file, cb) => {
+  if (file.fieldname === 'pdf') {
+    if (file.mimetype === 'application/pdf') {
+      cb(null, true);
+    } else {
+      cb(new Error('Only PDF files are allowed'));
+    }
+  } else if (file.fieldname === 'video' || file.fieldname === 'file') {
+    if (file.mimetype.startsWith('video/')) {
+      cb(null, true);
+    } else {
+      cb(new Error('Only video files are allowed'));
     }
-  }),
+  } else {
+    cb(new Error('Unknown field'));
+  }
+};
+
+// PDFs are only parsed, never served back: keep them in memory and hand the
+// buffer straight to the parser workers instead of a file in uploads/
+const pdfUpload = multer({
+  storage: multer.memoryStorage(),
   limits: {
     fileSize: 50 * 1024 * 1024, // 50MB max
   },
-  fileFilter: (req, file, cb) => {
-    if (file.fieldname === 'pdf') {
-      if (file.mimetype === 'application/pdf') {
-        cb(null, true);
-      } else {
-        cb(new Error('Only PDF files are allowed'));
-      }
-    } else if (file.fieldname === 'video') {
-      if (file.mimetype.startsWith('video/')) {
-        cb(null, true);
-      } else {
-        cb(new Error('Only video files are allowed'));
-      }
-    } else {
-      cb(new Error('Unknown field'));
-    }
+  fileFilter: uploadFileFilter
+});
+
+// Lift videos and trim sources go to the content-addressed blob store, so
+// re-uploading the same file takes no extra disk and skips probing, preview
+// generation and trims already in the trim cache
+const blobUpload = multer({
+  storage: blobStore.storageEngine(),
+  limits: {
+    fileSize: 50 * 1024 * 1024, // 50MB max
+  },
+  fileFilter: uploadFileFilter
+});
+
+const trimSegmentsSchema = z.array(z.object({
+  t_in: z.coerce.number().min(0),
+  t_out: z.coerce.number().min(0),
+}).refine((seg) => seg.t_in < seg.t_out)).min(1).max(50);
+
+type TrimSegment = z.infer<typeof trimSegmentsSchema>[number];
+
+// Multipart fields arrive as strings, so the batch is sent as a JSON array
+function parseTrimSegments(raw: unknown): TrimSegment[] | null {
+  try {
+    const parsed = trimSegmentsSchema.safeParse(typeof raw === 'string' ? JSON.parse(raw) : raw);
+    return parsed.success ? parsed.data : null;
+  } catch {
+    return null;
   }
+}
+
+// Client-facing view of a trim job: output file names instead of server paths
+function trimJobView(job: TrimJob & { position?: number }) {
+  const report = job.result?.segments ?? [];
+  return {
+    id: job.id,
+    status: job.status,
+    progress: job.progress,
+    position: job.position,
+    priority: job.priority,
+    mode: job.mode,
+    waitMs: (job.startedAt ?? Date.now()) - job.createdAt,
+    createdAt: job.createdAt,
+    startedAt: job.startedAt,
+    finishedAt: job.finishedAt,
+    segments: job.segments.map((seg, i) => ({
+      t_in: seg.t_in,
+      t_out: seg.t_out,
+      path: report[i]?.ok ? path.basename(seg.output) : null,
+      url: report[i]?.ok ? `/api/clips/${path.basename(seg.output)}` : null,
+      ok: report[i]?.ok,
+      error: report[i]?.error,
+    })),
+    error: job.error,
+  };
+}
+
+const createUploadSchema = z.object({
+  filename: z.string().min(1).max(255),
+  size: z.coerce.number().int().positive(),
+  mimeType: z.string(),
+  purpose: z.enum(['video', 'trim']).default('video'),
+  sessionId: z.coerce.string().optional(),
+  exerciseId: z.string().optional(),
+  weekId: z.string().optional(),
 });
 
+// Probe a newly stored video in the background, so trims and /info read the
+// cached index, and queue its previews. A duplicate blob already has both.
+async function processUploadedVideo(filePath: string, deduplicated: boolean) {
+  if (!deduplicated || !(await readVideoInfo(filePath))) {
+    probeVideo(filePath).catch((err) => {
+      console.warn("Could not probe uploaded video:", err.message);
+    });
+  }
+  const previews = await previewQueue.state(filePath);
+  if (previews.status === 'missing' || previews.status === 'failed') {
+    previewQueue.enqueue(filePath);
+  }
+}
+
+// What the last chunk of a resumable upload answers: the same body as
+// /api/upload-video for videos, the source hash to pass to /api/manual-trim
+// for trim sources
+async function finishChunkedUpload(upload: CompletedUpload) {
+  if (upload.purpose === 'trim') {
+    trimCache.retainSource(upload.hash, upload.filename);
+    return { source: upload.hash, deduplicated: upload.deduplicated };
+  }
+
+  const videoUpload = await storage.createVideoUpload({
+    sessionId: parseInt(upload.fields.sessionId),
+    exerciseId: upload.fields.exerciseId,
+    weekId: upload.fields.weekId,
+    filename: upload.filename,
+    originalName: upload.originalName,
+    mimeType: upload.mimeType,
+    size: upload.size
+  });
+  await processUploadedVideo(upload.path, upload.deduplicated);
+  return {
+    videoId: videoUpload.id,
+    filename: videoUpload.filename,
+    originalName: videoUpload.originalName,
+    hash: upload.hash,
+    deduplicated: upload.deduplicated
+  };
+}
+
+// A clip served from the trim cache, in the same shape as a job segment
+function cachedClipView(t_in: number, t_out: number, output: string) {
+  const file = path.basename(output);
+  return { t_in, t_out, path: file, url: `/api/clips/${file}`, ok: true, cached: true };
+}
+
+// Same responses /api/manual-trim sent before trims went through the job
+// queue. Segments found in the trim cache are filled in from there, and job
+// is null when every segment was a cache hit.
+function sendTrimResult(res: Response, trim: {
+  job: TrimJob | null;
+  outputs: TrimJobSegment[];
+  cached: (string | null)[];
+  batch: boolean;
+  source: string;
+  autoTrim?: { confidence: number }[];
+}) {
+  const { job, outputs, cached, batch, source, autoTrim } = trim;
+  if (job?.status === 'cancelled') {
+    return res.status(409).json({ error: 'Trim job cancelled', jobId: job.id });
+  }
+  if (job && job.status !== 'done') {
+    console.error('Trim error:', job.error);
+    return res.status(500).json({ error: 'Video trimming failed', details: job.error, jobId: job.id });
+  }
+
+  const trimmedSegments = job ? trimJobView(job).segments : [];
+  let next = 0;
+  const segments = outputs.map((seg, i) => {
+    const view = cached[i] ? cachedClipView(seg.t_in, seg.t_out, cached[i]!) : { ...trimmedSegments[next++], cached: false };
+    return autoTrim ? { ...view, ...autoTrim[i] } : view;
+  });
+
+  if (!batch) {
+    return res.json({
+      path: segments[0].path,
+      url: segments[0].url,
+      status: 'OK',
+      message: 'Video trimmed successfully',
+      jobId: job?.id,
+      source,
+      cached: segments[0].cached
+    });
+  }
+
+  const trimmed = segments.filter((seg) => seg.ok).length;
+  const elapsedMs = job?.result.elapsedMs ?? 0;
+  console.log(`Trimmed ${trimmed}/${segments.length} segments (${cached.filter(Boolean).length} cached) in ${elapsedMs}ms`);
+  res.json({
+    status: trimmed === segments.length ? 'OK' : 'PARTIAL',
+    message: `${trimmed} of ${segments.length} segments trimmed`,
+    segments,
+    elapsedMs,
+    jobId: job?.id,
+    source
+  });
+}
+
 export async function registerRoutes(app: Express): Promise<Server> {
   
   // Upload PDF and parse
-  app.post("/api/upload-pdf", upload.single('pdf'), async (req, res) => {
+  app.post("/api/upload-pdf", pdfUpload.single('pdf'), async (req, res) => {
     try {
       if (!req.file) {
         return res.status(400).json({ error: "No PDF file uploaded" });
       }
 
-      // Parse PDF using Python script
-      const { spawn } = await import('child_process');
-      const pdfData: any = await new Promise((resolve, reject) => {
-        // Try the main parser first, fallback to simple parser if it fails
-        const pythonProcess = spawn('python3', ['precise_pdf_parser.py', req.file?.path || '']);
-        let output = '';
-        let errorOutput = '';
-
-        pythonProcess.stdout.on('data', (data: any) => {
-          output += data.toString();
-        });
-
-        pythonProcess.stderr.on('data', (data: any) => {
-          errorOutput += data.toString();
-        });
+      // Parse PDF using the warm Python worker pool
+      const { result: pdfData, elapsedMs } = await pdfParserPool.parse(req.file.buffer);
+      console.log(`PDF parsed in ${elapsedMs}ms (${pdfData?.skipped_pages ?? 0} pages skipped by pre-filter)`);
+      if (pdfData?.reused_pages?.length) {
+        console.log(`Reused ${pdfData.reused_pages.length} unchanged pages, re-extracted ${pdfData.recomputed_pages?.length ?? 0}`);
+      }
+      if (pdfData?.memory_limited) {
+        const { limit_mb, rss_mb, stopped_after_page } = pdfData.memory_limited;
+        console.warn(`PDF parser hit its ${limit_mb}MB memory ceiling (${rss_mb}MB), stopped after page ${stopped_after_page}`);
+      }
+      if (pdfData?.metrics) {
+        console.log('PDF parser metrics:', JSON.stringify(pdfData.metrics.stages), pdfData.metrics.counters ?? {});
+      }
 
-        pythonProcess.on('close', (code: any) => {
-          if (code === 0) {
-            try {
-              const result = JSON.parse(output);
-              resolve(result);
-            } catch (e) {
-              reject(new Error('Errore nel parsing del JSON dal parser PDF'));
-            }
-          } else {
-            console.error('Python PDF parser error:', errorOutput);
-            reject(new Error('Errore durante l\'analisi del PDF'));
-          }
-        });
-      });
+      if (pdfData && pdfData.success === false) {
+        console.error('Python PDF parser error:', pdfData.error);
+      }
       
       if (!pdfData || !pdfData.pages || pdfData.pages.length === 0) {
         return res.status(400).json({ 
@@ -110,6 +268,62 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  // Upload PDF and stream parsed days back as NDJSON while the parser runs
+  app.post("/api/upload-pdf/stream", pdfUpload.single('pdf'), async (req, res) => {
+    if (!req.file) {
+      return res.status(400).json({ error: "No PDF file uploaded" });
+    }
+
+    res.setHeader('Content-Type', 'application/x-ndjson');
+    res.setHeader('Cache-Control', 'no-cache');
+    res.flushHeaders();
+
+    const writeLine = (message: any) => res.write(JSON.stringify(message) + '\n');
+
+    try {
+      const pages: any[] = [];
+      const { result, elapsedMs } = await pdfParserPool.parseStream(req.file.buffer, (page) => {
+        pages.push(page);
+        writeLine({ type: 'page', page });
+      });
+      console.log(`PDF streamed in ${elapsedMs}ms (${pages.length} days)`);
+
+      if (pages.length === 0) {
+        if (result && result.success === false) {
+          console.error('Python PDF parser error:', result.error);
+        }
+        writeLine({
+          type: 'error',
+          error: "Nessuna tabella di esercizi trovata nel PDF. Assicurati che il PDF contenga tabelle di allenamento con esercizi, serie e ripetizioni."
+        });
+        return res.end();
+      }
+
+      const session = await storage.createWorkoutSession({
+        pdfFilename: req.file.originalname,
+        exercises: [],
+        workoutData: { ...result, pages }
+      });
+
+      writeLine({ type: 'done', sessionId: session.id, filename: req.file.originalname });
+      res.end();
+    } catch (error) {
+      console.error("PDF stream upload error:", error);
+      writeLine({ type: 'error', error: "Errore durante l'elaborazione del PDF" });
+      res.end();
+    }
+  });
+
+  // PDF parse-result cache hit/miss counters
+  app.get("/api/pdf-cache/stats", async (req, res) => {
+    try {
+      res.json(await pdfParserPool.cacheStats());
+    } catch (error) {
+      console.error("PDF cache stats error:", error);
+      res.status(500).json({ error: "Errore nel recupero delle statistiche della cache" });
+    }
+  });
+
   // Select day and get exercises
   app.post("/api/select-day", async (req, res) => {
     try {
@@ -158,68 +372,195 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
-  // Manual video trim route
-  app.post('/api/manual-trim', upload.single('file'), async (req, res) => {
+  // Resumable uploads: POST creates one, HEAD/GET report how many bytes have
+  // arrived, PATCH appends a chunk at its Upload-Offset and DELETE aborts.
+  app.post("/api/uploads", (req, res) => {
+    const parsed = createUploadSchema.safeParse(req.body);
+    if (!parsed.success) {
+      return res.status(400).json({ error: "Invalid upload parameters" });
+    }
+    const { filename, size, mimeType, purpose, sessionId, exerciseId, weekId } = parsed.data;
+    if (purpose === 'video' && (!sessionId || isNaN(parseInt(sessionId)) || !exerciseId || !weekId)) {
+      return res.status(400).json({ error: "Missing required fields: sessionId, exerciseId, weekId" });
+    }
+
     try {
-      if (!req.file) {
-        return res.status(400).json({ error: 'No file uploaded' });
+      const fields = purpose === 'video' ? { sessionId: sessionId!, exerciseId: exerciseId!, weekId: weekId! } : {};
+      const upload = chunkedUploads.create({ originalName: filename, mimeType, size, purpose, fields });
+      res.status(201)
+        .location(`/api/uploads/${upload.id}`)
+        .json({ ...upload, chunkSize: SUGGESTED_CHUNK_BYTES });
+    } catch (error) {
+      if (error instanceof UploadError) {
+        return res.status(error.status).json({ error: error.message });
       }
+      console.error("Create upload error:", error);
+      res.status(500).json({ error: "Errore durante il caricamento del video" });
+    }
+  });
+
+  app.head("/api/uploads/:id", (req, res) => {
+    const upload = chunkedUploads.get(req.params.id);
+    const finished = chunkedUploads.finishedUpload(req.params.id);
+    if (!upload && !finished) {
+      return res.status(404).end();
+    }
+    res.set({
+      'Upload-Offset': String(upload ? upload.offset : finished!.size),
+      'Upload-Length': String(upload ? upload.size : finished!.size),
+      'Cache-Control': 'no-store'
+    }).status(200).end();
+  });
 
-      const { t_in, t_out } = req.body;
-      const tIn = parseFloat(t_in);
-      const tOut = parseFloat(t_out);
+  app.get("/api/uploads/:id", (req, res) => {
+    const upload = chunkedUploads.get(req.params.id);
+    if (upload) {
+      return res.set('Cache-Control', 'no-store').json({ ...upload, complete: false });
+    }
+    const finished = chunkedUploads.finishedUpload(req.params.id);
+    if (finished) {
+      return res.json({ offset: finished.size, size: finished.size, complete: true, ...(finished.result as object) });
+    }
+    res.status(404).json({ error: "Upload not found" });
+  });
 
-      if (isNaN(tIn) || isNaN(tOut) || tIn >= tOut || tIn < 0 || tOut < 0) {
-        return res.status(400).json({ error: 'Invalid trim parameters' });
+  // The body is the raw chunk (Content-Type: application/offset+octet-stream),
+  // streamed to disk as it arrives
+  app.patch("/api/uploads/:id", async (req, res) => {
+    const offset = parseInt(req.get('Upload-Offset') ?? '');
+    if (isNaN(offset) || offset < 0) {
+      return res.status(400).json({ error: "Missing or invalid Upload-Offset header" });
+    }
+
+    try {
+      const { offset: newOffset, completed } = await chunkedUploads.append(req.params.id, offset, req);
+      res.set('Upload-Offset', String(newOffset));
+      if (!completed) {
+        return res.json({ offset: newOffset, complete: false });
+      }
+      const result = await finishChunkedUpload(completed);
+      chunkedUploads.recordResult(req.params.id, completed.size, result);
+      res.json({ offset: newOffset, size: completed.size, complete: true, ...result });
+    } catch (error) {
+      if (error instanceof UploadError) {
+        if (error.offset !== undefined) {
+          res.set('Upload-Offset', String(error.offset));
+        }
+        return res.status(error.status).json({ error: error.message, offset: error.offset });
+      }
+      console.error("Upload chunk error:", error);
+      res.status(500).json({ error: "Errore durante il caricamento del video" });
+    }
+  });
+
+  app.delete("/api/uploads/:id", (req, res) => {
+    if (!chunkedUploads.abort(req.params.id)) {
+      return res.status(404).json({ error: "Upload not found" });
+    }
+    res.json({ success: true });
+  });
+
+  // Manual video trim route. The source is either an uploaded 'file' or, for
+  // a follow-up trim, the content hash ('source') returned by an earlier
+  // trim while that upload is still kept (TRIM_SOURCE_TTL_MS).
+  app.post('/api/manual-trim', blobUpload.single('file'), async (req, res) => {
+    try {
+      let source: string;
+      let inputPath: string | null;
+      if (req.file) {
+        source = (req.file as Express.Multer.File & BlobInfo).hash;
+        inputPath = trimCache.retainSource(source, req.file.filename);
+      } else if (req.body.source) {
+        source = String(req.body.source);
+        inputPath = trimCache.sourcePath(source);
+        if (!inputPath) {
+          return res.status(404).json({ error: 'Source video expired, upload it again' });
+        }
+      } else {
+        return res.status(400).json({ error: 'No file uploaded' });
       }
 
       // Validate file path to prevent directory traversal
-      const inputPath = path.resolve(req.file.path);
+      inputPath = path.resolve(inputPath);
       if (!inputPath.startsWith(path.resolve(uploadDir))) {
         return res.status(400).json({ error: 'Invalid file path' });
       }
 
-      const uid = Date.now().toString();
-      const outputFilename = `${uid}_trimmed.mp4`;
-      const outputPath = path.resolve(path.join(uploadDir, outputFilename));
-
-      // Use Python script for video trimming with ffmpeg
-      const pythonProcess = spawn('python3', [
-        path.join(__dirname, 'trim_video.py'),
-        inputPath,
-        outputPath,
-        tIn.toString(),
-        tOut.toString()
-      ]);
+      // A batch of segments is cut from the upload with a single ffmpeg run.
+      // auto=true cuts the segments auto_trim.py detects instead.
+      const auto = req.body.auto === 'true';
+      const batch = auto || Boolean(req.body.segments);
+      let segments: TrimSegment[] | null;
+      let autoTrim: { confidence: number }[] | undefined;
+      if (auto) {
+        const minConfidence = parseFloat(req.body.min_confidence ?? '0.5');
+        let detected;
+        try {
+          detected = (await detectSegments(inputPath)).segments
+            .filter((seg) => seg.confidence >= (isNaN(minConfidence) ? 0.5 : minConfidence));
+        } catch (error) {
+          console.error('Auto-trim analysis error:', error);
+          return res.status(500).json({ error: "Errore nell'analisi automatica del video" });
+        }
+        if (!detected.length) {
+          return res.status(422).json({ error: 'No lifting segments detected', source });
+        }
+        segments = detected.map(({ t_in, t_out }) => ({ t_in, t_out }));
+        autoTrim = detected.map(({ confidence }) => ({ confidence }));
+      } else if (batch) {
+        segments = parseTrimSegments(req.body.segments);
+      } else {
+        const tIn = parseFloat(req.body.t_in);
+        const tOut = parseFloat(req.body.t_out);
+        const valid = !isNaN(tIn) && !isNaN(tOut) && tIn < tOut && tIn >= 0 && tOut >= 0;
+        segments = valid ? [{ t_in: tIn, t_out: tOut }] : null;
+      }
 
-      let output = '';
-      let error = '';
+      // copy snaps to keyframes; smart and accurate cut on the exact frame
+      const mode = (req.body.mode || 'copy') as TrimMode;
+      if (!segments || !TRIM_MODES.includes(mode)) {
+        return res.status(400).json({ error: 'Invalid trim parameters' });
+      }
 
-      pythonProcess.stdout.on('data', (data) => {
-        output += data.toString();
-      });
+      const uid = Date.now().toString();
+      const outputs = segments.map((seg, i) => ({
+        t_in: seg.t_in,
+        t_out: seg.t_out,
+        output: path.resolve(path.join(uploadDir, batch ? `${uid}_${i + 1}_trimmed.mp4` : `${uid}_trimmed.mp4`)),
+      }));
+
+      // Clips already cut from the same content with the same cuts and mode
+      const { cached, pending } = trimCache.split(source, outputs, mode);
+
+      let job: TrimJob | null = null;
+      if (pending.length) {
+        try {
+          job = trimQueue.submit(inputPath, pending, parseInt(req.body.priority) || 0, mode);
+        } catch (error) {
+          if (error instanceof TrimQueueFullError) {
+            res.set('Retry-After', '30');
+            return res.status(503).json({ error: error.message });
+          }
+          throw error;
+        }
+        trimQueue.wait(job.id).then((done) => trimCache.recordJob(source, done), () => {});
+      }
 
-      pythonProcess.stderr.on('data', (data) => {
-        error += data.toString();
-      });
+      // async=true returns the job right away; poll /api/trim-jobs/:id for progress
+      if (job && (req.body.async === 'true' || req.query.async === 'true')) {
+        const hits = outputs
+          .map((seg, i) => cached[i] && cachedClipView(seg.t_in, seg.t_out, cached[i]!))
+          .filter(Boolean);
+        return res.status(202).json({ ...trimJobView(job), source, cached: hits, autoTrim });
+      }
 
-      pythonProcess.on('close', (code) => {
-        // Clean up input file
-        fs.unlink(inputPath, () => {});
-
-        if (code === 0) {
-          res.json({ 
-            path: outputFilename,
-            status: 'OK',
-            message: 'Video trimmed successfully'
-          });
-        } else {
-          console.error('Trim error:', error);
-          res.status(500).json({ 
-            error: 'Video trimming failed',
-            details: error
-          });
-        }
+      sendTrimResult(res, {
+        job: job && await trimQueue.wait(job.id),
+        outputs,
+        cached,
+        batch,
+        source,
+        autoTrim
       });
 
     } catch (error) {
@@ -228,6 +569,32 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  // Trimmed clips, served by byte range
+  app.get('/api/clips/:filename', clipHandler(uploadDir));
+
+  app.get('/api/trim-jobs/metrics', (req, res) => {
+    res.json({ ...trimQueue.metrics(), cache: trimCache.stats() });
+  });
+
+  app.get('/api/trim-jobs/:id', (req, res) => {
+    const job = trimQueue.get(req.params.id);
+    if (!job) {
+      return res.status(404).json({ error: 'Trim job not found' });
+    }
+    res.json(trimJobView(job));
+  });
+
+  app.delete('/api/trim-jobs/:id', (req, res) => {
+    const job = trimQueue.get(req.params.id);
+    if (!job) {
+      return res.status(404).json({ error: 'Trim job not found' });
+    }
+    if (!trimQueue.cancel(job.id)) {
+      return res.status(409).json({ error: `Trim job already ${job.status}` });
+    }
+    res.json({ id: job.id, status: 'cancelled' });
+  });
+
   // Test database connection and migrate to PostgreSQL
   app.post("/api/migrate-to-db", async (req, res) => {
     try {
@@ -348,7 +715,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
   });
 
   // Upload video for exercise
-  app.post("/api/upload-video", upload.single('video'), async (req, res) => {
+  app.post("/api/upload-video", blobUpload.single('video'), async (req, res) => {
     try {
       if (!req.file) {
         return res.status(400).json({ error: "No video file uploaded" });
@@ -357,11 +724,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const { sessionId, exerciseId, weekId } = req.body;
 
       if (!sessionId || !exerciseId || !weekId) {
+        blobStore.release(req.file.filename);
         return res.status(400).json({ error: "Missing required fields: sessionId, exerciseId, weekId" });
       }
 
       const parsedSessionId = parseInt(sessionId);
       if (isNaN(parsedSessionId)) {
+        blobStore.release(req.file.filename);
         return res.status(400).json({ error: "Invalid sessionId" });
       }
 
@@ -375,10 +744,15 @@ export async function registerRoutes(app: Express): Promise<Server> {
         size: req.file.size
       });
 
+      const { hash, deduplicated } = req.file as Express.Multer.File & BlobInfo;
+      await processUploadedVideo(req.file.path, deduplicated);
+
       res.json({
         videoId: videoUpload.id,
         filename: videoUpload.filename,
-        originalName: videoUpload.originalName
+        originalName: videoUpload.originalName,
+        hash,
+        deduplicated
       });
     } catch (error) {
       console.error("Video upload error:", error);
@@ -454,6 +828,91 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  // Duration, codecs, resolution, bitrate and keyframe index of an uploaded video
+  app.get("/api/videos/:id/info", async (req, res) => {
+    try {
+      const video = await storage.getVideoUpload(parseInt(req.params.id));
+      if (!video) {
+        return res.status(404).json({ error: "Video not found" });
+      }
+      res.json(await getVideoInfo(path.join(uploadDir, video.filename)));
+    } catch (error) {
+      console.error("Video info error:", error);
+      res.status(500).json({ error: "Errore nella lettura delle informazioni del video" });
+    }
+  });
+
+  // Proposed lifting segments, ready to send back as a manual-trim batch
+  app.get("/api/videos/:id/auto-trim", async (req, res) => {
+    try {
+      const video = await storage.getVideoUpload(parseInt(req.params.id));
+      if (!video) {
+        return res.status(404).json({ error: "Video not found" });
+      }
+      res.json(await detectSegments(path.join(uploadDir, video.filename)));
+    } catch (error) {
+      console.error("Auto-trim analysis error:", error);
+      res.status(500).json({ error: "Errore nell'analisi automatica del video" });
+    }
+  });
+
+  // Proxy / poster / sprite sheet status and URLs
+  app.get("/api/videos/:id/previews", async (req, res) => {
+    try {
+      const video = await storage.getVideoUpload(parseInt(req.params.id));
+      if (!video) {
+        return res.status(404).json({ error: "Video not found" });
+      }
+      const { status, error, manifest } = await previewQueue.state(path.join(uploadDir, video.filename));
+      const url = (file?: string) => (file ? `/uploads/previews/${file}` : null);
+      res.json({
+        status,
+        error,
+        proxyUrl: url(manifest?.proxy?.file),
+        posterUrl: url(manifest?.poster?.file),
+        sprite: manifest?.sprite ? { ...manifest.sprite, url: url(manifest.sprite.file) } : null,
+        originalUrl: `/uploads/${video.filename}`
+      });
+    } catch (error) {
+      console.error("Video previews error:", error);
+      res.status(500).json({ error: "Errore nel recupero delle anteprime del video" });
+    }
+  });
+
+  // Poster thumbnail, once generated
+  app.get("/api/videos/:id/thumbnail", async (req, res) => {
+    try {
+      const video = await storage.getVideoUpload(parseInt(req.params.id));
+      if (!video) {
+        return res.status(404).json({ error: "Video not found" });
+      }
+      const { status, manifest } = await previewQueue.state(path.join(uploadDir, video.filename));
+      if (!manifest?.poster) {
+        return res.status(status === "queued" || status === "running" ? 202 : 404).json({ status });
+      }
+      res.sendFile(previewQueue.filePath(manifest.poster.file));
+    } catch (error) {
+      console.error("Video thumbnail error:", error);
+      res.status(500).json({ error: "Errore nel recupero della miniatura" });
+    }
+  });
+
+  // Playback: the proxy when it exists, the original upload otherwise
+  app.get("/api/videos/:id/stream", async (req, res) => {
+    try {
+      const video = await storage.getVideoUpload(parseInt(req.params.id));
+      if (!video) {
+        return res.status(404).json({ error: "Video not found" });
+      }
+      const originalPath = path.join(uploadDir, video.filename);
+      const manifest = await previewQueue.manifest(originalPath);
+      res.sendFile(manifest?.proxy ? previewQueue.filePath(manifest.proxy.file) : originalPath);
+    } catch (error) {
+      console.error("Video stream error:", error);
+      res.status(500).json({ error: "Errore nella riproduzione del video" });
+    }
+  });
+
   // Delete video
   app.delete("/api/videos/:id", async (req, res) => {
     try {
@@ -466,13 +925,8 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const deleted = await storage.deleteVideoUpload(videoId);
       
       if (deleted && video) {
-        // Remove physical file
-        const filePath = path.join(uploadDir, video.filename);
-        fs.unlink(filePath, (err) => {
-          if (err) {
-            console.warn("Could not delete video file:", err.message);
-          }
-        });
+        // Duplicate uploads share one blob, removed with its last reference
+        blobStore.release(video.filename);
         
         res.json({ success: true });
       } else {
@@ -512,6 +966,9 @@ export async function registerRoutes(app: Express): Promise<Server> {
   });
 
   // Send to Telegram
+  // Queues a Telegram send and returns its job id right away; poll
+  // /api/telegram-jobs/:id for progress. Videos the coach already received
+  // are skipped.
   app.post("/api/send-to-telegram", async (req, res) => {
     try {
       const session = await storage.getCurrentSession();
@@ -520,45 +977,8 @@ export async function registerRoutes(app: Express): Promise<Server> {
       }
 
       const videos = await storage.getVideosBySession(session.id);
-      
-      // Import and call the Telegram bot
-      const { spawn } = await import('child_process');
-      
-      // Prepare data for Python script
-      const telegramData = {
-        session: session,
-        videos: videos
-      };
-      
-      // Call Python Telegram bot script
-      const pythonProcess = spawn('python3', ['telegram_bot.py'], {
-        stdio: ['pipe', 'pipe', 'pipe']
-      });
-      
-      let output = '';
-      let errorOutput = '';
-      
-      pythonProcess.stdout.on('data', (data: Buffer) => {
-        output += data.toString();
-      });
-      
-      pythonProcess.stderr.on('data', (data: Buffer) => {
-        errorOutput += data.toString();
-      });
-      
-      pythonProcess.stdin.write(JSON.stringify(telegramData));
-      pythonProcess.stdin.end();
-      
-      pythonProcess.on('close', (code: number | null) => {
-        if (code === 0) {
-          console.log('Telegram send successful:', output);
-          res.json({ success: true });
-        } else {
-          console.error('Telegram send failed:', errorOutput);
-          res.status(500).json({ error: "Errore nell'invio su Telegram: " + errorOutput });
-        }
-      });
-
+      const job = telegramDispatcher.submit(session.id, session, videos);
+      res.status(202).json({ success: true, jobId: job.id, status: job.status });
     } catch (error: unknown) {
       console.error("Telegram send error:", error);
       const errorMessage = error instanceof Error ? error.message : String(error);
@@ -566,6 +986,14 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  app.get("/api/telegram-jobs/:id", (req, res) => {
+    const job = telegramDispatcher.get(req.params.id);
+    if (!job) {
+      return res.status(404).json({ error: "Telegram job not found" });
+    }
+    res.json(job);
+  });
+
   // Serve uploaded files
   app.use("/uploads", express.static(uploadDir));
 
@@ -0,0 +1,139 @@
+import { spawn } from "child_process";
+import readline from "readline";
+import path from "path";
+
+// Background Telegram sends around `telegram_dispatch.py`. A send returns a
+// job id right away; jobs run one at a time, so the delivery ledger has a
+// single writer and the coach's chat is not interleaved. Sending the same
+// session again while its job is still queued reuses that job. Finished jobs
+// stay pollable for TELEGRAM_JOB_TTL_MS.
+
+const DISPATCH_SCRIPT = path.join("server", "telegram_dispatch.py");
+const JOB_TTL_MS = parseInt(process.env.TELEGRAM_JOB_TTL_MS || String(60 * 60 * 1000));
+
+export type DispatchStatus = "queued" | "running" | "done" | "partial" | "failed";
+
+export interface DispatchResult {
+  summary: "sent" | "unchanged";
+  sent: number;
+  skipped: number;
+  failed: { videoId: number; error: string }[];
+  groups: number;
+}
+
+export interface DispatchJob {
+  id: string;
+  sessionId: number;
+  status: DispatchStatus;
+  progress: { sent: number; total: number; skipped: number };
+  createdAt: number;
+  startedAt?: number;
+  finishedAt?: number;
+  result?: DispatchResult;
+  error?: string;
+}
+
+interface QueuedDispatch extends DispatchJob {
+  payload: { session: unknown; videos: unknown[] };
+}
+
+class TelegramDispatcher {
+  private jobs = new Map<string, QueuedDispatch>();
+  private queue: QueuedDispatch[] = [];
+  private running = false;
+  private nextSeq = 1;
+
+  constructor(private uploadDir: string) {}
+
+  submit(sessionId: number, session: unknown, videos: unknown[]): DispatchJob {
+    this.prune();
+    const pending = this.queue.find((job) => job.sessionId === sessionId);
+    if (pending) {
+      // Not started yet: send the latest state of the session instead
+      pending.payload = { session, videos };
+      return this.view(pending);
+    }
+
+    const job: QueuedDispatch = {
+      id: `tg_${Date.now()}_${this.nextSeq++}`,
+      sessionId,
+      status: "queued",
+      progress: { sent: 0, total: 0, skipped: 0 },
+      createdAt: Date.now(),
+      payload: { session, videos },
+    };
+    this.jobs.set(job.id, job);
+    this.queue.push(job);
+    this.drain();
+    return this.view(job);
+  }
+
+  get(id: string): DispatchJob | undefined {
+    const job = this.jobs.get(id);
+    return job && this.view(job);
+  }
+
+  private drain() {
+    if (this.running || !this.queue.length) return;
+    this.running = true;
+    this.run(this.queue.shift()!);
+  }
+
+  private run(job: QueuedDispatch) {
+    job.status = "running";
+    job.startedAt = Date.now();
+
+    const child = spawn("python3", [DISPATCH_SCRIPT]);
+    child.stdin.on("error", () => {});
+    child.stdin.end(JSON.stringify({ ...job.payload, uploadDir: this.uploadDir }));
+
+    let stderr = "";
+    const lines = readline.createInterface({ input: child.stdout });
+    lines.on("line", (line) => {
+      let message: any;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        return;
+      }
+      if (message.event === "progress") {
+        job.progress = { sent: message.sent, total: message.total, skipped: message.skipped };
+      } else if (message.event === "done") {
+        const { event: _event, ...result } = message;
+        job.result = result;
+      }
+    });
+    child.stderr.on("data", (data: Buffer) => {
+      stderr += data.toString();
+    });
+    child.on("error", (err) => {
+      job.error = err.message;
+    });
+
+    child.on("close", (code) => {
+      job.finishedAt = Date.now();
+      // Exit code 2: some videos failed, everything else was delivered
+      job.status = code === 0 ? "done" : code === 2 && job.result ? "partial" : "failed";
+      if (job.status !== "done") {
+        job.error = job.error || stderr.trim() || job.result?.failed.map((f) => f.error).join("; ") || "Telegram send failed";
+        console.error(`Telegram dispatch ${job.id} ${job.status}:`, job.error);
+      }
+      this.running = false;
+      this.drain();
+    });
+  }
+
+  private prune() {
+    const cutoff = Date.now() - JOB_TTL_MS;
+    this.jobs.forEach((job, id) => {
+      if (job.finishedAt && job.finishedAt < cutoff) this.jobs.delete(id);
+    });
+  }
+
+  private view(job: QueuedDispatch): DispatchJob {
+    const { payload: _payload, ...rest } = job;
+    return rest;
+  }
+}
+
+export const telegramDispatcher = new TelegramDispatcher(path.join(process.cwd(), "uploads"));
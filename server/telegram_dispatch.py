@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Telegram dispatch of a workout session to the coach
+
+Reads {"session", "videos", "uploadDir"} JSON on stdin and sends:
+- a summary message of the session, unless the same text was already sent
+- the session's videos, batched into media groups of up to 10
+
+Groups are uploaded by a small thread pool sharing one keep-alive
+requests.Session. A 429 is retried after the retry_after Telegram asks for,
+other transient failures with exponential backoff. Every delivered item is
+recorded in a ledger (<uploadDir>/telegram-ledger.json) per chat, keyed by
+exercise, week and file content, so sending a session again only ships new
+or changed videos.
+
+Config: TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_API_BASE (default
+https://api.telegram.org; point it at a local stand-in Bot API server for
+testing) and TELEGRAM_CONCURRENCY (parallel uploads, default 3).
+
+Progress is printed as JSON lines on stdout; the last line is the result.
+Exit code 0 when everything was delivered, 2 when some videos failed and
+1 when nothing could be sent.
+"""
+import sys
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+CONCURRENCY = max(1, int(os.environ.get("TELEGRAM_CONCURRENCY", "3")))
+
+MEDIA_GROUP_SIZE = 10  # Bot API limit for sendMediaGroup
+MESSAGE_LIMIT = 4096   # Bot API limit for sendMessage text
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+# (connect, read) - the read timeout covers uploading a whole group
+REQUEST_TIMEOUT = (10, 300)
+
+LEDGER_NAME = "telegram-ledger.json"
+LEDGER_VERSION = 1
+
+_print_lock = threading.Lock()
+
+
+def emit(event, **fields):
+    with _print_lock:
+        print(json.dumps({"event": event, **fields}), flush=True)
+
+
+class TelegramError(Exception):
+    def __init__(self, message, retry_after=None, transient=False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.transient = transient
+
+
+class TelegramClient:
+    """Bot API calls over one pooled keep-alive session"""
+
+    def __init__(self, token, api_base=API_BASE, pool_size=CONCURRENCY):
+        self.base = f"{api_base}/bot{token}"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def call(self, method, data=None, files=None):
+        """POST a Bot API method, retrying rate limits and transient failures"""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                return self._post(method, data, files)
+            except TelegramError as e:
+                if attempt == MAX_ATTEMPTS or not (e.retry_after is not None or e.transient):
+                    raise
+                if e.retry_after is not None:
+                    delay = e.retry_after
+                else:
+                    delay = BACKOFF_BASE * 2 ** (attempt - 1) * (0.5 + random.random())
+                time.sleep(delay)
+
+    def _post(self, method, data, files):
+        # Files are reopened on every attempt, a failed upload consumed them
+        opened = []
+        try:
+            upload = None
+            if files:
+                upload = {}
+                for name, path in files.items():
+                    f = open(path, 'rb')
+                    opened.append(f)
+                    upload[name] = (os.path.basename(path), f, 'video/mp4')
+            resp = self.session.post(f"{self.base}/{method}", data=data, files=upload,
+                                     timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            raise TelegramError(f"{method}: {e}", transient=True)
+        finally:
+            for f in opened:
+                f.close()
+
+        try:
+            body = resp.json()
+        except ValueError:
+            body = {}
+        description = body.get("description") or f"HTTP {resp.status_code}"
+        if resp.status_code == 429:
+            retry_after = (body.get("parameters") or {}).get("retry_after", 1)
+            raise TelegramError(f"{method}: {description}", retry_after=float(retry_after))
+        if resp.status_code >= 500:
+            raise TelegramError(f"{method}: {description}", transient=True)
+        if not body.get("ok"):
+            raise TelegramError(f"{method}: {description}")
+        return body["result"]
+
+
+class Ledger:
+    """What has been delivered to each chat, saved after every send"""
+
+    def __init__(self, path, chat_id):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != LEDGER_VERSION:
+                data = {}
+        except (OSError, ValueError):
+            data = {}
+        self.data = {"version": LEDGER_VERSION, "chats": data.get("chats", {})}
+        self.entries = self.data["chats"].setdefault(str(chat_id), {})
+
+    def delivered(self, key):
+        return key in self.entries
+
+    def record(self, key, message_id):
+        with self.lock:
+            self.entries[key] = {"messageId": message_id, "sentAt": int(time.time())}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+
+
+def summary_text(session):
+    """Plain-text recap of the session's exercises, weights, RPE and notes"""
+    lines = [f"🏋️ {session.get('selectedDay') or 'Allenamento'}", ""]
+    for exercise in session.get("exercises") or []:
+        header = exercise.get("name") or exercise.get("id")
+        if exercise.get("setsReps"):
+            header += f" ({exercise['setsReps']})"
+        lines.append(header)
+        for week_id, week in (exercise.get("weeks") or {}).items():
+            parts = []
+            if week.get("weight"):
+                parts.append(f"peso {week['weight']}")
+            if week.get("rpe") is not None:
+                parts.append(f"RPE {week['rpe']}")
+            if week.get("video"):
+                parts.append("🎥")
+            if parts:
+                lines.append(f"  {week_id}: " + " · ".join(parts))
+        if exercise.get("notes"):
+            lines.append(f"  📝 {exercise['notes']}")
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def split_message(text, limit=MESSAGE_LIMIT):
+    """Split on line boundaries into chunks Telegram accepts"""
+    chunks, current = [], ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _fingerprint(path, filename):
+    """Content id of a video: the blob hash when stored content-addressed"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    if filename.startswith("blobs/") and len(stem) == 64:
+        return stem
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def plan_videos(session, videos, upload_dir, ledger):
+    """Videos still to deliver, plus how many were skipped as already sent"""
+    names = {e.get("id"): e.get("name") for e in session.get("exercises") or []}
+    pending, skipped, missing = [], 0, []
+    for video in videos:
+        path = os.path.join(upload_dir, video["filename"])
+        if not os.path.exists(path):
+            missing.append({"videoId": video.get("id"), "error": "File not found"})
+            continue
+        key = f"video:{video['exerciseId']}:{video['weekId']}:{_fingerprint(path, video['filename'])}"
+        if ledger.delivered(key):
+            skipped += 1
+            continue
+        # The 720p proxy is much smaller to upload and plays the same in chat
+        proxy = os.path.join(upload_dir, "previews", f"{os.path.basename(path)}.proxy.mp4")
+        pending.append({
+            "id": video.get("id"),
+            "key": key,
+            "path": proxy if os.path.exists(proxy) else path,
+            "caption": f"{names.get(video['exerciseId']) or video['exerciseId']} - {video['weekId']}",
+        })
+    return pending, skipped, missing
+
+
+def send_group(client, chat_id, group):
+    """Send one media group (or a lone video); returns one message id per video"""
+    if len(group) == 1:
+        message = client.call("sendVideo", data={
+            "chat_id": chat_id, "caption": group[0]["caption"], "supports_streaming": "true",
+        }, files={"video": group[0]["path"]})
+        return [message.get("message_id")]
+
+    media = [{"type": "video", "media": f"attach://v{i}", "caption": item["caption"],
+              "supports_streaming": True} for i, item in enumerate(group)]
+    messages = client.call("sendMediaGroup", data={
+        "chat_id": chat_id, "media": json.dumps(media),
+    }, files={f"v{i}": item["path"] for i, item in enumerate(group)})
+    return [m.get("message_id") for m in messages]
+
+
+def dispatch(payload, token, chat_id, api_base=API_BASE, concurrency=CONCURRENCY):
+    """Send what the coach has not received yet; returns the delivery report"""
+    upload_dir = payload.get("uploadDir") or "uploads"
+    session = payload.get("session") or {}
+    client = TelegramClient(token, api_base, concurrency)
+    ledger = Ledger(os.path.join(upload_dir, LEDGER_NAME), chat_id)
+
+    result = {"summary": "unchanged", "sent": 0, "skipped": 0, "failed": [], "groups": 0}
+
+    text = summary_text(session)
+    summary_key = f"summary:{session.get('id')}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+    if text and not ledger.delivered(summary_key):
+        message_id = None
+        for chunk in split_message(text):
+            message_id = client.call("sendMessage", data={"chat_id": chat_id, "text": chunk}).get("message_id")
+        ledger.record(summary_key, message_id)
+        result["summary"] = "sent"
+
+    pending, result["skipped"], result["failed"] = plan_videos(session, payload.get("videos") or [], upload_dir, ledger)
+    groups = [pending[i:i + MEDIA_GROUP_SIZE] for i in range(0, len(pending), MEDIA_GROUP_SIZE)]
+    result["groups"] = len(groups)
+    emit("progress", sent=0, total=len(pending), skipped=result["skipped"])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(send_group, client, chat_id, group): group for group in groups}
+        for future in as_completed(futures):
+            group = futures[future]
+            try:
+                message_ids = future.result()
+            except TelegramError as e:
+                result["failed"] += [{"videoId": item["id"], "error": str(e)} for item in group]
+                continue
+            for item, message_id in zip(group, message_ids):
+                ledger.record(item["key"], message_id)
+            result["sent"] += len(group)
+            emit("progress", sent=result["sent"], total=len(pending), skipped=result["skipped"])
+    return result
+
+
+if __name__ == "__main__":
+    token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    chat_id = os.environ.get("TELEGRAM_CHAT_ID")
+    if not token or not chat_id:
+        print("Error: TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID must be set", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        payload = json.load(sys.stdin)
+        result = dispatch(payload, token, chat_id)
+    except (OSError, ValueError, TelegramError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    emit("done", **result)
+    if result["failed"]:
+        sys.exit(2 if result["sent"] or result["skipped"] or result["summary"] == "sent" else 1)
@@ -0,0 +1,182 @@
+import path from "path";
+import fs from "fs";
+import { blobStore } from "./blob-store";
+import type { TrimJob, TrimJobSegment, TrimMode } from "./trim-queue";
+
+// Trim sources and results kept between requests. An uploaded trim source is
+// held in the blob store for TRIM_SOURCE_TTL_MS after its last use, so a
+// follow-up trim can name it by content hash instead of uploading it again.
+// Finished clips are cached by (source hash, t_in, t_out, mode) in an LRU of
+// at most TRIM_CACHE_MAX_MB; evicting an entry deletes its clip. The state
+// is saved to uploads/trim-cache.json so it survives a restart.
+
+const SOURCE_TTL_MS = parseInt(process.env.TRIM_SOURCE_TTL_MS || String(60 * 60 * 1000));
+const MAX_BYTES = parseInt(process.env.TRIM_CACHE_MAX_MB || "512") * 1024 * 1024;
+const SWEEP_INTERVAL_MS = 60 * 1000;
+
+interface SourceLease {
+  filename: string;
+  expiresAt: number;
+}
+
+interface CachedClip {
+  output: string;
+  bytes: number;
+  lastUsed: number;
+}
+
+interface CutPoints {
+  t_in: number;
+  t_out: number;
+}
+
+class TrimCache {
+  private statePath: string;
+  private sources = new Map<string, SourceLease>();
+  // Map iteration order is insertion order, so the first entry is the LRU one
+  private clips = new Map<string, CachedClip>();
+  private bytes = 0;
+  private counters = { hits: 0, misses: 0, evictions: 0 };
+  private saving: Promise<void> = Promise.resolve();
+
+  constructor(private uploadDir: string) {
+    this.statePath = path.join(uploadDir, "trim-cache.json");
+    this.load();
+    setInterval(() => this.sweep(), SWEEP_INTERVAL_MS).unref();
+  }
+
+  // Take over the blob reference of an uploaded source and return its path
+  retainSource(hash: string, filename: string): string {
+    const lease = this.sources.get(hash);
+    if (lease) {
+      // Same content is already held; the new reference is not needed
+      blobStore.release(filename);
+      lease.expiresAt = Date.now() + SOURCE_TTL_MS;
+    } else {
+      this.sources.set(hash, { filename, expiresAt: Date.now() + SOURCE_TTL_MS });
+    }
+    this.save();
+    return path.join(this.uploadDir, this.sources.get(hash)!.filename);
+  }
+
+  // Path of a source uploaded earlier, or null once it has expired
+  sourcePath(hash: string): string | null {
+    const lease = this.sources.get(hash);
+    if (!lease) return null;
+    lease.expiresAt = Date.now() + SOURCE_TTL_MS;
+    this.save();
+    return path.join(this.uploadDir, lease.filename);
+  }
+
+  // Output path of a clip already cut with these cut points, if still on disk
+  lookup(hash: string, cut: CutPoints, mode: TrimMode): string | null {
+    const key = this.key(hash, cut, mode);
+    const clip = this.clips.get(key);
+    if (clip && !fs.existsSync(clip.output)) {
+      this.drop(key);
+    } else if (clip) {
+      this.clips.delete(key);
+      clip.lastUsed = Date.now();
+      this.clips.set(key, clip);
+      this.counters.hits++;
+      return clip.output;
+    }
+    this.counters.misses++;
+    return null;
+  }
+
+  // The cached clip (or null) for every segment, and the segments that still
+  // have to be cut
+  split(hash: string, segments: TrimJobSegment[], mode: TrimMode) {
+    const cached = segments.map((seg) => this.lookup(hash, seg, mode));
+    return { cached, pending: segments.filter((_, i) => !cached[i]) };
+  }
+
+  // Add the clips a finished job wrote
+  recordJob(hash: string, job: TrimJob) {
+    if (job.status !== "done") return;
+    job.segments.forEach((seg, i) => {
+      const report = job.result?.segments?.[i];
+      if (!report?.ok) return;
+      const key = this.key(hash, seg, job.mode);
+      this.drop(key);
+      this.clips.set(key, { output: seg.output, bytes: report.bytes ?? 0, lastUsed: Date.now() });
+      this.bytes += report.bytes ?? 0;
+    });
+    // Always keep the newest clip, even if it alone is over the limit
+    while (this.bytes > MAX_BYTES && this.clips.size > 1) {
+      const [oldest, clip] = this.clips.entries().next().value!;
+      this.drop(oldest);
+      fs.unlink(clip.output, () => {});
+      this.counters.evictions++;
+    }
+    this.sourcePath(hash);
+  }
+
+  stats() {
+    const lookups = this.counters.hits + this.counters.misses;
+    return {
+      entries: this.clips.size,
+      bytes: this.bytes,
+      maxBytes: MAX_BYTES,
+      sources: this.sources.size,
+      ...this.counters,
+      hitRate: lookups ? Math.round((this.counters.hits / lookups) * 1000) / 1000 : 0,
+    };
+  }
+
+  private key(hash: string, cut: CutPoints, mode: TrimMode): string {
+    // Millisecond precision, so 12.3 and 12.300001 from a slider are one entry
+    return `${hash}|${Math.round(cut.t_in * 1000)}|${Math.round(cut.t_out * 1000)}|${mode}`;
+  }
+
+  private drop(key: string) {
+    const clip = this.clips.get(key);
+    if (!clip) return;
+    this.bytes -= clip.bytes;
+    this.clips.delete(key);
+    this.save();
+  }
+
+  // Release sources nobody has used for SOURCE_TTL_MS
+  private sweep() {
+    const now = Date.now();
+    let changed = false;
+    this.sources.forEach((lease, hash) => {
+      if (lease.expiresAt > now) return;
+      this.sources.delete(hash);
+      changed = true;
+      blobStore.release(lease.filename);
+    });
+    if (changed) this.save();
+  }
+
+  private load() {
+    try {
+      const state = JSON.parse(fs.readFileSync(this.statePath, "utf-8"));
+      this.sources = new Map(state.sources);
+      this.clips = new Map(state.clips);
+      this.clips.forEach((clip) => {
+        this.bytes += clip.bytes;
+      });
+    } catch {
+      // No saved state yet
+    }
+  }
+
+  // Writes are chained so the file always ends up with the latest state
+  private save() {
+    this.saving = this.saving.then(async () => {
+      const tmpPath = `${this.statePath}.tmp`;
+      try {
+        const state = { sources: Array.from(this.sources), clips: Array.from(this.clips) };
+        await fs.promises.writeFile(tmpPath, JSON.stringify(state));
+        await fs.promises.rename(tmpPath, this.statePath);
+      } catch (error) {
+        console.warn("Could not save trim cache:", (error as Error).message);
+      }
+    });
+  }
+}
+
+export const trimCache = new TrimCache(path.join(process.cwd(), "uploads"));
@@ -0,0 +1,228 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
+import readline from "readline";
+import path from "path";
+import fs from "fs";
+
+// Bounded trim job service around `trim_video.py --batch --progress`.
+// At most TRIM_WORKERS ffmpeg jobs run at once; the rest wait in a priority
+// queue (higher priority first, FIFO within a priority) of at most
+// TRIM_QUEUE_MAX jobs. Finished jobs stay pollable for TRIM_JOB_TTL_MS.
+// Input files belong to the caller; the queue never deletes them.
+
+const TRIM_SCRIPT = path.join("server", "trim_video.py");
+const WORKERS = parseInt(process.env.TRIM_WORKERS || "2");
+const MAX_QUEUED = parseInt(process.env.TRIM_QUEUE_MAX || "100");
+const JOB_TTL_MS = parseInt(process.env.TRIM_JOB_TTL_MS || String(60 * 60 * 1000));
+
+export type TrimJobStatus = "queued" | "running" | "done" | "failed" | "cancelled";
+
+// See TRIM_MODES in trim_video.py
+export const TRIM_MODES = ["copy", "smart", "accurate"] as const;
+export type TrimMode = (typeof TRIM_MODES)[number];
+
+export interface TrimJobSegment {
+  t_in: number;
+  t_out: number;
+  output: string;
+}
+
+export interface TrimJob {
+  id: string;
+  status: TrimJobStatus;
+  priority: number;
+  mode: TrimMode;
+  inputPath: string;
+  segments: TrimJobSegment[];
+  progress: number;
+  createdAt: number;
+  startedAt?: number;
+  finishedAt?: number;
+  result?: any;
+  error?: string;
+}
+
+interface QueuedJob extends TrimJob {
+  seq: number;
+  process?: ChildProcessWithoutNullStreams;
+  waiters: ((job: TrimJob) => void)[];
+}
+
+export class TrimQueueFullError extends Error {
+  constructor() {
+    super(`Trim queue is full (${MAX_QUEUED} jobs waiting)`);
+  }
+}
+
+const FINISHED: TrimJobStatus[] = ["done", "failed", "cancelled"];
+
+class TrimQueue {
+  private jobs = new Map<string, QueuedJob>();
+  private queue: QueuedJob[] = [];
+  private running = 0;
+  private nextSeq = 1;
+  private counters = { completed: 0, failed: 0, cancelled: 0, rejected: 0 };
+  private waitTotalMs = 0;
+  private waitMaxMs = 0;
+  private waitSamples = 0;
+
+  submit(inputPath: string, segments: TrimJobSegment[], priority = 0, mode: TrimMode = "copy"): TrimJob {
+    this.prune();
+    if (this.queue.length >= MAX_QUEUED) {
+      this.counters.rejected++;
+      throw new TrimQueueFullError();
+    }
+
+    const seq = this.nextSeq++;
+    const job: QueuedJob = {
+      id: `trim_${Date.now()}_${seq}`,
+      status: "queued",
+      priority,
+      mode,
+      inputPath,
+      segments,
+      progress: 0,
+      createdAt: Date.now(),
+      seq,
+      waiters: [],
+    };
+    this.jobs.set(job.id, job);
+
+    // Keep the queue ordered by priority, then arrival
+    const at = this.queue.findIndex((q) => q.priority < priority);
+    this.queue.splice(at === -1 ? this.queue.length : at, 0, job);
+    this.drain();
+    return this.view(job);
+  }
+
+  get(id: string): (TrimJob & { position?: number }) | undefined {
+    const job = this.jobs.get(id);
+    return job && this.view(job);
+  }
+
+  // Resolves once the job has finished, failed or been cancelled
+  wait(id: string): Promise<TrimJob> {
+    const job = this.jobs.get(id);
+    if (!job) return Promise.reject(new Error(`Unknown trim job ${id}`));
+    if (FINISHED.includes(job.status)) return Promise.resolve(this.view(job));
+    return new Promise((resolve) => job.waiters.push(resolve));
+  }
+
+  cancel(id: string): boolean {
+    const job = this.jobs.get(id);
+    if (!job || FINISHED.includes(job.status)) return false;
+
+    if (job.status === "queued") {
+      this.queue = this.queue.filter((q) => q !== job);
+      this.finish(job, "cancelled");
+    } else {
+      // trim_video.py stops its ffmpeg on SIGTERM; finish() runs on exit
+      job.status = "cancelled";
+      job.process?.kill("SIGTERM");
+    }
+    return true;
+  }
+
+  metrics() {
+    const now = Date.now();
+    return {
+      workers: WORKERS,
+      running: this.running,
+      queued: this.queue.length,
+      maxQueued: MAX_QUEUED,
+      oldestQueuedMs: this.queue.length ? now - Math.min(...this.queue.map((q) => q.createdAt)) : 0,
+      avgWaitMs: this.waitSamples ? Math.round(this.waitTotalMs / this.waitSamples) : 0,
+      maxWaitMs: this.waitMaxMs,
+      ...this.counters,
+    };
+  }
+
+  private drain() {
+    while (this.running < WORKERS && this.queue.length) {
+      this.start(this.queue.shift()!);
+    }
+  }
+
+  private start(job: QueuedJob) {
+    this.running++;
+    job.status = "running";
+    job.startedAt = Date.now();
+    const waitedMs = job.startedAt - job.createdAt;
+    this.waitTotalMs += waitedMs;
+    this.waitMaxMs = Math.max(this.waitMaxMs, waitedMs);
+    this.waitSamples++;
+
+    const child = spawn("python3", [TRIM_SCRIPT, "--mode", job.mode, "--batch", "--progress", job.inputPath]);
+    job.process = child;
+    child.stdin.on("error", () => {});
+    child.stdin.end(JSON.stringify(job.segments));
+
+    let report: any = null;
+    let stderr = "";
+    const lines = readline.createInterface({ input: child.stdout });
+    lines.on("line", (line) => {
+      let message: any;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        return;
+      }
+      if (message.event === "progress") {
+        job.progress = message.progress;
+      } else if (message.segments) {
+        report = message;
+      }
+    });
+
+    child.stderr.on("data", (data: Buffer) => {
+      stderr += data.toString();
+    });
+
+    child.on("error", (err) => {
+      job.error = err.message;
+    });
+
+    child.on("close", () => {
+      this.running--;
+      job.process = undefined;
+      if (job.status === "cancelled") {
+        // Drop whatever ffmpeg had written before it was stopped
+        job.segments.forEach((seg) => fs.unlink(seg.output, () => {}));
+        this.finish(job, "cancelled");
+      } else if (report && report.segments.some((seg: any) => seg.ok)) {
+        job.result = report;
+        this.finish(job, "done");
+      } else {
+        job.result = report ?? undefined;
+        job.error = job.error || stderr.trim() || "Video trimming failed";
+        this.finish(job, "failed");
+      }
+      this.drain();
+    });
+  }
+
+  private finish(job: QueuedJob, status: TrimJobStatus) {
+    job.status = status;
+    job.finishedAt = Date.now();
+    if (status === "done") job.progress = 1;
+    this.counters[status === "done" ? "completed" : status === "failed" ? "failed" : "cancelled"]++;
+
+    const view = this.view(job);
+    job.waiters.forEach((resolve) => resolve(view));
+    job.waiters = [];
+  }
+
+  private prune() {
+    const cutoff = Date.now() - JOB_TTL_MS;
+    this.jobs.forEach((job, id) => {
+      if (job.finishedAt && job.finishedAt < cutoff) this.jobs.delete(id);
+    });
+  }
+
+  private view(job: QueuedJob): TrimJob & { position?: number } {
+    const { process: _process, waiters: _waiters, seq: _seq, ...rest } = job;
+    const position = job.status === "queued" ? this.queue.indexOf(job) + 1 : undefined;
+    return { ...rest, position };
+  }
+}
+
+export const trimQueue = new TrimQueue();
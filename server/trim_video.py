@@ -3,10 +3,41 @@ import sys
 import subprocess
 import os
 import shlex
+import json
+import time
+import signal
+import tempfile
+from video_utils import cached_video_info, get_video_info, validate_bounds, keyframes_between
 
-def trim_video(input_path, output_path, t_in, t_out):
+# copy: stream copy, cuts snap to keyframes (fast)
+# smart: frame-accurate; re-encodes only the partial GOPs at both edges
+# accurate: frame-accurate full re-encode
+TRIM_MODES = ('copy', 'smart', 'accurate')
+
+# Encoder settings for re-encoded pieces; CRF 18 is visually close to the
+# source so the re-encoded edges do not stand out in a smart cut
+REENCODE_PRESET = os.environ.get("TRIM_REENCODE_PRESET", "veryfast")
+REENCODE_CRF = os.environ.get("TRIM_REENCODE_CRF", "18")
+
+# Codecs smart-cut can re-encode compatibly with the copied middle; pieces
+# are joined as MPEG-TS so each one keeps its own in-band parameter sets
+SMART_CUT_ENCODERS = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+}
+
+# Two timestamps closer than this are treated as the same frame
+FRAME_EPSILON = 0.001
+
+# MP4 outputs get their moov atom up front (+faststart) so clips start playing
+# before they are fully downloaded. TRIM_FRAGMENTED=1 writes fragmented MP4
+# instead, which is streamable as it is written and needs no second pass.
+FRAGMENTED_MP4 = os.environ.get("TRIM_FRAGMENTED", "") in ("1", "true", "yes")
+
+def trim_video(input_path, output_path, t_in, t_out, mode='copy'):
     """
-    Trim video using ffmpeg
+    Trim video using ffmpeg. Messages go to stderr: stdout carries the
+    --batch report and progress events.
     """
     try:
         # Validate and sanitize input paths
@@ -16,18 +47,32 @@ def trim_video(input_path, output_path, t_in, t_out):
         if not input_path or not output_path:
             raise ValueError("Input and output paths cannot be empty")
         
+        if mode not in TRIM_MODES:
+            raise ValueError(f"Unknown trim mode: {mode}")
+        
+        # Reject out-of-range cuts up front when the video was already probed
+        info = cached_video_info(input_path)
+        if info is not None:
+            validate_bounds(info, float(t_in), float(t_out))
+        
         # Ensure output directory exists
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
+        if mode == 'smart':
+            _smart_cut(input_path, output_path, float(t_in), float(t_out))
+            print(f"Video trimmed successfully: {output_path}", file=sys.stderr)
+            return True
+        if mode == 'accurate':
+            _reencode(input_path, output_path, float(t_in), float(t_out), audio=True)
+            print(f"Video trimmed successfully: {output_path}", file=sys.stderr)
+            return True
+        
         # Build ffmpeg command with properly escaped arguments
         cmd = [
             'ffmpeg',
             '-y',  # Overwrite output files
-            '-ss', str(float(t_in)),  # Start time (validate as float)
-            '-to', str(float(t_out)),  # End time (validate as float)
-            '-i', input_path,  # Input file
-            '-c', 'copy',  # Copy streams without re-encoding
-            output_path  # Output file
+            *_copy_input(input_path, float(t_in), float(t_out)),  # Seek window (validated as floats)
+            *_copy_output(0, output_path),  # Copy streams without re-encoding
         ]
         
         # Execute ffmpeg command
@@ -36,7 +81,7 @@ def trim_video(input_path, output_path, t_in, t_out):
                               text=True, 
                               check=True)
         
-        print(f"Video trimmed successfully: {output_path}")
+        print(f"Video trimmed successfully: {output_path}", file=sys.stderr)
         return True
         
     except subprocess.CalledProcessError as e:
@@ -46,9 +91,305 @@ def trim_video(input_path, output_path, t_in, t_out):
         print(f"Error: {str(e)}", file=sys.stderr)
         return False
 
+def _copy_input(input_path, t_in, t_out):
+    """
+    Input options of a stream-copy cut. The seek is on the input, so ffmpeg
+    starts at the keyframe before t_in; trim_video() and trim_segments() share
+    it so a segment lands on the same keyframe either way.
+    """
+    return ['-ss', str(t_in), '-to', str(t_out), '-i', input_path]
+
+def _copy_output(index, output_path):
+    """Output options stream-copying the first video and audio of input index"""
+    return ['-map', f'{index}:v:0', '-map', f'{index}:a:0?', '-c', 'copy',
+            *_mp4_flags(output_path), output_path]
+
+def _mp4_flags(output_path):
+    """-movflags for progressive playback; only MP4-family outputs take them"""
+    if os.path.splitext(output_path)[1].lower() not in ('.mp4', '.m4v', '.mov'):
+        return []
+    if FRAGMENTED_MP4:
+        return ['-movflags', '+frag_keyframe+empty_moov+default_base_moof']
+    return ['-movflags', '+faststart']
+
+def _run_ffmpeg(cmd, duration=None, on_progress=None):
+    """
+    Run an ffmpeg command, raising CalledProcessError on failure. With
+    on_progress, ffmpeg's -progress output is parsed and on_progress(fraction)
+    is called as the output advances through duration seconds.
+    """
+    if on_progress is None:
+        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        return
+
+    cmd = cmd[:1] + ['-progress', 'pipe:1', '-nostats'] + cmd[1:]
+    # stderr goes to a file so a chatty ffmpeg cannot block on a full pipe
+    with tempfile.TemporaryFile(mode='w+') as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True)
+        try:
+            for line in proc.stdout:
+                key, _, value = line.strip().partition('=')
+                # out_time_ms is in microseconds despite its name
+                if key == 'out_time_ms' and value.isdigit() and duration:
+                    on_progress(min(1.0, int(value) / 1e6 / duration))
+                elif key == 'progress' and value == 'end':
+                    on_progress(1.0)
+            proc.wait()
+        finally:
+            # Also reached on SIGTERM (job cancelled): never leave ffmpeg behind
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        if proc.returncode != 0:
+            err.seek(0)
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=err.read())
+
+def _reencode(input_path, output_path, t_in, t_out, audio, stream=None, extra=()):
+    """
+    Frame-accurate re-encode of [t_in, t_out); video only unless audio is set.
+    stream is the "video" entry of video_utils.get_video_info(), used to match
+    the source codec, profile and pixel format.
+    """
+    encoder = SMART_CUT_ENCODERS.get((stream or {}).get('codec'), 'libx264')
+    cmd = ['ffmpeg', '-y', '-ss', str(t_in), '-i', input_path, '-t', str(t_out - t_in),
+           '-map', '0:v:0', '-c:v', encoder, '-preset', REENCODE_PRESET, '-crf', REENCODE_CRF]
+    if stream and stream.get('pixFmt'):
+        cmd += ['-pix_fmt', stream['pixFmt']]
+    if stream and stream.get('codec') == 'h264' and stream.get('profile'):
+        # "Constrained Baseline" -> baseline, "High" -> high, ...
+        cmd += ['-profile:v', stream['profile'].lower().replace('constrained ', '')]
+    cmd += ['-map', '0:a?', '-c:a', 'aac'] if audio else ['-an']
+    _run_ffmpeg(cmd + list(extra) + _mp4_flags(output_path) + [output_path])
+
+def _smart_cut(input_path, output_path, t_in, t_out):
+    """
+    Frame-accurate cut at close to stream-copy cost: re-encode [t_in, k1) and
+    [k2, t_out), where k1/k2 are the first/last keyframes inside the range,
+    stream-copy [k1, k2), join the video pieces and mux the source audio,
+    which is copied as a single piece.
+
+    Falls back to a full re-encode when the codec has no compatible encoder
+    or the range holds no complete GOP, since there is nothing to copy then.
+    """
+    # Keyframes come from the cached index, so planning the cut costs no scan
+    info = get_video_info(input_path)
+    validate_bounds(info, t_in, t_out)
+    stream = info["video"] or {}
+    codec = stream.get('codec')
+    keyframes = keyframes_between(info, t_in, t_out, FRAME_EPSILON)
+    if codec not in SMART_CUT_ENCODERS or len(keyframes) < 2:
+        _reencode(input_path, output_path, t_in, t_out, audio=True, stream=stream)
+        return
+
+    k1, k2 = keyframes[0], keyframes[-1]
+    ts_args = ['-f', 'mpegts']
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or None) as tmp:
+        pieces = []
+        if k1 - t_in > FRAME_EPSILON:
+            head = os.path.join(tmp, 'head.ts')
+            _reencode(input_path, head, t_in, k1, audio=False, stream=stream, extra=ts_args)
+            pieces.append(head)
+
+        middle = os.path.join(tmp, 'middle.ts')
+        _run_ffmpeg(['ffmpeg', '-y', '-ss', str(k1), '-i', input_path, '-t', str(k2 - k1),
+                     '-map', '0:v:0', '-an', '-c:v', 'copy'] + ts_args + [middle])
+        pieces.append(middle)
+
+        if t_out - k2 > FRAME_EPSILON:
+            tail = os.path.join(tmp, 'tail.ts')
+            _reencode(input_path, tail, k2, t_out, audio=False, stream=stream, extra=ts_args)
+            pieces.append(tail)
+
+        concat_list = os.path.join(tmp, 'pieces.txt')
+        with open(concat_list, 'w') as f:
+            f.writelines(f"file '{piece}'\n" for piece in pieces)
+
+        _run_ffmpeg([
+            'ffmpeg', '-y',
+            '-f', 'concat', '-safe', '0', '-i', concat_list,
+            '-ss', str(t_in), '-to', str(t_out), '-i', input_path,
+            '-map', '0:v:0', '-map', '1:a?', '-c', 'copy',
+            '-avoid_negative_ts', 'make_zero', *_mp4_flags(output_path), output_path
+        ])
+
+def _validate_segment(t_in, t_out, output_path):
+    """Return (t_in, t_out) as floats, raising ValueError for an unusable segment"""
+    if not output_path:
+        raise ValueError("Output path cannot be empty")
+    t_in, t_out = float(t_in), float(t_out)
+    if t_in < 0 or t_out <= t_in:
+        raise ValueError(f"Invalid segment {t_in}-{t_out}")
+    return t_in, t_out
+
+def _batch_command(input_path, segments):
+    """
+    One ffmpeg command cutting every segment dict ("t_in", "t_out", "output"):
+    the input is opened once per segment with that segment's own input-side
+    seek, and each output copies from its own input. ffmpeg therefore opens and
+    probes the file once per segment; only the process start is shared.
+    """
+    cmd = ['ffmpeg', '-y']
+    for segment in segments:
+        cmd += _copy_input(input_path, segment["t_in"], segment["t_out"])
+    for index, segment in enumerate(segments):
+        cmd += _copy_output(index, segment["output"])
+    return cmd
+
+def trim_segments(input_path, segments, on_progress=None, mode='copy'):
+    """
+    Cut several (t_in, t_out, output_path) segments out of one input with a
+    single ffmpeg process.
+
+    Every segment is a separate ffmpeg output that stream-copies its own time
+    window from its own seek of the input, the same seek trim_video() does, so
+    a segment starts on the same keyframe whether it is cut alone or in a
+    batch, and nothing outside the segments is read. The input is still opened
+    and probed once per segment; what the batch saves is one ffmpeg start per
+    segment. A single input with output-side seeks would open it once, but
+    under stream copy those cuts would not start on a keyframe. If the batch
+    run fails (e.g. one output path is not writable) each segment is retried
+    on its own with trim_video(), so one bad segment does not fail the others.
+
+    Returns one dict per segment, in order:
+    {"output", "t_in", "t_out", "ok", "bytes", "completedMs", "error"}
+    where completedMs is when the segment's file was last written, measured
+    from the start of the batch. on_progress(fraction) is called as ffmpeg
+    advances through the batch.
+
+    The re-encoding modes ('smart', 'accurate') do not batch at all: every
+    segment is cut by its own trim_video() call, i.e. one or more ffmpeg
+    processes per segment.
+    """
+    results = []
+    valid = []
+    for t_in, t_out, output_path in segments:
+        result = {"output": output_path, "t_in": t_in, "t_out": t_out,
+                  "ok": False, "bytes": 0, "completedMs": None, "error": None}
+        try:
+            result["t_in"], result["t_out"] = _validate_segment(t_in, t_out, output_path)
+            valid.append(result)
+        except (TypeError, ValueError) as e:
+            result["error"] = str(e)
+        results.append(result)
+
+    if not os.path.exists(input_path):
+        for result in valid:
+            result["error"] = f"Input file does not exist: {input_path}"
+        return results
+    # Bounds are checked against the cached probe only; no ffprobe run here
+    info = cached_video_info(input_path)
+    if info is not None:
+        for result in list(valid):
+            try:
+                validate_bounds(info, result["t_in"], result["t_out"])
+            except ValueError as e:
+                result["error"] = str(e)
+                valid.remove(result)
+
+    if not valid:
+        return results
+
+    for result in valid:
+        os.makedirs(os.path.dirname(result["output"]) or ".", exist_ok=True)
+
+    cmd = _batch_command(input_path, valid)
+
+    started = time.time()
+    single_pass = mode == 'copy'
+    batch_error = None
+    if single_pass:
+        try:
+            # The outputs advance together; the longest one finishes last
+            _run_ffmpeg(cmd, max(result["t_out"] - result["t_in"] for result in valid), on_progress)
+        except subprocess.CalledProcessError as e:
+            batch_error = e.stderr
+        except OSError as e:
+            batch_error = str(e)
+    else:
+        for i, result in enumerate(valid):
+            result["ok"] = trim_video(input_path, result["output"], result["t_in"], result["t_out"], mode)
+            if not result["ok"]:
+                result["error"] = "Trim failed"
+            if on_progress:
+                on_progress((i + 1) / len(valid))
+
+    if batch_error is not None:
+        print(f"FFmpeg batch error, retrying segments one by one: {batch_error}", file=sys.stderr)
+        for result in valid:
+            result["ok"] = trim_video(input_path, result["output"], result["t_in"], result["t_out"])
+            if not result["ok"]:
+                result["error"] = "Trim failed"
+
+    for result in valid:
+        try:
+            st = os.stat(result["output"])
+        except OSError:
+            result["ok"] = False
+            result["error"] = result["error"] or "Output was not written"
+            continue
+        result["bytes"] = st.st_size
+        result["completedMs"] = round(max(0.0, st.st_mtime - started) * 1000, 1)
+        if single_pass and batch_error is None:
+            result["ok"] = st.st_size > 0
+            if not result["ok"]:
+                result["error"] = "Output is empty"
+
+    return results
+
+def _read_segments(source):
+    """Load [{"t_in", "t_out", "output"}, ...] from a JSON file path or '-' for stdin"""
+    if source == '-':
+        data = json.load(sys.stdin)
+    else:
+        with open(source) as f:
+            data = json.load(f)
+    return [(seg["t_in"], seg["t_out"], seg["output"]) for seg in data]
+
+def _print_progress():
+    """Progress callback for --progress: one JSON event per whole percent"""
+    last = [-1]
+
+    def report(fraction):
+        percent = int(fraction * 100)
+        if percent > last[0]:
+            last[0] = percent
+            print(json.dumps({"event": "progress", "progress": round(fraction, 3)}), flush=True)
+    return report
+
 if __name__ == "__main__":
+    # Turn SIGTERM into SystemExit so a cancelled job also stops its ffmpeg
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    on_progress = None
+    if "--progress" in sys.argv:
+        sys.argv.remove("--progress")
+        on_progress = _print_progress()
+
+    mode = 'copy'
+    if "--mode" in sys.argv:
+        idx = sys.argv.index("--mode")
+        mode = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else ''
+        del sys.argv[idx:idx + 2]
+        if mode not in TRIM_MODES:
+            print(f"Unknown trim mode: {mode} (expected one of {', '.join(TRIM_MODES)})", file=sys.stderr)
+            sys.exit(1)
+
+    if len(sys.argv) in (3, 4) and sys.argv[1] == "--batch":
+        segments = _read_segments(sys.argv[3] if len(sys.argv) == 4 else '-')
+        started = time.perf_counter()
+        results = trim_segments(sys.argv[2], segments, on_progress, mode)
+        print(json.dumps({
+            "segments": results,
+            "elapsedMs": round((time.perf_counter() - started) * 1000, 1)
+        }))
+        sys.exit(0 if results and all(r["ok"] for r in results) else 1)
+
     if len(sys.argv) != 5:
-        print("Usage: python trim_video.py <input> <output> <start_time> <end_time>", file=sys.stderr)
+        print("Usage: python trim_video.py [--mode copy|smart|accurate] <input> <output> <start_time> <end_time>",
+              file=sys.stderr)
+        print("       python trim_video.py [--mode ...] --batch [--progress] <input> [segments.json]"
+              "  (JSON on stdin if omitted)", file=sys.stderr)
         sys.exit(1)
     
     input_path = sys.argv[1]
@@ -56,7 +397,7 @@ if __name__ == "__main__":
     t_in = float(sys.argv[3])
     t_out = float(sys.argv[4])
     
-    if trim_video(input_path, output_path, t_in, t_out):
+    if trim_video(input_path, output_path, t_in, t_out, mode):
         sys.exit(0)
     else:
         sys.exit(1)
\ No newline at end of file
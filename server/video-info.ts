@@ -0,0 +1,102 @@
+import { spawn } from "child_process";
+import path from "path";
+import fs from "fs";
+
+// Node side of server/video_utils.py. Videos are probed once by the Python
+// helper, which writes .probe/<name>.json next to the file; readVideoInfo()
+// reads that sidecar directly, so checking a video's duration or keyframes
+// does not start a process.
+
+const VIDEO_UTILS_SCRIPT = path.join("server", "video_utils.py");
+const PROBE_VERSION = 2; // PROBE_VERSION in video_utils.py
+const SIDECAR_DIR = ".probe";
+
+export interface VideoInfo {
+  duration: number | null;
+  bitRate: number | null;
+  format: string | null;
+  video: {
+    codec: string;
+    profile?: string;
+    width: number;
+    height: number;
+    fps: number | null;
+    pixFmt?: string;
+    timeBase?: string;
+    bitRate: number | null;
+  } | null;
+  audio: {
+    codec: string;
+    sampleRate: number | null;
+    channels: number;
+  } | null;
+  keyframes: number[];
+}
+
+// Probes already running, so concurrent callers share one ffprobe
+const inFlight = new Map<string, Promise<VideoInfo>>();
+
+function sidecarPath(videoPath: string): string {
+  const resolved = path.resolve(videoPath);
+  return path.join(path.dirname(resolved), SIDECAR_DIR, `${path.basename(resolved)}.json`);
+}
+
+export async function readVideoInfo(videoPath: string): Promise<VideoInfo | null> {
+  try {
+    const [stat, raw] = await Promise.all([
+      fs.promises.stat(videoPath, { bigint: true }),
+      fs.promises.readFile(sidecarPath(videoPath), "utf-8"),
+    ]);
+    const entry = JSON.parse(raw);
+    const key = entry.key ?? {};
+    const current =
+      entry.version === PROBE_VERSION &&
+      key.name === path.basename(videoPath) &&
+      // Written as a string: a JSON number would round nanoseconds
+      key.mtime_ns === stat.mtimeNs.toString() &&
+      key.size === Number(stat.size);
+    return current ? entry.info : null;
+  } catch {
+    return null;
+  }
+}
+
+export function probeVideo(videoPath: string): Promise<VideoInfo> {
+  const running = inFlight.get(videoPath);
+  if (running) return running;
+
+  const probe = new Promise<VideoInfo>((resolve, reject) => {
+    const child = spawn("python3", [VIDEO_UTILS_SCRIPT, videoPath]);
+    let output = "";
+    let error = "";
+    child.stdout.on("data", (data) => {
+      output += data.toString();
+    });
+    child.stderr.on("data", (data) => {
+      error += data.toString();
+    });
+    child.on("error", reject);
+    child.on("close", (code) => {
+      if (code !== 0) {
+        return reject(new Error(error.trim() || `video_utils.py exited with code ${code}`));
+      }
+      try {
+        resolve(JSON.parse(output));
+      } catch (e) {
+        reject(e as Error);
+      }
+    });
+  }).finally(() => inFlight.delete(videoPath));
+
+  inFlight.set(videoPath, probe);
+  return probe;
+}
+
+// Cached info, probing the video first if there is no current sidecar
+export async function getVideoInfo(videoPath: string): Promise<VideoInfo> {
+  return (await readVideoInfo(videoPath)) ?? probeVideo(videoPath);
+}
+
+export function removeVideoInfo(videoPath: string) {
+  fs.unlink(sidecarPath(videoPath), () => {});
+}
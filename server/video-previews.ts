@@ -0,0 +1,132 @@
+import { spawn } from "child_process";
+import path from "path";
+import fs from "fs";
+import { getVideoInfo } from "./video-info";
+
+// Background preview pipeline for uploaded videos: `video_previews.py` makes
+// a 720p faststart proxy, a poster thumbnail and a sprite sheet. At most
+// PREVIEW_WORKERS videos are processed at once, the rest wait FIFO. The
+// manifest written next to the previews is the source of truth once a
+// video is done, so finished previews survive a server restart: only queued,
+// running and failed videos are tracked in memory. A failed video is queued
+// again when its state is asked for PREVIEW_RETRY_MS after the failure.
+//
+// The video is probed (or its probe sidecar read) before the script starts,
+// so video_previews.py reads the sidecar instead of running ffprobe again.
+
+const PREVIEW_SCRIPT = path.join("server", "video_previews.py");
+const WORKERS = parseInt(process.env.PREVIEW_WORKERS || "1");
+const RETRY_MS = parseInt(process.env.PREVIEW_RETRY_MS || "60000");
+
+export type PreviewStatus = "queued" | "running" | "ready" | "failed" | "missing";
+
+export interface PreviewManifest {
+  source: string;
+  proxy: { file: string } | null;
+  poster: { file: string } | null;
+  sprite: { file: string; columns: number; rows: number; tileWidth: number; interval: number } | null;
+  errors: Record<string, string>;
+}
+
+class PreviewQueue {
+  private queue: string[] = [];
+  private running = 0;
+  private status = new Map<string, { status: PreviewStatus; error?: string; failedAt?: number }>();
+
+  constructor(private previewDir: string) {}
+
+  enqueue(videoPath: string) {
+    const current = this.status.get(videoPath);
+    if (current?.status === "queued" || current?.status === "running") return;
+    if (current?.failedAt !== undefined && Date.now() - current.failedAt < RETRY_MS) return;
+    this.status.set(videoPath, { status: "queued" });
+    this.queue.push(videoPath);
+    this.drain();
+  }
+
+  filePath(file: string): string {
+    return path.join(this.previewDir, file);
+  }
+
+  async manifest(videoPath: string): Promise<PreviewManifest | null> {
+    try {
+      const raw = await fs.promises.readFile(this.filePath(`${path.basename(videoPath)}.previews.json`), "utf-8");
+      return JSON.parse(raw);
+    } catch {
+      return null;
+    }
+  }
+
+  async state(videoPath: string): Promise<{ status: PreviewStatus; error?: string; manifest: PreviewManifest | null }> {
+    const pending = this.status.get(videoPath);
+    if (pending?.failedAt !== undefined && Date.now() - pending.failedAt >= RETRY_MS) {
+      this.enqueue(videoPath);
+      return { status: "queued", manifest: null };
+    }
+    if (pending) {
+      return { status: pending.status, error: pending.error, manifest: null };
+    }
+    const manifest = await this.manifest(videoPath);
+    return { status: manifest ? "ready" : "missing", manifest };
+  }
+
+  remove(videoPath: string) {
+    this.queue = this.queue.filter((queued) => queued !== videoPath);
+    this.status.delete(videoPath);
+    const name = path.basename(videoPath);
+    for (const suffix of [".proxy.mp4", ".poster.jpg", ".sprite.jpg", ".previews.json"]) {
+      fs.unlink(this.filePath(`${name}${suffix}`), () => {});
+    }
+  }
+
+  metrics() {
+    return { workers: WORKERS, running: this.running, queued: this.queue.length };
+  }
+
+  private drain() {
+    while (this.running < WORKERS && this.queue.length) {
+      this.run(this.queue.shift()!);
+    }
+  }
+
+  private async run(videoPath: string) {
+    this.running++;
+    this.status.set(videoPath, { status: "running" });
+
+    let code: number | null = 1;
+    let error = "";
+    try {
+      // Shares the upload's probe if it is still running
+      await getVideoInfo(videoPath);
+      code = await new Promise<number | null>((resolve) => {
+        const child = spawn("python3", [PREVIEW_SCRIPT, videoPath, this.previewDir]);
+        child.stderr.on("data", (data) => {
+          error += data.toString();
+        });
+        child.on("error", (err) => {
+          error = err.message;
+        });
+        child.on("close", resolve);
+      });
+    } catch (err) {
+      error = (err as Error).message;
+    }
+
+    this.running--;
+    // The video may have been deleted while its previews were being made
+    if (this.status.has(videoPath)) {
+      if (code === 0) {
+        // The manifest is the record from now on
+        this.status.delete(videoPath);
+      } else {
+        console.warn(`Preview generation failed for ${path.basename(videoPath)}:`, error.trim());
+        this.status.set(videoPath, { status: "failed", error: error.trim(), failedAt: Date.now() });
+      }
+    } else {
+      this.remove(videoPath);
+    }
+    this.drain();
+  }
+}
+
+export const previewQueue = new PreviewQueue(path.join(process.cwd(), "uploads", "previews"));
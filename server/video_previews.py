@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Post-upload preview generation for lift videos
+
+For an uploaded video, writes next to it in a previews directory:
+- <name>.proxy.mp4   H.264 720p low-bitrate proxy with +faststart, for
+                     scrubbing on mobile and forwarding instead of the original
+- <name>.poster.jpg  poster thumbnail
+- <name>.sprite.jpg  sprite sheet of evenly spaced preview frames
+- <name>.previews.json  manifest describing the files above
+
+The proxy is skipped when the source is already a small H.264 file, since
+re-encoding it would not save anything.
+"""
+import sys
+import os
+import json
+import subprocess
+from video_utils import get_video_info
+
+PROXY_HEIGHT = 720
+PROXY_CRF = os.environ.get("PREVIEW_PROXY_CRF", "28")
+PROXY_MAXRATE = os.environ.get("PREVIEW_PROXY_MAXRATE", "1500k")
+# Sources at or below this bitrate and height are served as they are
+PROXY_SKIP_BITRATE = 2_000_000
+
+POSTER_HEIGHT = 480
+SPRITE_COLUMNS = 5
+SPRITE_ROWS = 5
+SPRITE_TILE_WIDTH = 160
+
+MANIFEST_VERSION = 1
+
+
+def preview_paths(video_path, out_dir):
+    name = os.path.basename(video_path)
+    return {
+        "proxy": os.path.join(out_dir, f"{name}.proxy.mp4"),
+        "poster": os.path.join(out_dir, f"{name}.poster.jpg"),
+        "sprite": os.path.join(out_dir, f"{name}.sprite.jpg"),
+        "manifest": os.path.join(out_dir, f"{name}.previews.json"),
+    }
+
+
+def _run(cmd):
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def _needs_proxy(info):
+    video = info.get("video") or {}
+    return not (
+        video.get("codec") == "h264"
+        and (video.get("height") or 0) <= PROXY_HEIGHT
+        and (info.get("bitRate") or PROXY_SKIP_BITRATE + 1) <= PROXY_SKIP_BITRATE
+    )
+
+
+def make_proxy(input_path, output_path):
+    """720p (never upscaled) H.264/AAC proxy with the moov atom up front"""
+    tmp_path = f"{output_path}.tmp.mp4"
+    _run([
+        'ffmpeg', '-y', '-i', input_path,
+        '-map', '0:v:0', '-map', '0:a?',
+        '-vf', f"scale=-2:'min({PROXY_HEIGHT},ih)'",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', PROXY_CRF,
+        '-maxrate', PROXY_MAXRATE, '-bufsize', '3000k',
+        '-pix_fmt', 'yuv420p', '-profile:v', 'high',
+        '-c:a', 'aac', '-b:a', '96k', '-ac', '2',
+        '-movflags', '+faststart',
+        tmp_path
+    ])
+    os.replace(tmp_path, output_path)
+
+
+def make_poster(input_path, output_path, at):
+    _run([
+        'ffmpeg', '-y', '-ss', str(at), '-i', input_path,
+        '-frames:v', '1', '-vf', f"scale=-2:'min({POSTER_HEIGHT},ih)'", '-q:v', '3',
+        output_path
+    ])
+
+
+def make_sprite(input_path, output_path, duration):
+    """
+    One JPEG holding SPRITE_COLUMNS x SPRITE_ROWS frames taken every
+    duration / tiles seconds. Returns the layout a player needs to map a
+    time to a tile.
+    """
+    tiles = SPRITE_COLUMNS * SPRITE_ROWS
+    interval = max(duration / tiles, 0.04)
+    _run([
+        'ffmpeg', '-y', '-i', input_path,
+        '-vf', f"fps=1/{interval},scale={SPRITE_TILE_WIDTH}:-2,tile={SPRITE_COLUMNS}x{SPRITE_ROWS}",
+        '-frames:v', '1', '-q:v', '5',
+        output_path
+    ])
+    return {
+        "columns": SPRITE_COLUMNS,
+        "rows": SPRITE_ROWS,
+        "tileWidth": SPRITE_TILE_WIDTH,
+        "interval": round(interval, 3),
+    }
+
+
+def generate_previews(video_path, out_dir):
+    """Create the proxy, poster and sprite sheet and return the manifest"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = preview_paths(video_path, out_dir)
+    info = get_video_info(video_path)
+    duration = info.get("duration") or 0.0
+
+    manifest = {"version": MANIFEST_VERSION, "source": os.path.basename(video_path),
+                "proxy": None, "poster": None, "sprite": None, "errors": {}}
+
+    # Cheap stills first, so they are usable while the proxy is still encoding
+    steps = [("poster", lambda: make_poster(video_path, paths["poster"], min(1.0, duration / 10)))]
+    if duration:
+        steps.append(("sprite", lambda: make_sprite(video_path, paths["sprite"], duration)))
+    if _needs_proxy(info):
+        steps.append(("proxy", lambda: make_proxy(video_path, paths["proxy"])))
+
+    for name, step in steps:
+        try:
+            layout = step()
+        except subprocess.CalledProcessError as e:
+            manifest["errors"][name] = (e.stderr or "").strip()[-500:]
+            continue
+        manifest[name] = {"file": os.path.basename(paths[name]), **(layout or {})}
+
+    tmp_path = f"{paths['manifest']}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp_path, paths["manifest"])
+    return manifest
+
+
+def remove_previews(video_path, out_dir):
+    for path in preview_paths(video_path, out_dir).values():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python video_previews.py <video> [out_dir]", file=sys.stderr)
+        sys.exit(1)
+
+    video_path = sys.argv[1]
+    out_dir = sys.argv[2] if len(sys.argv) == 3 else os.path.join(os.path.dirname(video_path), "previews")
+    try:
+        manifest = generate_previews(video_path, out_dir)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        print(f"Error: {getattr(e, 'stderr', None) or e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(manifest))
+    sys.exit(0 if manifest["poster"] or manifest["proxy"] else 1)
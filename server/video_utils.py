@@ -1 +1,197 @@
-# Placeholder file - video trimming temporarily disabled
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+Probe-once video metadata with an on-disk keyframe index
+
+get_video_info() runs ffprobe once per file for duration, bitrate, codecs,
+resolution and the keyframe timestamps of the first video stream, and stores
+the result in a sidecar JSON file (.probe/<name>.json next to the video).
+The sidecar is keyed by file name, mtime and size, so a replaced file is
+probed again while repeated trims of the same upload reuse it.
+"""
+import sys
+import os
+import json
+import bisect
+import subprocess
+
+# Bump when the info layout changes so old sidecars are ignored
+PROBE_VERSION = 2
+SIDECAR_DIR = ".probe"
+
+# Trim bounds may overshoot the probed duration by this much (rounding in
+# the client's player) before they are rejected
+DURATION_TOLERANCE = 0.05
+
+
+def sidecar_path(video_path):
+    directory, name = os.path.split(os.path.abspath(video_path))
+    return os.path.join(directory, SIDECAR_DIR, f"{name}.json")
+
+
+def _file_key(video_path):
+    st = os.stat(video_path)
+    # mtime_ns as a string: past 2**53 a JSON number loses digits in JavaScript,
+    # and server/video-info.ts compares it with the exact bigint mtime
+    return {"name": os.path.basename(video_path), "mtime_ns": str(st.st_mtime_ns), "size": st.st_size}
+
+
+def _parse_rate(rate):
+    """ffprobe frame rates are fractions like '30000/1001'"""
+    num, _, den = str(rate).partition('/')
+    try:
+        return round(float(num) / float(den or 1), 3)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def probe_metadata(video_path):
+    """Container and stream metadata from a single ffprobe call"""
+    out = subprocess.run([
+        'ffprobe', '-v', 'error', '-show_format', '-show_streams', '-of', 'json', video_path
+    ], capture_output=True, text=True, check=True)
+    data = json.loads(out.stdout)
+    fmt = data.get('format', {})
+    streams = data.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+
+    info = {
+        "duration": _to_float(fmt.get('duration')),
+        "bitRate": _to_int(fmt.get('bit_rate')),
+        "format": fmt.get('format_name'),
+        "video": None,
+        "audio": None,
+    }
+    if video:
+        info["video"] = {
+            "codec": video.get('codec_name'),
+            "profile": video.get('profile'),
+            "width": video.get('width'),
+            "height": video.get('height'),
+            "fps": _parse_rate(video.get('avg_frame_rate') or video.get('r_frame_rate')),
+            "pixFmt": video.get('pix_fmt'),
+            "timeBase": video.get('time_base'),
+            "bitRate": _to_int(video.get('bit_rate')),
+        }
+    if audio:
+        info["audio"] = {
+            "codec": audio.get('codec_name'),
+            "sampleRate": _to_int(audio.get('sample_rate')),
+            "channels": audio.get('channels'),
+        }
+    return info
+
+
+def probe_keyframes(video_path, start=None, end=None):
+    """
+    Sorted keyframe timestamps of the first video stream, optionally limited
+    to [start, end]. Only packet flags are read, nothing is decoded.
+    """
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0']
+    if start is not None or end is not None:
+        cmd += ['-read_intervals', f"{max(0.0, start or 0.0)}%{'' if end is None else end}"]
+    cmd += ['-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    keyframes = []
+    for line in out.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            keyframes.append(float(pts_time))
+    return sorted(keyframes)
+
+
+def cached_video_info(video_path):
+    """The sidecar info if it is current for this file, else None. Never spawns ffprobe."""
+    try:
+        key = _file_key(video_path)
+        with open(sidecar_path(video_path), encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("version") != PROBE_VERSION or entry.get("key") != key:
+        return None
+    return entry.get("info")
+
+
+def get_video_info(video_path):
+    """Metadata plus keyframe index, probed on first use and then read from the sidecar"""
+    info = cached_video_info(video_path)
+    if info is not None:
+        return info
+
+    key = _file_key(video_path)
+    info = probe_metadata(video_path)
+    info["keyframes"] = probe_keyframes(video_path) if info["video"] else []
+
+    path = sidecar_path(video_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": PROBE_VERSION, "key": key, "info": info}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # The info is still valid, it just is not cached
+        print(f"Could not write probe sidecar {path}: {e}", file=sys.stderr)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return info
+
+
+def remove_sidecar(video_path):
+    """Drop the cached info of a deleted video"""
+    try:
+        os.remove(sidecar_path(video_path))
+    except OSError:
+        pass
+
+
+def validate_bounds(info, t_in, t_out):
+    """Raise ValueError when [t_in, t_out] does not fit inside the video"""
+    if t_in < 0 or t_out <= t_in:
+        raise ValueError(f"Invalid segment {t_in}-{t_out}")
+    duration = info.get("duration")
+    if duration is not None and t_in >= duration:
+        raise ValueError(f"Segment starts after the end of the video ({duration:.2f}s)")
+    if duration is not None and t_out > duration + DURATION_TOLERANCE:
+        raise ValueError(f"Segment ends after the end of the video ({duration:.2f}s)")
+
+
+def keyframe_before(info, t):
+    """Last keyframe at or before t (where a stream-copy cut starting at t really starts)"""
+    keyframes = info.get("keyframes") or []
+    idx = bisect.bisect_right(keyframes, t + 1e-6)
+    return keyframes[idx - 1] if idx else None
+
+
+def keyframes_between(info, start, end, epsilon=0.001):
+    """Keyframes inside [start, end], as used to plan a smart cut"""
+    keyframes = info.get("keyframes") or []
+    lo = bisect.bisect_left(keyframes, start - epsilon)
+    hi = bisect.bisect_right(keyframes, end + epsilon)
+    return keyframes[lo:hi]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python video_utils.py <video>", file=sys.stderr)
+        sys.exit(1)
+    try:
+        print(json.dumps(get_video_info(sys.argv[1])))
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        print(f"Error: {getattr(e, 'stderr', None) or e}", file=sys.stderr)
+        sys.exit(1)
@@ -17,6 +17,10 @@ export interface Exercise {
     };
   };
   notes?: string;
+  // Extra columns of the precise parser's table layout
+  scarico?: string;
+  recupero?: string;
+  note?: string;
 }
 
 export interface PDFPage {
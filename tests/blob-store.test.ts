@@ -0,0 +1,53 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import fs from "fs";
+import os from "os";
+import path from "path";
+import { Readable } from "stream";
+import type { Request } from "express";
+
+// blob-store.ts keeps its files under process.cwd()/uploads, so the module is
+// loaded from a scratch directory
+process.chdir(fs.mkdtempSync(path.join(os.tmpdir(), "blob-store-")));
+const { blobStore } = await import("../server/blob-store");
+
+// Runs an upload through the multer storage engine
+function upload(data: Buffer, originalname: string): Promise<any> {
+  const file = { stream: Readable.from([data]), originalname } as unknown as Express.Multer.File;
+  return new Promise((resolve, reject) => {
+    blobStore.storageEngine()._handleFile({} as Request, file, (error, info) => (error ? reject(error) : resolve(info)));
+  });
+}
+
+test("a duplicate upload shares the blob until its last reference is released", async () => {
+  const video = Buffer.from("the same squat, uploaded twice");
+  const first = await upload(video, "squat.mp4");
+  const second = await upload(video, "Squat copy.MP4");
+
+  assert.equal(first.deduplicated, false);
+  assert.equal(second.deduplicated, true);
+  assert.equal(second.filename, first.filename);
+  assert.equal(blobStore.references(first.filename), 2);
+
+  // What the probe and the preview queue leave next to a blob
+  const blobPath = blobStore.filePath(first.filename);
+  const name = path.basename(blobPath);
+  const sidecar = path.join(path.dirname(blobPath), ".probe", `${name}.json`);
+  const poster = path.join("uploads", "previews", `${name}.poster.jpg`);
+  const manifest = path.join("uploads", "previews", `${name}.previews.json`);
+  fs.mkdirSync(path.dirname(sidecar), { recursive: true });
+  fs.mkdirSync(path.dirname(poster), { recursive: true });
+  for (const file of [sidecar, poster, manifest]) fs.writeFileSync(file, "{}");
+
+  assert.equal(blobStore.release(first.filename), false);
+  assert.equal(blobStore.references(first.filename), 1);
+  assert.deepEqual(fs.readFileSync(blobPath), video);
+
+  assert.equal(blobStore.release(first.filename), true);
+  assert.equal(blobStore.references(first.filename), 0);
+  // Sidecar and previews are unlinked in the background
+  await new Promise((resolve) => setTimeout(resolve, 50));
+  for (const file of [blobPath, sidecar, poster, manifest]) {
+    assert.equal(fs.existsSync(file), false, file);
+  }
+});
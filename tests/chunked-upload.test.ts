@@ -0,0 +1,120 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import crypto from "crypto";
+import fs from "fs";
+import os from "os";
+import path from "path";
+import { Readable } from "stream";
+import type { Request } from "express";
+
+// blob-store.ts keeps its files under process.cwd()/uploads, so the modules
+// are loaded from a scratch directory
+process.chdir(fs.mkdtempSync(path.join(os.tmpdir(), "chunked-upload-")));
+const { ChunkedUploads, UploadError } = await import("../server/chunked-upload");
+
+const VIDEO = { originalName: "squat.mp4", mimeType: "video/mp4", purpose: "video" as const, fields: {} };
+
+// A PATCH body that arrives in full
+function body(data: Buffer): Request {
+  return Readable.from([data]) as unknown as Request;
+}
+
+// A PATCH body whose connection drops after the first bytes: "close" without "end"
+function dropped(data: Buffer): Request {
+  let sent = false;
+  return new Readable({
+    read() {
+      if (sent) return void this.destroy();
+      sent = true;
+      this.push(data);
+    },
+  }) as unknown as Request;
+}
+
+function sha256(data: Buffer): string {
+  return crypto.createHash("sha256").update(data).digest("hex");
+}
+
+function rejectsWith(promise: Promise<unknown>, status: number, offset: number) {
+  return assert.rejects(promise, (e) => e instanceof UploadError && e.status === status && e.offset === offset);
+}
+
+test("chunks must start at the current offset", async () => {
+  const uploads = new ChunkedUploads();
+  const data = crypto.randomBytes(10);
+  const { id } = uploads.create({ ...VIDEO, size: data.length });
+
+  assert.deepEqual(await uploads.append(id, 0, body(data.subarray(0, 4))), { offset: 4 });
+  await rejectsWith(uploads.append(id, 0, body(data.subarray(0, 4))), 409, 4);
+  await rejectsWith(uploads.append(id, 6, body(data.subarray(6))), 409, 4);
+
+  const { offset, completed } = await uploads.append(id, 4, body(data.subarray(4)));
+  assert.equal(offset, 10);
+  assert.equal(completed.hash, sha256(data));
+  assert.deepEqual(fs.readFileSync(completed.path), data);
+  assert.equal(uploads.get(id), undefined);
+});
+
+test("a dropped chunk keeps what arrived and the upload resumes from there", async () => {
+  const uploads = new ChunkedUploads();
+  const data = crypto.randomBytes(8);
+  const { id } = uploads.create({ ...VIDEO, size: data.length });
+
+  assert.deepEqual(await uploads.append(id, 0, dropped(data.subarray(0, 5))), { offset: 5 });
+  assert.equal(uploads.get(id).offset, 5);
+
+  const { completed } = await uploads.append(id, 5, body(data.subarray(5)));
+  assert.equal(completed.hash, sha256(data));
+});
+
+test("bytes past the declared size are refused", async () => {
+  const uploads = new ChunkedUploads();
+  const { id } = uploads.create({ ...VIDEO, size: 4 });
+
+  await rejectsWith(uploads.append(id, 0, body(crypto.randomBytes(6))), 413, 4);
+  assert.equal(uploads.get(id).offset, 4);
+});
+
+test("unfinished uploads resume after a restart", async () => {
+  const data = crypto.randomBytes(12);
+  const before = new ChunkedUploads();
+  const { id } = before.create({ ...VIDEO, size: data.length });
+  await before.append(id, 0, body(data.subarray(0, 7)));
+
+  // A new instance reads the offset back from the staged file; the hash
+  // state is gone, so completion hashes the file
+  const after = new ChunkedUploads();
+  assert.equal(after.get(id).offset, 7);
+  const { completed } = await after.append(id, 7, body(data.subarray(7)));
+  assert.equal(completed.hash, sha256(data));
+  assert.equal(completed.size, data.length);
+});
+
+test("a file the probe reads as audio only is refused before it is stored", async () => {
+  // A stand-in ffprobe: files starting with "AUDIO" have no video stream
+  const bin = fs.mkdtempSync(path.join(os.tmpdir(), "fake-ffprobe-"));
+  fs.writeFileSync(path.join(bin, "ffprobe"), `#!/usr/bin/env python3
+import json, sys
+with open(sys.argv[-1], "rb") as f:
+    audio = f.read(5) == b"AUDIO"
+streams = [{"codec_type": "audio"}] if audio else [{"codec_type": "video", "codec_name": "h264", "width": 640, "height": 360}]
+print(json.dumps({"format": {"format_name": "mov,mp4", "duration": "3.0"}, "streams": streams}))
+`, { mode: 0o755 });
+  const savedPath = process.env.PATH;
+  process.env.PATH = `${bin}${path.delimiter}${savedPath}`;
+  try {
+    const uploads = new ChunkedUploads();
+    const audio = Buffer.concat([Buffer.from("AUDIO"), crypto.randomBytes(11)]);
+    const rejected = uploads.create({ ...VIDEO, size: audio.length });
+    await assert.rejects(uploads.append(rejected.id, 0, body(audio)), (e) => e instanceof UploadError && e.status === 415);
+    assert.equal(uploads.get(rejected.id), undefined);
+    assert.equal(fs.existsSync(path.join("uploads", "blobs", `${sha256(audio)}.mp4`)), false);
+
+    const video = crypto.randomBytes(16);
+    const accepted = uploads.create({ ...VIDEO, size: video.length });
+    const { completed } = await uploads.append(accepted.id, 0, body(video));
+    assert.equal(completed.hash, sha256(video));
+  } finally {
+    process.env.PATH = savedPath;
+  }
+});
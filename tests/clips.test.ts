@@ -0,0 +1,43 @@
+import { test, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "fs";
+import os from "os";
+import path from "path";
+import type { AddressInfo } from "net";
+import express from "express";
+import { clipHandler } from "../server/clips";
+
+// uploads/ holds the clips; a *_trimmed.mp4 one level up must stay unreachable
+const root = fs.mkdtempSync(path.join(os.tmpdir(), "clips-"));
+const clipDir = path.join(root, "uploads");
+fs.mkdirSync(clipDir);
+const clip = Buffer.from(Array.from({ length: 1000 }, (_, i) => i % 256));
+fs.writeFileSync(path.join(clipDir, "squat_trimmed.mp4"), clip);
+fs.writeFileSync(path.join(root, "secret_trimmed.mp4"), "outside the clip directory");
+fs.writeFileSync(path.join(clipDir, "squat.mp4"), "an upload, not a clip");
+
+const app = express();
+app.get("/api/clips/:filename", clipHandler(clipDir));
+const server = app.listen(0);
+const base = `http://127.0.0.1:${(server.address() as AddressInfo).port}/api/clips`;
+after(() => server.close());
+
+test("a Range request gets the requested bytes with 206", async () => {
+  const response = await fetch(`${base}/squat_trimmed.mp4`, { headers: { Range: "bytes=100-199" } });
+
+  assert.equal(response.status, 206);
+  assert.equal(response.headers.get("content-range"), "bytes 100-199/1000");
+  assert.equal(response.headers.get("accept-ranges"), "bytes");
+  assert.deepEqual(Buffer.from(await response.arrayBuffer()), clip.subarray(100, 200));
+});
+
+test("only *_trimmed.mp4 files inside the clip directory are served", async () => {
+  const outside = await fetch(`${base}/..%2Fsecret_trimmed.mp4`);
+  assert.equal(outside.status, 404);
+
+  const upload = await fetch(`${base}/squat.mp4`);
+  assert.equal(upload.status, 404);
+
+  const traversal = await fetch(`${base}/..%2F..%2Fetc%2Fpasswd`);
+  assert.equal(traversal.status, 404);
+});
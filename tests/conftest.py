@@ -0,0 +1,30 @@
+"""
+Shared setup for the Python tests: the parser modules live at the repository
+root, the video/Telegram helpers in server/ and the synthetic PDF generator in
+benchmarks/. Result caches are off unless a test passes its own.
+"""
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for subdir in ("", "server", "benchmarks"):
+    path = os.path.join(REPO_ROOT, subdir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ["PDF_CACHE_DISABLED"] = "1"
+
+from synthetic_pdf import build_pdf  # noqa: E402
+
+
+@pytest.fixture
+def synthetic_pdf(tmp_path):
+    """Write build_pdf(**kwargs) to a file; returns (path, expected)"""
+    def write(name="program.pdf", **kwargs):
+        pdf_bytes, expected = build_pdf(**kwargs)
+        path = tmp_path / name
+        path.write_bytes(pdf_bytes)
+        return str(path), expected
+    return write
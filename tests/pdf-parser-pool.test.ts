@@ -0,0 +1,39 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import fs from "fs";
+import os from "os";
+import path from "path";
+
+// A stand-in worker speaking the --serve protocol: "hang.pdf" never returns,
+// anything else is answered at once with the worker's pid
+const FAKE_WORKER = `
+import json, os, sys, time
+print(json.dumps({"event": "ready", "pid": os.getpid()}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    if request.get("path") == "hang.pdf":
+        time.sleep(3600)
+    result = {"pages": [], "success": True, "pid": os.getpid()}
+    print(json.dumps({"id": request["id"], "result": result, "elapsedMs": 1}), flush=True)
+`;
+
+// Workers are started as python3 precise_pdf_parser.py from the working directory
+process.chdir(fs.mkdtempSync(path.join(os.tmpdir(), "pdf-pool-")));
+fs.writeFileSync("precise_pdf_parser.py", FAKE_WORKER);
+process.env.PDF_PARSER_WORKERS = "1";
+process.env.PDF_PARSER_TIMEOUT_MS = "500";
+const { pdfParserPool } = await import("../server/pdf-parser-pool");
+
+test("a timed-out worker is replaced and the queue moves on", async () => {
+  const first = await pdfParserPool.parse("ok.pdf");
+
+  // One worker: the second document waits behind the hung one
+  const hung = pdfParserPool.parse("hang.pdf");
+  const queued = pdfParserPool.parse("ok.pdf");
+  await assert.rejects(hung, /timed out/);
+  const after = await queued;
+
+  assert.equal(after.result.success, true);
+  assert.notEqual(after.result.pid, first.result.pid);
+  pdfParserPool.shutdown();
+});
@@ -0,0 +1,23 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import fs from "fs";
+import { decodePage, decodeResult } from "../server/pdf-parser-pool";
+
+// The rows that tests/test_result_rows.py checks pdf_result_model.py produces
+const fixture = JSON.parse(fs.readFileSync(new URL("./fixtures/rows_result.json", import.meta.url), "utf-8"));
+
+test("rows decode back into the pages they were encoded from", () => {
+  const decoded = decodeResult({ ...fixture.result, pages: fixture.rows, encoding: "rows", schema: 2 });
+
+  assert.deepEqual(decoded, { ...fixture.result, schema: 2 });
+  // Week order survives the object form as well
+  assert.deepEqual(Object.keys(decoded.pages[1].exercises[0].weeks), ["settimana_2", "settimana_1"]);
+});
+
+test("streamed page rows decode one by one", () => {
+  assert.deepEqual(fixture.rows.map(decodePage), fixture.result.pages);
+});
+
+test("results that are not row-encoded pass through", () => {
+  assert.equal(decodeResult(fixture.result), fixture.result);
+});
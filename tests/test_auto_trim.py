@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from auto_trim import PAD_SECONDS, detect_segments, to_batch_segments
+
+FPS = 5
+
+
+def _profile(pairs, bursts, cuts=()):
+    """Motion energy that is 1 inside each [start, end) pair range, with scene cuts at the given pairs"""
+    energy = np.zeros(pairs)
+    for start, end in bursts:
+        energy[start:end] = 1.0
+    mad = np.zeros(pairs)
+    mad[list(cuts)] = 100.0
+    return energy, mad
+
+
+def test_segment_spans_the_moving_frames_plus_padding():
+    energy, mad = _profile(100, [(20, 40)])
+    segment, = detect_segments(energy, mad, FPS, duration=20.0)
+    # Smoothing widens the run by a pair on each side: pairs [19, 41) are frames 19 to 41
+    assert segment["t_in"] == pytest.approx(19 / FPS - PAD_SECONDS)
+    assert segment["t_out"] == pytest.approx(41 / FPS + PAD_SECONDS)
+
+
+def test_padding_is_clipped_to_the_video():
+    energy, mad = _profile(60, [(1, 20), (45, 60)])
+    first, last = detect_segments(energy, mad, FPS, duration=12.0)
+    assert first["t_in"] == 0.0
+    assert last["t_out"] == 12.0
+
+
+def test_neighbours_split_the_gap_instead_of_overlapping():
+    # A scene cut keeps the two bursts apart although the pause is short
+    energy, mad = _profile(120, [(20, 50), (56, 90)], cuts=[53])
+    first, second = detect_segments(energy, mad, FPS, duration=24.0)
+    assert first["t_out"] == second["t_in"]
+    assert first["t_out"] == pytest.approx((51 / FPS + 55 / FPS) / 2)
+
+
+def test_short_pause_without_cut_is_bridged():
+    energy, mad = _profile(120, [(20, 50), (56, 90)])
+    segment, = detect_segments(energy, mad, FPS, duration=24.0)
+    assert segment["t_in"] == pytest.approx(19 / FPS - PAD_SECONDS)
+    assert segment["t_out"] == pytest.approx(91 / FPS + PAD_SECONDS)
+
+
+def test_flat_or_short_clips_give_no_segments():
+    assert detect_segments(*_profile(100, []), FPS, duration=20.0) == []
+    assert detect_segments(*_profile(1, [(0, 1)]), FPS, duration=0.4) == []
+    assert detect_segments(*_profile(100, [(20, 25)]), FPS, duration=20.0) == []
+
+
+def test_batch_segments_keep_confident_proposals(tmp_path):
+    segments = [{"t_in": 1.0, "t_out": 4.0, "confidence": 0.9}, {"t_in": 6.0, "t_out": 9.0, "confidence": 0.2}]
+    assert to_batch_segments(segments, str(tmp_path), "squat", min_confidence=0.5) == [
+        {"t_in": 1.0, "t_out": 4.0, "output": str(tmp_path / "squat_1_trimmed.mp4")},
+    ]
@@ -0,0 +1,39 @@
+import importlib.util
+
+import pdfplumber
+import pytest
+
+from enhanced_pdf_parser import EnhancedPDFParser
+from pdf_parser_engine import PageContext
+
+
+def test_heavy_fallbacks_skip_pages_without_rulings(synthetic_pdf):
+    path, expected = synthetic_pdf(days=2, rows=3, noise=2, seed=3)
+    table_pages = {day["pageNumber"] for day in expected["days"]}
+
+    called = []
+    fallback = EnhancedPDFParser()._table_fallback(lambda ctx: called.append(ctx.page_num))
+
+    with pdfplumber.open(path) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            fallback(PageContext(page, page_num, path))
+
+    assert called == sorted(table_pages)
+
+
+@pytest.mark.skipif(importlib.util.find_spec("tabula") is None or importlib.util.find_spec("jpype") is None,
+                    reason="tabula-py with jpype is not installed")
+def test_tabula_runs_in_process(synthetic_pdf):
+    import jpype
+
+    path, expected = synthetic_pdf(days=2, rows=3, noise=0, seed=3)
+    parser = EnhancedPDFParser()
+
+    with pdfplumber.open(path) as pdf:
+        for day in expected["days"]:
+            page_num = day["pageNumber"]
+            page = parser._extract_with_tabula(PageContext(pdf.pages[page_num - 1], page_num, path))
+            assert page is None or page.page_number == page_num
+
+    # force_subprocess=False: the JVM lives in this process and is reused
+    assert jpype.isJVMStarted()
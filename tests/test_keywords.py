@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+import pdf_keywords as kw
+from bench_keywords import CHECKS, check_equivalence, fuzz_inputs, load_inputs
+from pdf_keywords import KeywordClassifier, KeywordSet
+
+# Keywords inside other keywords ('set' in 'settimana', 'rep' in 'press') are
+# where a single-pass scan could disagree with testing each keyword
+CATEGORIES = {
+    "workout": kw.WORKOUT_KEYWORDS,
+    "table": kw.TABLE_INDICATORS,
+    "week": kw.WEEK_COLUMN_KEYWORDS,
+    "title": kw.TITLE_KEYWORDS,
+}
+
+
+def _texts(count, seed=3):
+    rng = random.Random(seed)
+    pieces = [k for keywords in CATEGORIES.values() for k in keywords] + ["x", " ", "4 x 8", "ttim", "ess"]
+    return ["".join(rng.choice(pieces)[:rng.randint(1, 12)] for _ in range(rng.randint(0, 5)))
+            for _ in range(count)]
+
+
+def test_classifier_matches_each_keyword_on_its_own():
+    classifier = KeywordClassifier(CATEGORIES)
+    for text in _texts(3000) + ["settimana", "repress", "peso weight kg", ""]:
+        expected = {label for label, keywords in CATEGORIES.items() if any(k in text for k in keywords)}
+        assert classifier.classify(text) == expected, text
+
+
+def test_keyword_set_matches_any():
+    keywords = KeywordSet(kw.TABLE_INDICATORS)
+    for text in _texts(3000, seed=4):
+        assert keywords.contains(text) == any(k in text for k in kw.TABLE_INDICATORS), text
+
+
+@pytest.mark.parametrize("source", ["corpus", "fuzz"])
+def test_parser_checks_agree_with_the_any_loops(source):
+    inputs = load_inputs(days=4) if source == "corpus" else fuzz_inputs(2000)
+    assert all(inputs[kind] for _, _, kind in CHECKS.values())
+    assert check_equivalence(inputs) == {name: 0 for name in CHECKS}
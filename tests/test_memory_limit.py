@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+import pdf_memory
+import precise_pdf_parser
+from enhanced_pdf_parser import EnhancedPDFParser
+from optimized_pdf_parser import OptimizedPDFParser
+from pdf_result_cache import ParseResultCache
+
+
+@pytest.fixture
+def tiny_ceiling(monkeypatch):
+    monkeypatch.setattr(pdf_memory, "MAX_RSS_MB", 1.0)
+    monkeypatch.setattr(precise_pdf_parser, "MAX_RSS_MB", 1.0)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ParseResultCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(precise_pdf_parser, "get_default_cache", lambda: cache)
+    return cache
+
+
+@pytest.mark.parametrize("make_parser", [
+    lambda: precise_pdf_parser.PrecisePDFParser(workers=1), OptimizedPDFParser, EnhancedPDFParser,
+], ids=["precise", "optimized", "enhanced"])
+def test_tiny_ceiling_flags_the_result(make_parser, synthetic_pdf, tiny_ceiling):
+    path, expected = synthetic_pdf(days=3, rows=3, noise=0, seed=1)
+    result = make_parser().parse_pdf(path)
+
+    assert result["success"] is True
+    limited = result["memory_limited"]
+    assert limited["limit_mb"] == 1.0
+    assert limited["stopped_after_page"] < expected["page_count"]
+
+
+def test_memory_limited_parse_is_not_cached(synthetic_pdf, tiny_ceiling, cache):
+    path, _ = synthetic_pdf(days=3, rows=3, noise=0, seed=1)
+
+    assert "memory_limited" in precise_pdf_parser.parsePDF(path)
+    done = list(precise_pdf_parser.streamPDF(path))[-1]
+    assert "memory_limited" in done
+
+    assert not [name for name in os.listdir(cache.cache_dir) if name.endswith(".json")]
+    assert cache.hits == 0
@@ -0,0 +1,29 @@
+import pytest
+
+from enhanced_pdf_parser import EnhancedPDFParser
+from optimized_pdf_parser import OptimizedPDFParser
+from pdf_parser_metrics import attach_serialize_time
+from precise_pdf_parser import PrecisePDFParser
+
+# Result keys without metrics, as before the metrics were added
+PARSERS = {
+    "precise": (lambda **kw: PrecisePDFParser(workers=1, **kw),
+                {"pages", "success", "total_pages", "skipped_pages", "strategies"}),
+    "optimized": (OptimizedPDFParser, {"pages", "success", "total_pages", "strategies"}),
+    "enhanced": (EnhancedPDFParser, {"pages", "success", "total_pages", "strategies"}),
+}
+
+
+@pytest.mark.parametrize("name", PARSERS)
+def test_disabled_metrics_leave_the_result_unchanged(name, synthetic_pdf):
+    make_parser, keys = PARSERS[name]
+    path, _ = synthetic_pdf(days=2, rows=3, noise=1, seed=1)
+
+    result = make_parser(collect_metrics=False).parse_pdf(path)
+    attach_serialize_time(result)
+    assert set(result) == keys
+
+    measured = make_parser(collect_metrics=True).parse_pdf(path)
+    assert set(measured) == keys | {"metrics"}
+    assert measured["pages"] == result["pages"]
+    assert "open" in measured["metrics"]["stages"]
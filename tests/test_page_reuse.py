@@ -0,0 +1,38 @@
+import random
+
+from pdf_result_cache import ParseResultCache
+from precise_pdf_parser import PrecisePDFParser
+from synthetic_pdf import _cover_page, _image_stream, _serialize, _table_page, _text_page, make_day
+
+
+def _write(path, streams):
+    with open(path, "wb") as f:
+        f.write(_serialize(streams, _image_stream(random.Random(0)), {}, 0))
+    return str(path)
+
+
+def test_revised_pdf_reuses_moved_pages(tmp_path):
+    rng = random.Random(4)
+    days = [make_day(d, 5, rng) for d in (1, 2, 3)]
+    # No "giorno" in the table: the parser names the day after its page
+    days[1]["title"] = "Upper body"
+    cover = _cover_page("Scheda di allenamento")
+    v1 = _write(tmp_path / "v1.pdf", [cover] + [_table_page(day) for day in days])
+
+    # v2 inserts a page before the days and edits the last one
+    days[2] = make_day(3, 6, rng)
+    v2 = _write(tmp_path / "v2.pdf", [cover, _text_page(rng)] + [_table_page(day) for day in days])
+
+    parser = PrecisePDFParser(workers=1, page_cache=ParseResultCache(str(tmp_path / "cache")))
+    parser.parse_pdf(v1)
+    result = parser.parse_pdf(v2)
+
+    assert result["reused_pages"] == [1, 3, 4]
+    assert result["recomputed_pages"] == [2, 5]
+    assert result["pages"] == PrecisePDFParser(workers=1).parse_pdf(v2)["pages"]
+    assert [(p["pageNumber"], p["title"]) for p in result["pages"]] == [
+        (3, "Giorno 1"), (4, "Giorno 4"), (5, "Giorno 3"),
+    ]
+    reports = {r["pageNumber"]: r for r in result["strategies"]}
+    assert sorted(reports) == [3, 4, 5]
+    assert reports[3]["reused"] and reports[4]["reused"] and "reused" not in reports[5]
@@ -0,0 +1,66 @@
+import os
+
+import pdf_memory
+import precise_pdf_parser
+from precise_pdf_parser import PrecisePDFParser
+
+
+def _without_timings(result):
+    strategies = [dict(r, attempts=[{k: v for k, v in a.items() if k != "ms"} for a in r["attempts"]])
+                  for r in result["strategies"]]
+    return dict(result, strategies=strategies)
+
+
+def test_only_large_documents_use_the_process_pool():
+    parser = PrecisePDFParser(workers=2, parallel_min_pages=4)
+
+    assert parser._should_parallelize(4)
+    assert not parser._should_parallelize(3)
+    assert not PrecisePDFParser(workers=1, parallel_min_pages=4)._should_parallelize(4)
+
+
+def test_parallel_parse_matches_serial(synthetic_pdf):
+    path, expected = synthetic_pdf(days=6, rows=5, noise=2, seed=3)
+    parallel = PrecisePDFParser(workers=2, parallel_min_pages=2, collect_metrics=False)
+    assert parallel._should_parallelize(expected["page_count"])
+
+    result = parallel.parse_pdf(path)
+    serial = PrecisePDFParser(workers=1, collect_metrics=False).parse_pdf(path)
+
+    assert _without_timings(result) == _without_timings(serial)
+    assert [p["pageNumber"] for p in result["pages"]] == [d["pageNumber"] for d in expected["days"]]
+
+
+def test_in_memory_document_is_spilled_for_the_pool(synthetic_pdf, monkeypatch):
+    path, _ = synthetic_pdf(days=6, rows=5, noise=2, seed=3)
+    with open(path, "rb") as f:
+        pdf_bytes = f.read()
+    spilled = []
+    parse_parallel = PrecisePDFParser._parse_parallel
+
+    def record(self, pdf_path, page_count, metrics):
+        spilled.append(pdf_path)
+        return parse_parallel(self, pdf_path, page_count, metrics)
+
+    monkeypatch.setattr(PrecisePDFParser, "_parse_parallel", record)
+    parallel = PrecisePDFParser(workers=2, parallel_min_pages=2, collect_metrics=False)
+    result = parallel.parse_pdf(pdf_bytes)
+
+    assert len(spilled) == 1 and spilled[0] != path
+    assert not os.path.exists(spilled[0])
+    serial = PrecisePDFParser(workers=1, collect_metrics=False).parse_pdf(pdf_bytes)
+    assert _without_timings(result) == _without_timings(serial)
+
+
+def test_rss_ceiling_runs_serially(synthetic_pdf, monkeypatch):
+    monkeypatch.setattr(pdf_memory, "MAX_RSS_MB", 1.0)
+    monkeypatch.setattr(precise_pdf_parser, "MAX_RSS_MB", 1.0)
+    path, expected = synthetic_pdf(days=6, rows=5, noise=0, seed=3)
+    parser = PrecisePDFParser(workers=2, parallel_min_pages=2, collect_metrics=False)
+    assert not parser._should_parallelize(expected["page_count"])
+
+    result = parser.parse_pdf(path)
+
+    # One process, one ceiling: it stops after the first page, not per worker range
+    assert result["memory_limited"]["stopped_after_page"] == 1
+    assert result["pages"] == []
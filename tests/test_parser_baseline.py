@@ -0,0 +1,62 @@
+import pytest
+
+from bench_parsers import _check_equivalence
+from enhanced_pdf_parser import EnhancedPDFParser
+from optimized_pdf_parser import OptimizedPDFParser
+from pdf_keywords import SETS_REPS_PATTERN
+from precise_pdf_parser import PrecisePDFParser
+
+PARSERS = {
+    "precise": lambda: PrecisePDFParser(workers=1),
+    "optimized": OptimizedPDFParser,
+    "enhanced": EnhancedPDFParser,
+}
+# Small cuts of the benchmark corpus, with and without noise pages and photos;
+# at most 10 rows, the optimized and enhanced parsers' per-page limit
+DOCUMENTS = [
+    dict(days=3, rows=4, noise=0, seed=1),
+    dict(days=4, rows=8, noise=3, seed=2),
+    dict(days=2, rows=10, noise=1, seed=9, photo_size=64),
+]
+
+
+def _sets_reps(weeks, recupero, note):
+    """The precise parser's pick: first filled week, then recupero, then note"""
+    first_week = next((w for w in weeks if w), "")
+    for value in (first_week, recupero, note):
+        if value and SETS_REPS_PATTERN.search(value):
+            return value
+    return "3 x 10"
+
+
+@pytest.mark.parametrize("doc", DOCUMENTS, ids=lambda d: f"{d['days']}d-{d['noise']}n-s{d['seed']}")
+@pytest.mark.parametrize("name", PARSERS)
+def test_parser_finds_every_day(name, doc, synthetic_pdf):
+    path, expected = synthetic_pdf(**doc)
+    result = PARSERS[name]().parse_pdf(path)
+
+    assert result["success"] is True
+    pages = [{"pageNumber": p["pageNumber"], "names": [ex["name"] for ex in p["exercises"]]}
+             for p in result["pages"]]
+    equivalence = _check_equivalence(pages, expected)
+    assert equivalence["equivalent"], equivalence
+
+
+@pytest.mark.parametrize("doc", DOCUMENTS, ids=lambda d: f"{d['days']}d-{d['noise']}n-s{d['seed']}")
+def test_precise_parser_reads_every_cell(doc, synthetic_pdf):
+    path, expected = synthetic_pdf(**doc)
+    result = PrecisePDFParser(workers=1).parse_pdf(path)
+
+    assert result["total_pages"] == len(expected["days"])
+    for page, day in zip(result["pages"], expected["days"]):
+        assert page["pageNumber"] == day["pageNumber"]
+        assert page["title"] == day["title"]
+        for exercise, row in zip(page["exercises"], day["rows"]):
+            name, *weeks, scarico, recupero, note = row
+            assert exercise["name"] == name
+            assert exercise["setsReps"] == _sets_reps(weeks, recupero, note)
+            assert [w["weight"] for w in exercise["weeks"].values()] == weeks
+            assert exercise.get("scarico", "") == scarico
+            assert exercise.get("recupero", "") == recupero
+            assert exercise.get("note", "") == note
+        assert len(page["exercises"]) == len(day["rows"])
@@ -0,0 +1,77 @@
+import base64
+import json
+import os
+import subprocess
+import sys
+
+from conftest import REPO_ROOT
+
+
+def _start_worker(script):
+    env = dict(os.environ, PDF_CACHE_DISABLED="1")
+    return subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, script), "--serve"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=REPO_ROOT, env=env,
+    )
+
+
+def _exchange(proc, lines):
+    """Send request lines, close stdin and return every response line after "ready" """
+    out, _ = proc.communicate("".join(line + "\n" for line in lines), timeout=120)
+    messages = [json.loads(line) for line in out.splitlines() if line.strip()]
+    assert messages[0]["event"] == "ready"
+    return messages[1:]
+
+
+def test_serve_answers_each_request_by_id(synthetic_pdf):
+    path, expected = synthetic_pdf(days=3, rows=4, noise=1, seed=1)
+    with open(path, "rb") as f:
+        data = base64.b64encode(f.read()).decode()
+
+    responses = _exchange(_start_worker("precise_pdf_parser.py"), [
+        json.dumps({"id": "by-path", "path": path}),
+        "not json",
+        json.dumps({"id": "by-data", "data": data, "encoding": "rows"}),
+        json.dumps({"id": "missing"}),
+    ])
+    by_id = {r["id"]: r for r in responses}
+
+    days = [d["pageNumber"] for d in expected["days"]]
+    assert [p["pageNumber"] for p in by_id["by-path"]["result"]["pages"]] == days
+    assert "elapsedMs" in by_id["by-path"]
+    # Rows are [pageNumber, title, exercises]
+    assert [p[0] for p in by_id["by-data"]["result"]["pages"]] == days
+    assert by_id["by-data"]["result"]["encoding"] == "rows"
+    assert by_id[None]["result"]["success"] is False
+    assert by_id["missing"]["result"]["success"] is False
+    assert "Missing 'path' or 'data'" in by_id["missing"]["result"]["error"]
+
+
+def test_serve_streams_pages_before_the_result(synthetic_pdf):
+    path, expected = synthetic_pdf(days=2, rows=3, noise=0, seed=2)
+    responses = _exchange(_start_worker("precise_pdf_parser.py"),
+                          [json.dumps({"id": "s", "path": path, "stream": True})])
+
+    assert [r.get("event") for r in responses] == ["page"] * len(expected["days"]) + [None]
+    assert responses[-1]["result"]["success"] is True
+
+
+def test_serve_streams_a_failed_parse_as_a_result(tmp_path):
+    responses = _exchange(_start_worker("precise_pdf_parser.py"),
+                          [json.dumps({"id": "s", "path": str(tmp_path / "missing.pdf"), "stream": True})])
+
+    assert len(responses) == 1
+    assert responses[0]["id"] == "s"
+    assert responses[0]["result"]["success"] is False
+
+
+def test_enhanced_worker_shares_the_protocol(synthetic_pdf):
+    path, expected = synthetic_pdf(days=2, rows=3, noise=0, seed=2)
+    responses = _exchange(_start_worker("enhanced_pdf_parser.py"), [
+        json.dumps({"id": "stats", "op": "stats"}),
+        json.dumps({"id": "rows", "path": path, "encoding": "rows"}),
+    ])
+    by_id = {r["id"]: r for r in responses}
+
+    assert by_id["stats"]["cache"] == {"enabled": False}
+    assert [p[0] for p in by_id["rows"]["result"]["pages"]] == [d["pageNumber"] for d in expected["days"]]
@@ -0,0 +1,34 @@
+import os
+
+from pdf_result_cache import ParseResultCache
+from precise_pdf_parser import PrecisePDFParser
+
+
+def test_eviction_removes_least_recently_used_entry(tmp_path):
+    entry = {"pages": ["x" * 100]}
+    cache = ParseResultCache(str(tmp_path), max_bytes=10_000)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, entry)
+        os.utime(cache._entry_path(key), (1000 + i, 1000 + i))
+
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == entry
+    entry_size = os.path.getsize(cache._entry_path("a"))
+    cache.max_bytes = 3 * entry_size
+    cache.put("d", entry)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) == entry for key in ("a", "c", "d"))
+    assert cache.evictions == 1
+
+
+def test_document_key_depends_on_prefilter(tmp_path):
+    pdf_bytes = b"%PDF-1.4 same document"
+    filtered = PrecisePDFParser(workers=1, prefilter=True)
+    unfiltered = PrecisePDFParser(workers=1, prefilter=False)
+
+    cache = ParseResultCache(str(tmp_path))
+    cache.put(ParseResultCache.make_key(pdf_bytes, filtered.cache_salt()), {"pages": []})
+
+    assert cache.get(ParseResultCache.make_key(pdf_bytes, unfiltered.cache_salt())) is None
+    assert cache.get(ParseResultCache.make_key(pdf_bytes, filtered.cache_salt())) == {"pages": []}
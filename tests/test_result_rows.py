@@ -0,0 +1,20 @@
+import json
+import os
+
+from pdf_result_model import RESULT_SCHEMA_VERSION, encode_result
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "rows_result.json")
+
+
+def test_rows_encoding_matches_the_fixture():
+    # tests/pdf-parser-pool.test.ts decodes the same rows back into these pages
+    with open(FIXTURE, encoding="utf-8") as f:
+        fixture = json.load(f)
+
+    encoded = encode_result(fixture["result"], rows=True)
+
+    assert encoded["pages"] == fixture["rows"]
+    assert encoded["encoding"] == "rows"
+    assert encoded["schema"] == RESULT_SCHEMA_VERSION
+    assert {k: v for k, v in encoded.items() if k not in ("pages", "encoding", "schema")} == \
+        {k: v for k, v in fixture["result"].items() if k != "pages"}
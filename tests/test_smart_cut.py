@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+import trim_video
+
+INFO = {"duration": 10.0, "video": {"codec": "h264", "profile": "High", "pixFmt": "yuv420p"},
+        "keyframes": [0.0, 2.0, 4.0, 6.0, 8.0]}
+
+
+@pytest.fixture
+def smart_cut(monkeypatch, tmp_path):
+    """Run _smart_cut against a fake probe, returning its re-encodes, copies and joins in order"""
+    def run(t_in, t_out, info=INFO):
+        steps = []
+
+        def fake_reencode(input_path, output_path, t_in, t_out, audio, stream=None, extra=()):
+            steps.append(("reencode", t_in, t_out, audio, os.path.basename(output_path)))
+
+        def fake_ffmpeg(cmd, duration=None, on_progress=None):
+            if "concat" in cmd:
+                with open(cmd[cmd.index("-i") + 1]) as f:
+                    pieces = [os.path.basename(line.split("'")[1]) for line in f]
+                steps.append(("join", pieces, os.path.basename(cmd[-1])))
+            else:
+                start = float(cmd[cmd.index("-ss") + 1])
+                steps.append(("copy", start, start + float(cmd[cmd.index("-t") + 1])))
+
+        monkeypatch.setattr(trim_video, "get_video_info", lambda path: info)
+        monkeypatch.setattr(trim_video, "_reencode", fake_reencode)
+        monkeypatch.setattr(trim_video, "_run_ffmpeg", fake_ffmpeg)
+        trim_video._smart_cut("in.mp4", str(tmp_path / "out.mp4"), t_in, t_out)
+        return steps
+
+    return run
+
+
+def test_reencodes_only_the_partial_gops(smart_cut):
+    assert smart_cut(1.0, 7.0) == [
+        ("reencode", 1.0, 2.0, False, "head.ts"),
+        ("copy", 2.0, 6.0),
+        ("reencode", 6.0, 7.0, False, "tail.ts"),
+        ("join", ["head.ts", "middle.ts", "tail.ts"], "out.mp4"),
+    ]
+
+
+def test_cut_on_keyframes_is_all_copy(smart_cut):
+    assert smart_cut(2.0, 6.0) == [
+        ("copy", 2.0, 6.0),
+        ("join", ["middle.ts"], "out.mp4"),
+    ]
+
+
+@pytest.mark.parametrize("info, t_in, t_out", [
+    (dict(INFO, video={"codec": "vp9"}), 1.0, 7.0),
+    (INFO, 2.5, 3.5),
+], ids=["no-compatible-encoder", "no-complete-gop"])
+def test_falls_back_to_a_full_reencode(smart_cut, info, t_in, t_out):
+    assert smart_cut(t_in, t_out, info) == [("reencode", t_in, t_out, True, "out.mp4")]
+
+
+def test_rejects_cuts_past_the_end(smart_cut):
+    with pytest.raises(ValueError):
+        smart_cut(9.0, 12.0)
@@ -0,0 +1,42 @@
+import pytest
+
+import enhanced_pdf_parser
+import optimized_pdf_parser
+import precise_pdf_parser
+
+PARSERS = {
+    "precise": (precise_pdf_parser, lambda: precise_pdf_parser.PrecisePDFParser(workers=1)),
+    "optimized": (optimized_pdf_parser, optimized_pdf_parser.OptimizedPDFParser),
+    "enhanced": (enhanced_pdf_parser, enhanced_pdf_parser.EnhancedPDFParser),
+}
+
+
+@pytest.mark.parametrize("name", PARSERS)
+def test_stream_matches_parse(name, synthetic_pdf):
+    module, make_parser = PARSERS[name]
+    path, _ = synthetic_pdf(days=3, rows=4, noise=2, seed=3)
+
+    result = make_parser().parse_pdf(path)
+    events = list(module.streamPDF(path))
+
+    assert [e["type"] for e in events] == ["page"] * len(result["pages"]) + ["done"]
+    assert [e["page"] for e in events[:-1]] == result["pages"]
+    done = events[-1]
+    assert done["success"] is True
+    assert done["total_pages"] == result["total_pages"]
+
+
+def test_optimized_total_pages_is_the_document_page_count(synthetic_pdf):
+    path, expected = synthetic_pdf(days=3, rows=4, noise=2, seed=3)
+
+    assert optimized_pdf_parser.OptimizedPDFParser().parse_pdf(path)["total_pages"] == expected["page_count"]
+    assert list(optimized_pdf_parser.streamPDF(path))[-1]["total_pages"] == expected["page_count"]
+
+
+@pytest.mark.parametrize("name", ["precise", "enhanced"])
+def test_total_pages_is_the_day_count(name, synthetic_pdf):
+    module, make_parser = PARSERS[name]
+    path, expected = synthetic_pdf(days=3, rows=4, noise=2, seed=3)
+
+    assert make_parser().parse_pdf(path)["total_pages"] == len(expected["days"])
+    assert list(module.streamPDF(path))[-1]["total_pages"] == len(expected["days"])
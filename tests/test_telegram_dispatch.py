@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+import telegram_dispatch
+from telegram_dispatch import TelegramClient, TelegramError, dispatch
+
+BLOB = "blobs/" + "ab" * 32 + ".mp4"
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    os.makedirs(tmp_path / "blobs")
+    for name, size in ((BLOB, 10), ("bench-w1.mp4", 30)):
+        (tmp_path / name).write_bytes(b"\0" * size)
+    return str(tmp_path)
+
+
+class FakeBot:
+    """Records Bot API calls as (method, number of videos); fail_next fails the next video send"""
+
+    def __init__(self):
+        self.calls = []
+        self.fail_next = False
+        self.next_id = 1
+
+    def call(self, method, data=None, files=None):
+        if method != "sendMessage" and self.fail_next:
+            self.fail_next = False
+            raise TelegramError(f"{method}: Bad Request")
+        self.calls.append((method, len(files or {})))
+        count = len(files) if method == "sendMediaGroup" else 1
+        messages = [{"message_id": self.next_id + i} for i in range(count)]
+        self.next_id += count
+        return messages if method == "sendMediaGroup" else messages[0]
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    fake = FakeBot()
+    monkeypatch.setattr(TelegramClient, "call", lambda client, *args, **kwargs: fake.call(*args, **kwargs))
+    monkeypatch.setattr(telegram_dispatch, "emit", lambda event, **fields: None)
+    return fake
+
+
+def _payload(upload_dir, notes=""):
+    session = {"id": 7, "selectedDay": "Giorno 1", "exercises": [
+        {"id": "ex_1", "name": "Squat", "notes": notes, "weeks": {"settimana_1": {"weight": "100", "video": True}}},
+        {"id": "ex_2", "name": "Panca", "weeks": {"settimana_1": {"weight": "80", "video": True}}},
+    ]}
+    videos = [
+        {"id": 1, "exerciseId": "ex_1", "weekId": "settimana_1", "filename": BLOB},
+        {"id": 2, "exerciseId": "ex_2", "weekId": "settimana_1", "filename": "bench-w1.mp4"},
+    ]
+    return {"session": session, "videos": videos, "uploadDir": upload_dir}
+
+
+def test_resend_only_ships_what_changed(upload_dir, bot):
+    first = dispatch(_payload(upload_dir), "token", "42")
+    assert first == {"summary": "sent", "sent": 2, "skipped": 0, "failed": [], "groups": 1}
+    assert bot.calls == [("sendMessage", 0), ("sendMediaGroup", 2)]
+
+    bot.calls.clear()
+    again = dispatch(_payload(upload_dir), "token", "42")
+    assert again == {"summary": "unchanged", "sent": 0, "skipped": 2, "failed": [], "groups": 0}
+    assert bot.calls == []
+
+    # A re-recorded video and a new note: only those go out
+    with open(os.path.join(upload_dir, "bench-w1.mp4"), "ab") as f:
+        f.write(b"\1")
+    changed = dispatch(_payload(upload_dir, notes="Ginocchio ok"), "token", "42")
+    assert changed == {"summary": "sent", "sent": 1, "skipped": 1, "failed": [], "groups": 1}
+    assert bot.calls == [("sendMessage", 0), ("sendVideo", 1)]
+
+
+def test_ledger_is_kept_per_chat(upload_dir, bot):
+    dispatch(_payload(upload_dir), "token", "42")
+    other = dispatch(_payload(upload_dir), "token", "43")
+    assert other["summary"] == "sent" and other["sent"] == 2
+
+
+def test_failed_videos_are_sent_on_the_next_run(upload_dir, bot):
+    bot.fail_next = True
+    failed = dispatch(_payload(upload_dir), "token", "42")
+    assert failed["sent"] == 0
+    assert [f["videoId"] for f in failed["failed"]] == [1, 2]
+
+    retried = dispatch(_payload(upload_dir), "token", "42")
+    assert retried == {"summary": "unchanged", "sent": 2, "skipped": 0, "failed": [], "groups": 1}
+
+
+def test_missing_files_are_reported(upload_dir, bot):
+    os.remove(os.path.join(upload_dir, "bench-w1.mp4"))
+    result = dispatch(_payload(upload_dir), "token", "42")
+    assert result["sent"] == 1
+    assert result["failed"] == [{"videoId": 2, "error": "File not found"}]
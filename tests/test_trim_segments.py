@@ -0,0 +1,100 @@
+import subprocess
+
+import pytest
+
+import trim_video
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"not really a video")
+    return str(path)
+
+
+@pytest.fixture
+def ffmpeg_calls(monkeypatch):
+    """Record ffmpeg commands instead of running them; outputs get a few bytes"""
+    calls = []
+
+    def fake_ffmpeg(cmd, duration=None, on_progress=None):
+        calls.append((cmd, duration))
+        for arg in cmd:
+            if arg.endswith("-out.mp4"):
+                with open(arg, "wb") as f:
+                    f.write(b"cut")
+
+    monkeypatch.setattr(trim_video, "_run_ffmpeg", fake_ffmpeg)
+    return calls
+
+
+def _input_windows(cmd):
+    return [cmd[i - 4:i + 2] for i, arg in enumerate(cmd) if arg == "-i"]
+
+
+def test_each_segment_seeks_like_a_single_trim(clip, tmp_path, ffmpeg_calls, monkeypatch):
+    segments = [(1.5, 4.0, str(tmp_path / "a-out.mp4")), (10, 12.25, str(tmp_path / "b-out.mp4"))]
+    results = trim_video.trim_segments(clip, segments)
+
+    assert [r["ok"] for r in results] == [True, True]
+    (cmd, duration), = ffmpeg_calls
+    assert duration == 2.5
+
+    singles = []
+    monkeypatch.setattr(trim_video.subprocess, "run", lambda cmd, **kwargs: singles.append(cmd))
+    for t_in, t_out, output in segments:
+        assert trim_video.trim_video(clip, output, t_in, t_out)
+    assert _input_windows(cmd) == [_input_windows(single)[0] for single in singles]
+
+    for index, (_, _, output) in enumerate(segments):
+        at = cmd.index(output)
+        assert cmd[at - 8:at - 2] == ["-map", f"{index}:v:0", "-map", f"{index}:a:0?", "-c", "copy"]
+
+
+def test_invalid_segments_are_reported_and_skipped(clip, tmp_path, ffmpeg_calls):
+    segments = [
+        (3, 1, str(tmp_path / "backwards-out.mp4")),
+        (0, 2, str(tmp_path / "good-out.mp4")),
+        ("x", 2, str(tmp_path / "garbage-out.mp4")),
+        (0, 2, ""),
+    ]
+    results = trim_video.trim_segments(clip, segments)
+
+    assert [r["ok"] for r in results] == [False, True, False, False]
+    assert all(r["error"] for i, r in enumerate(results) if i != 1)
+    (cmd, _), = ffmpeg_calls
+    assert cmd.count("-i") == 1 and cmd[-1] == str(tmp_path / "good-out.mp4")
+
+
+def test_failed_batch_retries_segments_one_by_one(clip, tmp_path, monkeypatch):
+    def failing_ffmpeg(cmd, duration=None, on_progress=None):
+        raise subprocess.CalledProcessError(1, cmd, stderr="Permission denied")
+
+    retried = []
+
+    def fake_trim(input_path, output_path, t_in, t_out, mode="copy"):
+        retried.append((t_in, t_out))
+        if t_in == 0:
+            return False
+        with open(output_path, "wb") as f:
+            f.write(b"cut")
+        return True
+
+    monkeypatch.setattr(trim_video, "_run_ffmpeg", failing_ffmpeg)
+    monkeypatch.setattr(trim_video, "trim_video", fake_trim)
+    segments = [(0, 1, str(tmp_path / "a-out.mp4")), (2, 3, str(tmp_path / "b-out.mp4"))]
+    results = trim_video.trim_segments(clip, segments)
+
+    assert retried == [(0.0, 1.0), (2.0, 3.0)]
+    assert [r["ok"] for r in results] == [False, True]
+    assert results[0]["error"] == "Trim failed"
+
+
+def test_trim_messages_stay_off_stdout(clip, tmp_path, monkeypatch, capsys):
+    # --batch prints its JSON report on stdout, and retries go through trim_video()
+    monkeypatch.setattr(trim_video.subprocess, "run", lambda cmd, **kwargs: None)
+    assert trim_video.trim_video(clip, str(tmp_path / "a-out.mp4"), 0, 1)
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Video trimmed successfully" in captured.err
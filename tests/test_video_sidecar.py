@@ -0,0 +1,47 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import video_utils
+
+# Nanoseconds past 2**53, as real mtimes are: a JSON number would round them
+MTIME_NS = 1_760_000_000_123_456_789
+INFO = {"duration": 12.5, "bitRate": 800000, "format": "mov,mp4,m4a,3gp,3g2,mj2",
+        "video": {"codec": "h264", "width": 1080, "height": 1920, "fps": 30.0, "bitRate": 700000},
+        "audio": None}
+
+
+@pytest.fixture
+def probed_video(tmp_path, monkeypatch):
+    """A video whose sidecar was written by get_video_info, with ffprobe faked"""
+    video = tmp_path / "squat.mp4"
+    video.write_bytes(b"\0" * 64)
+    os.utime(video, ns=(MTIME_NS, MTIME_NS))
+    monkeypatch.setattr(video_utils, "probe_metadata", lambda path: dict(INFO))
+    monkeypatch.setattr(video_utils, "probe_keyframes", lambda path: [0.0, 2.0])
+    video_utils.get_video_info(str(video))
+    return str(video)
+
+
+def test_sidecar_is_reused_until_the_file_changes(probed_video):
+    assert video_utils.cached_video_info(probed_video)["keyframes"] == [0.0, 2.0]
+
+    os.utime(probed_video, ns=(MTIME_NS + 1, MTIME_NS + 1))
+    assert video_utils.cached_video_info(probed_video) is None
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_node_matches_the_python_key(probed_video):
+    # The comparison readVideoInfo() in server/video-info.ts makes
+    script = """
+const fs = require("fs");
+const [video, sidecar] = process.argv.slice(1);
+const key = JSON.parse(fs.readFileSync(sidecar, "utf-8")).key;
+console.log(JSON.stringify(key.mtime_ns === fs.statSync(video, { bigint: true }).mtimeNs.toString()));
+"""
+    out = subprocess.run(["node", "-e", script, probed_video, video_utils.sidecar_path(probed_video)],
+                         capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) is True
@@ -0,0 +1,75 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import fs from "fs";
+import os from "os";
+import path from "path";
+import type { TrimJob, TrimJobSegment } from "../server/trim-queue";
+
+// trim-cache.ts keeps its state under process.cwd()/uploads, so the module is
+// loaded from a scratch directory. A 1 MB cache holds two 400 kB clips.
+process.chdir(fs.mkdtempSync(path.join(os.tmpdir(), "trim-cache-")));
+process.env.TRIM_CACHE_MAX_MB = "1";
+const { trimCache } = await import("../server/trim-cache");
+
+const SOURCE = "a".repeat(64);
+const CLIP_BYTES = 400 * 1024;
+
+function segment(t_in: number, t_out: number): TrimJobSegment {
+  const output = path.resolve("uploads", `${t_in}-${t_out}_trimmed.mp4`);
+  fs.mkdirSync(path.dirname(output), { recursive: true });
+  fs.writeFileSync(output, "clip");
+  return { t_in, t_out, output };
+}
+
+// A finished copy-mode job that wrote every segment
+function finished(segments: TrimJobSegment[]): TrimJob {
+  return {
+    status: "done",
+    mode: "copy",
+    segments,
+    result: { segments: segments.map(() => ({ ok: true, bytes: CLIP_BYTES })) },
+  } as TrimJob;
+}
+
+test("the least recently used clip is evicted and deleted", async () => {
+  const a = segment(0, 1);
+  const b = segment(1, 2);
+  const c = segment(2, 3);
+  trimCache.recordJob(SOURCE, finished([a]));
+  trimCache.recordJob(SOURCE, finished([b]));
+
+  // A lookup makes a the most recently used clip, so adding c evicts b
+  assert.equal(trimCache.lookup(SOURCE, a, "copy"), a.output);
+  trimCache.recordJob(SOURCE, finished([c]));
+
+  assert.equal(trimCache.lookup(SOURCE, b, "copy"), null);
+  assert.equal(trimCache.lookup(SOURCE, a, "copy"), a.output);
+  assert.equal(trimCache.lookup(SOURCE, c, "copy"), c.output);
+  assert.equal(trimCache.stats().evictions, 1);
+  assert.equal(trimCache.stats().bytes, 2 * CLIP_BYTES);
+  await new Promise((resolve) => setTimeout(resolve, 50));
+  assert.equal(fs.existsSync(b.output), false);
+  assert.equal(fs.existsSync(a.output), true);
+});
+
+test("cut points are matched to the millisecond, per mode", () => {
+  const cut = segment(10, 12.5);
+  trimCache.recordJob(SOURCE, finished([cut]));
+
+  assert.equal(trimCache.lookup(SOURCE, { t_in: 10.0004, t_out: 12.4996 }, "copy"), cut.output);
+  assert.equal(trimCache.lookup(SOURCE, { t_in: 10.002, t_out: 12.5 }, "copy"), null);
+  assert.equal(trimCache.lookup(SOURCE, { t_in: 10, t_out: 12.5 }, "smart"), null);
+  assert.equal(trimCache.lookup("b".repeat(64), { t_in: 10, t_out: 12.5 }, "copy"), null);
+});
+
+test("only the segments without a cached clip go to the queue", () => {
+  const cut = segment(20, 21);
+  trimCache.recordJob(SOURCE, finished([cut]));
+  const fresh = { t_in: 21, t_out: 22, output: path.resolve("uploads", "new_trimmed.mp4") };
+  const again = { t_in: 20, t_out: 21, output: path.resolve("uploads", "again_trimmed.mp4") };
+
+  const { cached, pending } = trimCache.split(SOURCE, [fresh, again], "copy");
+
+  assert.deepEqual(cached, [null, cut.output]);
+  assert.deepEqual(pending, [fresh]);
+});
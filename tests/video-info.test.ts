@@ -0,0 +1,40 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import { execFileSync } from "child_process";
+import fs from "fs";
+import os from "os";
+import path from "path";
+import { readVideoInfo } from "../server/video-info";
+
+// Nanoseconds past 2**53, as real mtimes are: a JSON number would round them
+const MTIME_NS = "1760000000123456789";
+
+// Set the mtime and let server/video_utils.py write the sidecar, with ffprobe
+// replaced by fixed info
+function probeWithPython(videoPath: string, mtimeNs: string) {
+  const script = `
+import os, sys, video_utils
+mtime_ns = int(sys.argv[2])
+os.utime(sys.argv[1], ns=(mtime_ns, mtime_ns))
+video_utils.probe_metadata = lambda path: {"duration": 12.5, "video": None, "audio": None}
+video_utils.probe_keyframes = lambda path: []
+video_utils.get_video_info(sys.argv[1])
+`;
+  execFileSync("python3", ["-c", script, videoPath, mtimeNs], {
+    env: { ...process.env, PYTHONPATH: path.resolve("server") },
+  });
+}
+
+test("readVideoInfo reads a sidecar written by video_utils.py", async () => {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), "video-info-"));
+  const video = path.join(dir, "squat.mp4");
+  fs.writeFileSync(video, Buffer.alloc(64));
+  probeWithPython(video, MTIME_NS);
+  assert.equal(fs.statSync(video, { bigint: true }).mtimeNs.toString(), MTIME_NS);
+
+  assert.deepEqual(await readVideoInfo(video), { duration: 12.5, video: null, audio: null, keyframes: [] });
+
+  fs.utimesSync(video, new Date(), new Date());
+  assert.equal(await readVideoInfo(video), null);
+  fs.rmSync(dir, { recursive: true, force: true });
+});
@@ -0,0 +1,76 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import fs from "fs";
+import os from "os";
+import path from "path";
+
+// Stand-ins for the Python helpers, run from a scratch directory as
+// server/<name>.py. The probe writes a current sidecar and logs each run;
+// the preview script fails on its first run and writes a manifest after that.
+const FAKE_PROBE = `
+import json, os, sys
+video = sys.argv[1]
+with open("probes.log", "a") as f:
+    f.write(video + "\\n")
+st = os.stat(video)
+info = {"duration": 3.0, "bitRate": None, "format": "mp4", "video": None, "audio": None, "keyframes": []}
+sidecar = os.path.join(os.path.dirname(os.path.abspath(video)), ".probe")
+os.makedirs(sidecar, exist_ok=True)
+with open(os.path.join(sidecar, os.path.basename(video) + ".json"), "w") as f:
+    json.dump({"version": 2, "key": {"name": os.path.basename(video), "mtime_ns": str(st.st_mtime_ns),
+               "size": st.st_size}, "info": info}, f)
+print(json.dumps(info))
+`;
+
+const FAKE_PREVIEWS = `
+import json, os, sys
+video, out_dir = sys.argv[1], sys.argv[2]
+if not os.path.exists("previews.failed"):
+    open("previews.failed", "w").close()
+    print("encoder crashed", file=sys.stderr)
+    sys.exit(1)
+name = os.path.basename(video)
+manifest = {"source": name, "proxy": None, "poster": {"file": name + ".poster.jpg"}, "sprite": None, "errors": {}}
+with open(os.path.join(out_dir, name + ".previews.json"), "w") as f:
+    json.dump(manifest, f)
+`;
+
+const scratch = fs.mkdtempSync(path.join(os.tmpdir(), "video-previews-"));
+process.chdir(scratch);
+fs.mkdirSync("server");
+fs.mkdirSync(path.join("uploads", "previews"), { recursive: true });
+fs.writeFileSync(path.join("server", "video_utils.py"), FAKE_PROBE);
+fs.writeFileSync(path.join("server", "video_previews.py"), FAKE_PREVIEWS);
+process.env.PREVIEW_RETRY_MS = "300";
+const { previewQueue } = await import("../server/video-previews");
+
+async function settled(videoPath: string) {
+  while (true) {
+    const state = await previewQueue.state(videoPath);
+    if (state.status !== "queued" && state.status !== "running") return state;
+    await new Promise((resolve) => setTimeout(resolve, 20));
+  }
+}
+
+test("a failed preview is retried after the delay and then read from its manifest", async () => {
+  const video = path.join(scratch, "uploads", "squat.mp4");
+  fs.writeFileSync(video, "not really a video");
+
+  previewQueue.enqueue(video);
+  const failed = await settled(video);
+  assert.equal(failed.status, "failed");
+  assert.match(failed.error ?? "", /encoder crashed/);
+
+  // Within the retry delay the failure stands
+  previewQueue.enqueue(video);
+  assert.equal((await previewQueue.state(video)).status, "failed");
+
+  await new Promise((resolve) => setTimeout(resolve, 350));
+  assert.equal((await previewQueue.state(video)).status, "queued");
+  const ready = await settled(video);
+  assert.equal(ready.status, "ready");
+  assert.equal(ready.manifest?.poster?.file, "squat.mp4.poster.jpg");
+
+  // Both runs used the sidecar written by the first probe
+  assert.equal(fs.readFileSync("probes.log", "utf-8").trim().split("\n").length, 1);
+});